@@ -2,7 +2,6 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 from typing import Dict, Any
-import threading
 import time
 import os
 
@@ -11,10 +10,22 @@ from models import (
     DecisionRepository, ResponseRepository, AuthRepository, DeviceRepository
 )
 from factories import ControllerFactory, ViewFactory
+from ui_dispatch import TkDispatcher, SpeechEventBridge
+from background import BackgroundExecutor
+from event_bus import EventBus
+from chat import ChatLog, ChatPanel
 
 class SystemApplication:
-    def __init__(self):
+    def __init__(self, watchdog_threshold_ms=None):
         self.root = tk.Tk()
+        
+        # Сторож зависаний запускается до создания виджетов, чтобы
+        # обертка успела охватить все обработчики
+        self.watchdog = None
+        if watchdog_threshold_ms:
+            from ui_watchdog import TkStallWatchdog
+            self.watchdog = TkStallWatchdog(self.root, threshold_ms=watchdog_threshold_ms)
+            self.watchdog.start()
         self.root.title("Система Управления - Умный Дом с распознаванием речи")
         self.root.geometry("1100x850")
         
@@ -29,8 +40,15 @@ class SystemApplication:
             'device': DeviceRepository()
         }
         
+        # Распознанные фразы и результаты фоновых операций доставляются
+        # в поток интерфейса по событию
+        self.dispatcher = TkDispatcher(self.root)
+        self.executor = BackgroundExecutor(self.dispatcher)
+        # События контроллеров доходят до окон через очереди шины, в потоке интерфейса
+        self.bus = EventBus(self.dispatcher)
+        
         # Создаем контроллеры через фабрику
-        self.controllers = ControllerFactory.create_controllers(self.repositories)
+        self.controllers = ControllerFactory.create_controllers(self.repositories, self.executor, self.bus)
         
         # Создаем контейнеры для UI
         self.setup_ui()
@@ -45,14 +63,19 @@ class SystemApplication:
         # Переменные для голосового управления
         self.voice_command_mode = False
         self.last_voice_command = ""
+        # Разбор команд строится при первой фразе
+        self.intent_parser = None
+        
+        # Модель чата живет дольше виджета: переживает переходы между экранами
+        self.chat = ChatPanel(ChatLog())
         
         self.show_auth_state()
         
         # Обработчики событий авторизации
         self.root.bind('<<LoginSuccess>>', self.on_login_success)
         
-        # Запускаем фоновый поток для проверки голосовых команд
-        self.start_voice_input_checker()
+        # Подписка на фразы оформляется, когда контроллер речи впервые понадобится
+        self.controllers.when_created('speech', self.start_voice_dispatch)
     
     def setup_ui(self):
         # Создаем главный контейнер
@@ -175,6 +198,7 @@ class SystemApplication:
         scrollbar = ttk.Scrollbar(chat_frame, command=self.chat_text.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.chat_text.config(yscrollcommand=scrollbar.set)
+        self.chat.attach(self.chat_text)
         
         # Панель ввода
         input_frame = ttk.Frame(dialog_frame)
@@ -196,12 +220,20 @@ class SystemApplication:
         ttk.Button(input_frame, text="🧹 Очистить чат", 
                   command=self.clear_chat).pack(side=tk.LEFT, padx=5)
         
+        # Листание истории чата
+        history_frame = ttk.Frame(dialog_frame)
+        history_frame.pack(fill=tk.X, padx=20)
+        ttk.Button(history_frame, text="⬆️ Ранее", 
+                  command=self.chat.show_older).pack(side=tk.LEFT, padx=5)
+        ttk.Button(history_frame, text="⬇️ К последним", 
+                  command=self.chat.show_latest).pack(side=tk.LEFT, padx=5)
+        
         # Статус синхронизации
         ttk.Label(dialog_frame, text="🔄 Синхронизация с устройствами каждые 30 сек", 
                  font=('Arial', 10)).pack(pady=5)
         
-        # Подключенные устройства
-        self.update_device_list()
+        # Подключенные устройства (панель обновляется по событиям контроллера)
+        self.show_device_list(dialog_frame)
     
     def show_device_state(self):
         """Показывает интерфейс управления устройствами"""
@@ -303,36 +335,21 @@ class SystemApplication:
         message = self.input_entry.get()
         if message and self.current_user:
             timestamp = datetime.now().strftime("%H:%M:%S")
-            
-            # Временно включаем текстовое поле для вставки
-            self.chat_text.config(state='normal')
-            self.chat_text.insert(tk.END, f"[{timestamp}] Вы: {message}\n")
-            
-            # Имитация ответа системы
-            response = "Принято в обработку. Анализирую запрос..."
-            self.chat_text.insert(tk.END, f"[{timestamp}] Система: {response}\n")
-            
-            # Прокрутка вниз
-            self.chat_text.see(tk.END)
-            # Отключаем редактирование обратно
-            self.chat_text.config(state='disabled')
+            self.chat.add(f"[{timestamp}] Вы: {message}")
+            self.respond_to(message)
             
             self.input_entry.delete(0, tk.END)
     
-    def start_voice_input_checker(self):
-        """Запускает фоновый поток для автоматической отправки распознанной речи в чат"""
-        def check_voice_input():
-            while True:
-                if hasattr(self, 'controllers') and 'speech' in self.controllers:
-                    phrase = self.controllers['speech'].get_next_phrase(timeout=0.5)
-                    if phrase and self.current_user and self.voice_command_mode:
-                        # Автоматически отправляем распознанную речь в чат
-                        if hasattr(self, 'chat_text') and self.current_state == "dialog":
-                            self.root.after(0, lambda text=phrase: self.send_voice_message(text))
-                time.sleep(0.1)
-        
-        thread = threading.Thread(target=check_voice_input, daemon=True)
-        thread.start()
+    def start_voice_dispatch(self, speech_controller):
+        """Подписывает чат на распознанные фразы (без фонового опроса очереди)"""
+        self.voice_bridge = SpeechEventBridge(speech_controller, self.dispatcher, self.on_voice_phrase)
+        speech_controller.add_view(self.voice_bridge)
+    
+    def on_voice_phrase(self, result):
+        """Автоматически отправляет распознанную речь в чат (вызывается в потоке Tk)"""
+        if self.current_user and self.voice_command_mode:
+            if hasattr(self, 'chat_text') and self.current_state == "dialog":
+                self.send_voice_message(result.text)
     
     def send_voice_message(self, text: str):
         """Отправить распознанную речь напрямую в чат"""
@@ -340,97 +357,84 @@ class SystemApplication:
             return
         
         timestamp = datetime.now().strftime("%H:%M:%S")
+        self.chat.add(f"[{timestamp}] Вы (голос): {text}")
+        self.respond_to(text)
+    
+    def respond_to(self, text: str):
+        """Разобрать фразу в команду устройству и выполнить ее в фоне"""
+        if self.intent_parser is None:
+            from intents import IntentParser
+            from fuzzy_index import FuzzyDeviceIndex
+            device_controller = self.controllers['device']
+            self.intent_parser = IntentParser(device_controller, fuzzy=FuzzyDeviceIndex(device_controller))
+        
+        intent = self.intent_parser.parse(text)
+        if intent is None:
+            # Не команда устройству - цепочка анализа со стратегией по
+            # умолчанию (ансамбль со сроком ответа)
+            self.add_to_chat("Система: Принято в обработку. Анализирую запрос...")
+            self.controllers['analysis'].run_in_background(
+                self.answer_request, text,
+                on_done=lambda response: self.add_to_chat(f"Система: {response.message}"),
+                on_error=lambda e: self.add_to_chat(f"Система: Ошибка обработки запроса: {e}")
+            )
+            return
         
-        # Временно включаем текстовое поле для вставки
-        self.chat_text.config(state='normal')
-        self.chat_text.insert(tk.END, f"[{timestamp}] Вы (голос): {text}\n")
-        
-        # Имитация ответа системы
-        response = "Принято в обработку. Анализирую запрос..."
-        self.chat_text.insert(tk.END, f"[{timestamp}] Система: {response}\n")
-        
-        # Прокрутка вниз
-        self.chat_text.see(tk.END)
-        # Отключаем редактирование обратно
-        self.chat_text.config(state='disabled')
+        from intents import apply_intent
+        device_controller = self.controllers['device']
+        device_controller.run_in_background(
+            apply_intent, intent, device_controller,
+            on_done=lambda reply: self.add_to_chat(f"Система: {reply}")
+        )
+    
+    def answer_request(self, text: str):
+        """Запрос -> анализ -> решение -> ответ (в фоновом потоке)"""
+        from pipeline import create_command_request
+        request = create_command_request(self.controllers['request'], text, "chat")
+        analysis = self.controllers['analysis'].perform_analysis(request)
+        decision = self.controllers['decision'].make_decision(analysis)
+        return self.controllers['response'].generate_response(decision)
     
     def add_to_chat(self, message: str):
         """Добавить сообщение в чат"""
-        if hasattr(self, 'chat_text'):
-            timestamp = time.strftime("%H:%M:%S")
-            self.chat_text.config(state='normal')
-            self.chat_text.insert(tk.END, f"[{timestamp}] {message}\n")
-            self.chat_text.see(tk.END)
-            self.chat_text.config(state='disabled')
+        timestamp = time.strftime("%H:%M:%S")
+        self.chat.add(f"[{timestamp}] {message}")
     
     def toggle_voice_commands(self):
         """Включить/выключить голосовой ввод (через кнопку Голосовой ввод)"""
         self.voice_command_mode = not self.voice_command_mode
         
         if self.voice_command_mode:
-            self.voice_input_btn.config(text="🎤 Голосовой ввод ВКЛ")
-            
             # Автоматически запускаем распознавание
             speech_controller = self.controllers['speech']
-            if not speech_controller.is_listening:
-                speech_controller.start_listening()
+            if not speech_controller.is_listening and not speech_controller.start_listening():
+                self.voice_command_mode = False
+                self.add_to_chat("🤖 Не удалось запустить распознавание речи, попробуйте еще раз.")
+                return
             
+            self.voice_input_btn.config(text="🎤 Голосовой ввод ВКЛ")
             self.add_to_chat("🤖 Голосовой ввод активирован. Говорите, ваши слова будут автоматически отправлены в чат.")
         else:
             self.voice_input_btn.config(text="🎤 Голосовой ввод")
             
-            # Останавливаем распознавание
-            speech_controller = self.controllers['speech']
-            if speech_controller.is_listening:
-                speech_controller.stop_listening()
+            # Останавливаем распознавание (если оно вообще запускалось)
+            if self.controllers.is_created('speech'):
+                speech_controller = self.controllers['speech']
+                if speech_controller.is_listening:
+                    speech_controller.stop_listening()
             
             self.add_to_chat("🤖 Голосовой ввод отключен.")
     
-    def update_device_list(self):
-        """Обновить список устройств в диалоге"""
-        if hasattr(self, 'current_state') and self.current_state == "dialog":
-            device_controller = self.controllers['device']
-            devices = device_controller.get_all_devices()
-            online_devices = [d for d in devices if d.status == 'online']
-            
-            # Создаем или обновляем фрейм устройств
-            if hasattr(self, 'device_frame'):
-                try:
-                    self.device_frame.destroy()
-                except:
-                    pass
-            
-            if online_devices:
-                # Находим dialog_frame
-                dialog_frame = None
-                for widget in self.content_container.winfo_children():
-                    if isinstance(widget, ttk.Frame):
-                        dialog_frame = widget
-                        break
-                
-                if dialog_frame:
-                    self.device_frame = ttk.LabelFrame(dialog_frame, text="✅ Подключенные устройства")
-                    self.device_frame.pack(fill=tk.X, padx=20, pady=10)
-                    
-                    for device in online_devices[:3]:
-                        ttk.Label(self.device_frame, 
-                                 text=f"• {device.name} ({device.type}) - {device.connection_info}").pack(anchor=tk.W)
-                    
-                    if len(online_devices) > 3:
-                        ttk.Label(self.device_frame, 
-                                 text=f"... и ещё {len(online_devices) - 3} устройств").pack(anchor=tk.W)
-        
-        # Планируем следующее обновление через 30 секунд
-        if hasattr(self, 'root'):
-            self.root.after(30000, self.update_device_list)
-    
+    def show_device_list(self, dialog_frame):
+        """Показать панель подключенных устройств в диалоге"""
+        panel = self.views['connected_devices']
+        panel.pack(in_=dialog_frame, fill=tk.X, padx=20, pady=10)
+        # Панель создана раньше dialog_frame и иначе оказалась бы под ним
+        panel.lift()
     
     def clear_chat(self):
         """Очищает чат"""
-        if hasattr(self, 'chat_text'):
-            self.chat_text.config(state='normal')
-            self.chat_text.delete(1.0, tk.END)
-            self.chat_text.config(state='disabled')
+        self.chat.clear()
     
     def save_settings(self):
         """Сохраняет настройки"""
@@ -440,56 +444,13 @@ class SystemApplication:
     def run(self):
         """Запускает приложение"""
         self.root.mainloop()
-
-# ====================== КОНТЕЙНЕР ЗАВИСИМОСТЕЙ ======================
-
-class DependencyContainer:
-    def __init__(self):
-        self.registry = {}
-    
-    def register(self, interface, implementation):
-        self.registry[interface] = implementation
-    
-    def resolve(self, interface):
-        if interface in self.registry:
-            return self.registry[interface]()
-        raise ValueError(f"Не зарегистрировано: {interface}")
-
-class SystemConfigurator:
-    def __init__(self):
-        self.container = DependencyContainer()
-        self.setup_dependencies()
-    
-    def setup_dependencies(self):
-        from patterns import IAnalysisStrategy, MachineLearningStrategy
-        # Регистрируем репозитории
-        self.container.register(SoundRepository, SoundRepository)
-        self.container.register(SensorDataRepository, SensorDataRepository)
-        self.container.register(RequestRepository, RequestRepository)
-        self.container.register(DecisionRepository, DecisionRepository)
-        self.container.register(ResponseRepository, ResponseRepository)
-        self.container.register(AuthRepository, AuthRepository)
-        self.container.register(DeviceRepository, DeviceRepository)
-        
-        # Регистрируем стратегии
-        self.container.register(IAnalysisStrategy, MachineLearningStrategy)
-    
-    def create_repositories(self) -> Dict[str, Any]:
-        repos = {
-            'sound': self.container.resolve(SoundRepository),
-            'sensor': self.container.resolve(SensorDataRepository),
-            'request': self.container.resolve(RequestRepository),
-            'decision': self.container.resolve(DecisionRepository),
-            'response': self.container.resolve(ResponseRepository),
-            'auth': self.container.resolve(AuthRepository),
-            'device': self.container.resolve(DeviceRepository)
-        }
-        return repos
-    
-    def create_controllers(self, repos: Dict) -> Dict:
-        return ControllerFactory.create_controllers(repos)
-    
-    def link_components(self):
-        # Дополнительная логика связывания компонентов
-        pass
-
+        if self.controllers.is_created('speech'):
+            self.controllers['speech'].shutdown(timeout=2.0)
+        self.executor.shutdown()
+        if self.controllers.is_created('analysis'):
+            self.controllers['analysis'].shutdown()
+        self.bus.shutdown()
+        self.chat.chat_log.close()
+        if self.watchdog is not None:
+            self.watchdog.stop()
+            print(self.watchdog.format_report())
@@ -0,0 +1,266 @@
+import json
+import os
+import time
+import wave
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional
+
+MANIFEST_NAME = "manifest.json"
+
+# SpeechRecognition импортируется при первом использовании, чтобы не
+# замедлять запуск приложения до включения голосового ввода
+_speech_recognition = None
+
+def load_speech_recognition():
+    """Модуль speech_recognition или None, если библиотека не установлена"""
+    global _speech_recognition
+    if _speech_recognition is None:
+        try:
+            import speech_recognition
+            _speech_recognition = speech_recognition
+        except ImportError:
+            _speech_recognition = False
+    return _speech_recognition or None
+
+def speech_recognition_available() -> bool:
+    return load_speech_recognition() is not None
+
+# Фрагмент аудио (одна фраза), независимый от источника
+@dataclass
+class AudioClip:
+    frame_data: bytes
+    sample_rate: int
+    sample_width: int
+    transcript: str = ""
+    captured_at: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        if not self.sample_rate or not self.sample_width:
+            return 0.0
+        return len(self.frame_data) / float(self.sample_rate * self.sample_width)
+
+    def to_audio_data(self):
+        """Преобразовать в sr.AudioData для распознавателей SpeechRecognition"""
+        return load_speech_recognition().AudioData(self.frame_data, self.sample_rate, self.sample_width)
+
+# Интерфейс источника аудио
+class IAudioSource(ABC):
+    exhausted = False
+
+    @abstractmethod
+    def open(self) -> None:
+        pass
+
+    @abstractmethod
+    def listen(self, timeout: float, phrase_time_limit: float) -> Optional[AudioClip]:
+        """Вернуть следующую фразу или None, если за timeout ничего не услышано"""
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+class MicrophoneSource(IAudioSource):
+    """Живой микрофон через SpeechRecognition"""
+    def __init__(self, device_index=None, energy_threshold=300, pause_threshold=0.8):
+        self.device_index = device_index
+        self.energy_threshold = energy_threshold
+        self.pause_threshold = pause_threshold
+        self.recognizer = None
+        self.microphone = None
+        self._stream = None
+
+    @staticmethod
+    def list_devices() -> List[str]:
+        """Имена доступных устройств захвата (индекс в списке - device_index)"""
+        return load_speech_recognition().Microphone.list_microphone_names()
+
+    def open(self) -> None:
+        sr = load_speech_recognition()
+        self.recognizer = sr.Recognizer()
+        self.recognizer.energy_threshold = self.energy_threshold
+        self.recognizer.pause_threshold = self.pause_threshold
+        self.microphone = sr.Microphone(device_index=self.device_index)
+        self._stream = self.microphone.__enter__()
+        self.recognizer.adjust_for_ambient_noise(self._stream)
+
+    def listen(self, timeout: float, phrase_time_limit: float) -> Optional[AudioClip]:
+        sr = load_speech_recognition()
+        try:
+            audio = self.recognizer.listen(
+                self._stream,
+                phrase_time_limit=phrase_time_limit,
+                timeout=timeout
+            )
+        except sr.WaitTimeoutError:
+            return None
+        return AudioClip(
+            frame_data=audio.frame_data,
+            sample_rate=audio.sample_rate,
+            sample_width=audio.sample_width,
+            captured_at=time.time()
+        )
+
+    def close(self) -> None:
+        if self.microphone is not None:
+            self.microphone.__exit__(None, None, None)
+        self.microphone = None
+        self._stream = None
+
+class RecordingSource(IAudioSource):
+    """Обертка над источником, сохраняющая каждую фразу на диск для повторного воспроизведения"""
+    def __init__(self, inner: IAudioSource, directory: str):
+        self.inner = inner
+        self.directory = directory
+        self.clips: List[AudioClip] = []
+        self.entries: List[dict] = []
+        self.start_time = 0.0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.inner.exhausted
+
+    def open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self.clips.clear()
+        self.entries.clear()
+        self.start_time = time.time()
+        self.inner.open()
+
+    def listen(self, timeout: float, phrase_time_limit: float) -> Optional[AudioClip]:
+        clip = self.inner.listen(timeout, phrase_time_limit)
+        if clip is None:
+            return None
+
+        filename = f"{len(self.clips):05d}.wav"
+        write_wav(os.path.join(self.directory, filename), clip)
+        self.clips.append(clip)
+        self.entries.append({
+            "file": filename,
+            "offset": round((clip.captured_at or time.time()) - self.start_time, 3),
+            "duration": round(clip.duration, 3)
+        })
+        return clip
+
+    def close(self) -> None:
+        self.inner.close()
+        self.save_manifest()
+
+    def save_manifest(self) -> None:
+        # Расшифровка проставляется контроллером после распознавания
+        for entry, clip in zip(self.entries, self.clips):
+            entry["transcript"] = clip.transcript
+        with open(os.path.join(self.directory, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+
+class ReplaySource(IAudioSource):
+    """Детерминированное воспроизведение записанной сессии.
+
+    speed=1.0 - в реальном времени, speed=10 - в 10 раз быстрее,
+    speed=0 - без пауз между фразами.
+    """
+    def __init__(self, directory: str, speed: float = 1.0, loop: bool = False):
+        self.directory = directory
+        self.speed = speed
+        self.loop = loop
+        self.entries: List[dict] = []
+        self.position = 0
+        self.start_time = 0.0
+        self.exhausted = False
+
+    def open(self) -> None:
+        self.entries = load_manifest(self.directory)
+        self.position = 0
+        self.start_time = time.time()
+        self.exhausted = not self.entries
+
+    def listen(self, timeout: float, phrase_time_limit: float) -> Optional[AudioClip]:
+        if self.position >= len(self.entries):
+            if not self.loop or not self.entries:
+                self.exhausted = True
+                return None
+            self.position = 0
+            self.start_time = time.time()
+
+        entry = self.entries[self.position]
+        if self.speed > 0:
+            # Фраза "заканчивается" в момент offset + duration исходной записи
+            due = self.start_time + (entry.get("offset", 0.0) + entry.get("duration", 0.0)) / self.speed
+            delay = due - time.time()
+            if delay > timeout:
+                time.sleep(timeout)
+                return None
+            if delay > 0:
+                time.sleep(delay)
+
+        self.position += 1
+        clip = read_wav(os.path.join(self.directory, entry["file"]))
+        clip.transcript = entry.get("transcript", "")
+        clip.captured_at = time.time()
+        return clip
+
+    def close(self) -> None:
+        pass
+
+# Интерфейс распознавателя
+class IRecognizer(ABC):
+    @abstractmethod
+    def recognize(self, clip: AudioClip) -> str:
+        pass
+
+class GoogleRecognizer(IRecognizer):
+    def __init__(self, language="ru-RU"):
+        self.language = language
+        sr = load_speech_recognition()
+        self.recognizer = sr.Recognizer() if sr else None
+
+    def recognize(self, clip: AudioClip) -> str:
+        return self.recognizer.recognize_google(clip.to_audio_data(), language=self.language)
+
+class SphinxRecognizer(IRecognizer):
+    """Локальное распознавание через pocketsphinx (без сети)"""
+    def __init__(self, language="en-US"):
+        self.language = language
+        sr = load_speech_recognition()
+        self.recognizer = sr.Recognizer() if sr else None
+
+    def recognize(self, clip: AudioClip) -> str:
+        return self.recognizer.recognize_sphinx(clip.to_audio_data(), language=self.language)
+
+class TranscriptRecognizer(IRecognizer):
+    """Фиктивный распознаватель: возвращает расшифровку из записи.
+
+    latency позволяет имитировать время ответа сервиса распознавания.
+    """
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def recognize(self, clip: AudioClip) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return clip.transcript
+
+# Работа с файлами записи
+def write_wav(path: str, clip: AudioClip) -> None:
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(clip.sample_width)
+        f.setframerate(clip.sample_rate)
+        f.writeframes(clip.frame_data)
+
+def read_wav(path: str) -> AudioClip:
+    with wave.open(path, 'rb') as f:
+        return AudioClip(
+            frame_data=f.readframes(f.getnframes()),
+            sample_rate=f.getframerate(),
+            sample_width=f.getsampwidth()
+        )
+
+def load_manifest(directory: str) -> List[dict]:
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
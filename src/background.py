@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+class BackgroundTask:
+    """Операция, выполняемая в фоне. cancel() снимает ее из очереди, а если
+    она уже выполняется - отбрасывает результат"""
+    def __init__(self):
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+class BackgroundExecutor:
+    """Пул потоков для блокирующих операций контроллеров.
+
+    Операции выполняются в max_workers потоках, в очереди ждут не более
+    max_pending; сверх этого submit отказывает, а не копит работу.
+    Результат и ошибка доставляются обработчикам в потоке интерфейса
+    через dispatcher (TkDispatcher); без него - прямо в рабочем потоке.
+    """
+    def __init__(self, dispatcher=None, max_workers: int = 2, max_pending: int = 8):
+        self.dispatcher = dispatcher
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="controller")
+        self.slots = threading.BoundedSemaphore(max_workers + max_pending)
+        # Поток интерфейса - тот, что создал исполнитель
+        self.ui_thread = threading.get_ident()
+        self.lock = threading.Lock()
+
+        # Метрики
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def submit(self, operation: Callable, *args, on_done: Optional[Callable] = None,
+               on_error: Optional[Callable] = None) -> Optional[BackgroundTask]:
+        """Поставить операцию в очередь; None - очередь заполнена"""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            return None
+
+        task = BackgroundTask()
+        try:
+            task.future = self.pool.submit(operation, *args)
+        except RuntimeError:
+            # Исполнитель уже остановлен
+            self.slots.release()
+            return None
+        with self.lock:
+            self.submitted += 1
+        task.future.add_done_callback(lambda future: self._complete(task, future, on_done, on_error))
+        return task
+
+    def call_in_ui(self, callback: Callable, *args) -> None:
+        """Вызвать callback в потоке интерфейса (сразу, если он уже в нем)"""
+        if self.dispatcher is None or threading.get_ident() == self.ui_thread:
+            callback(*args)
+        else:
+            self.dispatcher.post(callback, *args)
+
+    def shutdown(self, wait: bool = False, cancel_pending: bool = True) -> None:
+        self.pool.shutdown(wait=wait, cancel_futures=cancel_pending)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "rejected": self.rejected
+            }
+
+    def _complete(self, task: BackgroundTask, future, on_done, on_error) -> None:
+        self.slots.release()
+        if future.cancelled() or task.cancelled:
+            with self.lock:
+                self.cancelled += 1
+            return
+
+        error = future.exception()
+        with self.lock:
+            if error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+        if error is not None:
+            self.call_in_ui(self._deliver, task, on_error or self._report_error, error)
+        elif on_done is not None:
+            self.call_in_ui(self._deliver, task, on_done, future.result())
+
+    @staticmethod
+    def _deliver(task: BackgroundTask, callback: Callable, value) -> None:
+        # Отмена могла прийти, пока результат ждал очереди интерфейса
+        if not task.cancelled:
+            callback(value)
+
+    @staticmethod
+    def _report_error(error: BaseException) -> None:
+        print(f"Ошибка фоновой операции: {error}")
@@ -0,0 +1,1227 @@
+"""Бенчмарки системы.
+
+Запуск:
+    python benchmarks.py replay --corpus corpus --speed 0
+    python benchmarks.py replay --corpus corpus --sources 4 --pool 2
+    python benchmarks.py record --corpus corpus --duration 60
+    python benchmarks.py wakeword --corpus corpus --phrase "привет дом"
+    python benchmarks.py dispatch --phrases 50
+    python benchmarks.py chat --messages 100000
+    python benchmarks.py devices --sizes 1000 10000 100000
+    python benchmarks.py search --size 100000
+    python benchmarks.py startup --budget-ms 1500
+    python benchmarks.py headless --commands 10000 --clients 4
+    python benchmarks.py background --size 10000 --operations 50
+    python benchmarks.py intents --size 50000
+    python benchmarks.py fuzzy --size 50000
+    python benchmarks.py pipeline --commands 5000 --call-ms 2
+    python benchmarks.py stats --samples 1000000
+    python benchmarks.py classifier --phrases 2000 --batch 64
+    python benchmarks.py cache --samples 1000000 --repeats 20
+    python benchmarks.py incremental --samples 200000 --rounds 50 --new 100
+    python benchmarks.py ensemble --runs 20 --deadline-ms 200
+    python benchmarks.py rules --sizes 100 10000 100000 --decisions 50000
+    python benchmarks.py bus --events 20000 --devices 50 --handler-ms 1
+    python benchmarks.py telemetry --devices 10000 --messages 200000
+"""
+import argparse
+import json
+import math
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from audio_sources import (
+    AudioClip, MicrophoneSource, RecordingSource, ReplaySource,
+    TranscriptRecognizer, write_wav, MANIFEST_NAME
+)
+from keyword_spotting import (
+    SphinxKeywordSpotter, TranscriptKeywordSpotter, evaluate_spotter
+)
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+def make_synthetic_corpus(directory: str, phrases: List[str], gap: float = 0.5,
+                          sample_rate: int = 16000) -> None:
+    """Создать офлайн-корпус: по тону на каждую фразу и манифест с расшифровками"""
+    os.makedirs(directory, exist_ok=True)
+    entries = []
+    offset = 0.0
+    for i, text in enumerate(phrases):
+        duration = 0.3 + 0.05 * len(text.split())
+        frames = int(sample_rate * duration)
+        data = b"".join(
+            struct.pack("<h", int(8000 * math.sin(2 * math.pi * 440 * n / sample_rate)))
+            for n in range(frames)
+        )
+        filename = f"{i:05d}.wav"
+        write_wav(os.path.join(directory, filename), AudioClip(data, sample_rate, 2))
+        entries.append({"file": filename, "offset": round(offset, 3),
+                        "duration": round(duration, 3), "transcript": text})
+        offset += duration + gap
+    with open(os.path.join(directory, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+
+def bench_replay(corpus: str, speed: float = 0.0, recognizer=None,
+                 sources: int = 1, pool_size: int = 2, wake_spotter=None,
+                 wake_window: float = 5.0) -> Dict[str, float]:
+    """Прогнать записанную сессию через контроллер и измерить пропускную способность и задержку.
+
+    sources > 1 воспроизводит корпус одновременно в нескольких "комнатах".
+    """
+    from speech_recognition_module import SpeechRecognitionController
+
+    controller = SpeechRecognitionController(recognizer=recognizer or TranscriptRecognizer(),
+                                             pool_size=pool_size)
+    # Храним всю историю, чтобы посчитать задержку по каждой фразе
+    controller.history_limit = None
+    # Бенчмарк учитывает каждую фразу - очередь без потерь
+    controller.configure_queue(maxsize=0, expire_after=None)
+    if wake_spotter is not None:
+        # Окно диалога сжимается вместе с ускоренным воспроизведением
+        window = wake_window / speed if speed > 0 else wake_window
+        controller.set_wake_word(getattr(wake_spotter, "wake_phrase", "wake"), wake_spotter, window)
+
+    started = time.perf_counter()
+    for i in range(sources):
+        controller.add_source(f"room_{i}", ReplaySource(corpus, speed=speed))
+    controller.start_all()
+    phrases = 0
+    while controller.is_listening or not controller.audio_queue.empty():
+        if controller.get_next_phrase(timeout=0.1) is not None:
+            phrases += 1
+    controller.wait_until_stopped()
+    elapsed = time.perf_counter() - started
+
+    latencies = [item["latency"] for item in controller.recognition_history]
+    results = {
+        "phrases": phrases,
+        "dropped": controller.dropped_clips,
+        "elapsed_s": elapsed,
+        "phrases_per_s": phrases / elapsed if elapsed else 0.0,
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p95_ms": percentile(latencies, 95) * 1000,
+    }
+    results.update(controller.get_wake_stats())
+    return results
+
+def bench_wake_word(corpus: str, wake_phrase: str, spotter_name: str = "sphinx",
+                    speed: float = 10.0) -> Dict[str, float]:
+    """Точность детектора ключевой фразы и число сэкономленных вызовов распознавания"""
+    if spotter_name == "sphinx":
+        spotter = SphinxKeywordSpotter(wake_phrase)
+        if not spotter.available:
+            print("Детектор sphinx недоступен: установите SpeechRecognition и pocketsphinx "
+                  "с моделью ru-RU или выберите --spotter transcript")
+            return {}
+    else:
+        spotter = TranscriptKeywordSpotter(wake_phrase)
+    results = evaluate_spotter(spotter, corpus, wake_phrase)
+    replay = bench_replay(corpus, speed, wake_spotter=spotter)
+    results["recognition_calls"] = replay.get("forwarded", 0)
+    results["avoided_recognitions"] = replay.get("avoided_recognitions", 0)
+    return results
+
+def record_session(corpus: str, duration: float) -> None:
+    """Записать живую сессию с микрофона для последующего воспроизведения"""
+    from speech_recognition_module import SpeechRecognitionController
+
+    controller = SpeechRecognitionController()
+    controller.start_listening(timeout=duration,
+                               source=RecordingSource(MicrophoneSource(), corpus))
+    controller.wait_until_stopped()
+
+def _publish_phrases(controller, count: int, interval: float) -> None:
+    """Имитация потока распознавания: фраза в очередь и уведомление подписчиков.
+
+    Фразы идут парами (короткая пауза, затем длинная), как при диалоге.
+    """
+    from speech_recognition_module import RecognizedPhrase
+    for i in range(count):
+        time.sleep(interval * (0.2 if i % 2 else 1.8))
+        now = time.time()
+        controller.audio_queue.put(RecognizedPhrase(f"фраза {i}", "bench", now, now))
+        controller.notify_views({"type": "phrase_recognized", "source": "bench"})
+
+def bench_dispatch(phrases: int = 50, interval: float = 0.15, idle: float = 1.5) -> Dict[str, float]:
+    """Задержка доставки фразы в интерфейс и пробуждения в простое: прежний опрос против событий"""
+    import threading
+    from speech_recognition_module import SpeechRecognitionController
+    from ui_dispatch import ImmediateDispatcher, SpeechEventBridge, TkDispatcher
+
+    # Прежняя схема: поток опрашивает очередь с таймаутом 0.5 с и спит 0.1 с
+    controller = SpeechRecognitionController()
+    polled = []
+    wakeups = [0]
+    done = threading.Event()
+
+    def poll():
+        while not done.is_set():
+            wakeups[0] += 1
+            result = controller.get_next_result(timeout=0.5)
+            if result:
+                polled.append(time.time() - result.recognized_at)
+            time.sleep(0.1)
+
+    threading.Thread(target=poll, daemon=True).start()
+    time.sleep(idle)
+    polling_idle_wakeups = wakeups[0]
+    _publish_phrases(controller, phrases, interval)
+    while len(polled) < phrases:
+        time.sleep(0.05)
+    done.set()
+
+    # Новая схема: доставка по событию
+    controller = SpeechRecognitionController()
+    received = []
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        dispatcher = TkDispatcher(root)
+        mode = "tk"
+    except Exception:
+        root = None
+        dispatcher = ImmediateDispatcher()
+        mode = "immediate"
+
+    drains = [0]
+    bridge = SpeechEventBridge(controller, dispatcher, received.append)
+    original_drain = bridge._drain
+
+    def counted_drain():
+        drains[0] += 1
+        original_drain()
+
+    bridge._drain = counted_drain
+    controller.add_view(bridge)
+
+    def produce():
+        time.sleep(idle)
+        drains.append(drains[0])
+        _publish_phrases(controller, phrases, interval)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    if root is not None:
+        def check_done():
+            if len(received) >= phrases:
+                root.quit()
+            else:
+                root.after(50, check_done)
+        root.after(50, check_done)
+        root.mainloop()
+        root.destroy()
+    producer.join()
+
+    stats = bridge.get_stats()
+    return {
+        "dispatcher": mode,
+        "polling_avg_ms": sum(polled) / len(polled) * 1000,
+        "polling_max_ms": max(polled) * 1000,
+        "event_avg_ms": stats["latency_avg_ms"],
+        "event_max_ms": stats["latency_max_ms"],
+        "polling_idle_wakeups_per_s": polling_idle_wakeups / idle,
+        "event_idle_wakeups_per_s": drains[1] / idle,
+    }
+
+def bench_chat(messages: int = 100000, batch: int = 4, filename: str = "bench_chat.log") -> Dict[str, float]:
+    """Цена добавления сообщения в чат в начале и в конце длинной сессии"""
+    from chat import ChatLog, ChatPanel
+
+    chat_log = ChatLog(filename)
+    panel = ChatPanel(chat_log)
+    root = None
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        panel.attach(tk.Text(root))
+        mode = "tk"
+    except Exception:
+        mode = "model"
+
+    window = max(batch, messages // 10)
+    costs = []
+    for i in range(0, messages, batch):
+        started = time.perf_counter()
+        for j in range(batch):
+            panel.add(f"[00:00:00] Вы (голос): сообщение {i + j}")
+        # Один кадр: все строки кадра вставляются одним обновлением
+        if root is not None:
+            panel.flush()
+        costs.append((time.perf_counter() - started) / batch)
+
+    first = costs[:window // batch]
+    last = costs[-(window // batch):]
+    results = {
+        "renderer": mode,
+        "messages": messages,
+        "first_us_per_msg": sum(first) / len(first) * 1e6,
+        "last_us_per_msg": sum(last) / len(last) * 1e6,
+        "lines_in_memory": len(chat_log.lines),
+        "lines_archived": chat_log.archived_count,
+    }
+    chat_log.close()
+    os.remove(filename)
+    if root is not None:
+        root.destroy()
+    return results
+
+def make_device_file(filename: str, count: int) -> None:
+    """Создать файл парка из count устройств"""
+    types = ["сенсор", "актуатор", "камера", "динамик", "микрофон", "контроллер"]
+    statuses = ["online", "offline", "error", "обслуживание"]
+    devices = [{
+        "id": f"dev_{i}",
+        "name": f"Устройство {i}",
+        "type": types[i % len(types)],
+        "status": statuses[i % len(statuses)],
+        "connection_info": f"192.168.{i // 256 % 256}.{i % 256}"
+    } for i in range(count)]
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(devices, f, ensure_ascii=False)
+
+def bench_device_view(sizes: List[int], filename: str = "bench_devices.json") -> List[Dict[str, float]]:
+    """Время и память обновления таблицы устройств для парков разного размера"""
+    import tracemalloc
+    from models import DeviceRepository, Device
+    from controllers import DeviceController
+
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        root = None
+
+    results = []
+    for size in sizes:
+        make_device_file(filename, size)
+        tracemalloc.start()
+        started = time.perf_counter()
+        controller = DeviceController(DeviceRepository(filename))
+        load_time = time.perf_counter() - started
+
+        row = {"devices": size, "load_ms": load_time * 1000}
+        if root is not None:
+            from views import DeviceView
+            view = DeviceView(controller, root)
+            started = time.perf_counter()
+            view.refresh_devices()
+            row["refresh_ms"] = (time.perf_counter() - started) * 1000
+
+            # Одиночное событие: изменение строки без полной перерисовки
+            device = controller.get_device_by_id("dev_0")
+            started = time.perf_counter()
+            view.update({"type": "device_updated",
+                         "device": Device(device.id, "Новое имя", device.type, device.status,
+                                          device.connection_info)})
+            row["event_ms"] = (time.perf_counter() - started) * 1000
+            row["tree_rows"] = len(view.tree.get_children())
+            view.destroy()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        row["peak_mb"] = peak / 1024 / 1024
+        results.append(row)
+
+    os.remove(filename)
+    if root is not None:
+        root.destroy()
+    return results
+
+def bench_device_search(size: int = 100000, filename: str = "bench_devices.json") -> Dict[str, float]:
+    """Поиск, фильтр и сортировка по индексам на большом парке"""
+    from models import DeviceRepository
+    from controllers import DeviceController
+    from device_index import DeviceSearchIndex
+
+    make_device_file(filename, size)
+    controller = DeviceController(DeviceRepository(filename))
+    os.remove(filename)
+
+    started = time.perf_counter()
+    index = DeviceSearchIndex(controller.get_all_devices())
+    results = {"devices": size, "build_ms": (time.perf_counter() - started) * 1000}
+
+    queries = {"short": "ус", "narrow": "устройство 123", "ip": "168.1.", "broad": "камера"}
+    for name, query in queries.items():
+        started = time.perf_counter()
+        ids = index.search(query)
+        filtered = controller.filter_device_ids("online", None)
+        ids = ids & filtered
+        order = index.ordered("name", ids)
+        results[f"{name}_ms"] = (time.perf_counter() - started) * 1000
+        results[f"{name}_rows"] = len(order)
+
+    started = time.perf_counter()
+    index.ordered("connection_info", None, descending=True)
+    results["sort_all_ms"] = (time.perf_counter() - started) * 1000
+    return results
+
+STARTUP_SCRIPT = """
+import time
+started = time.perf_counter()
+from application import SystemApplication
+imported = time.perf_counter()
+app = SystemApplication()
+app.root.update()
+ready = time.perf_counter()
+print(f"{(imported - started) * 1000:.3f} {(ready - started) * 1000:.3f}")
+app.root.destroy()
+"""
+
+def bench_startup(top: int = 10) -> Dict[str, float]:
+    """Время до интерактивной формы входа и разбивка импорта по модулям (-X importtime).
+
+    Дочерний процесс запускается во временном каталоге, чтобы не
+    трогать users.json и devices.json рабочего каталога.
+    """
+    src = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=src)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import application"],
+                              cwd=workdir, env=env, capture_output=True, text=True)
+        modules = []
+        for line in proc.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules.append((int(self_us), int(cumulative_us), name.strip()))
+        for self_us, cumulative_us, name in modules:
+            if name == "application":
+                results["import_application_ms"] = cumulative_us / 1000
+        for self_us, cumulative_us, name in sorted(modules, reverse=True)[:top]:
+            results[f"self {name}_ms"] = self_us / 1000
+
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT],
+                              cwd=workdir, env=env, capture_output=True, text=True)
+        wall = (time.perf_counter() - started) * 1000
+        if proc.returncode == 0:
+            imported_ms, ready_ms = proc.stdout.split()[-2:]
+            results["imports_ms"] = float(imported_ms)
+            results["login_form_ready_ms"] = float(ready_ms)
+            results["process_wall_ms"] = wall
+        else:
+            # Без дисплея Tk не запускается - остается только разбивка импорта
+            results["login_form_ready_ms"] = None
+            results["error"] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "?"
+    return results
+
+def bench_headless(commands: int, clients: int = 1) -> Dict[str, float]:
+    """Пропускная способность цепочки запрос -> ответ без графического интерфейса"""
+    import threading
+    from headless import HeadlessRuntime
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            runtime = HeadlessRuntime()
+        finally:
+            os.chdir(cwd)
+
+        latencies: List[float] = []
+        lock = threading.Lock()
+
+        def client(count: int):
+            local = []
+            for i in range(count):
+                started = time.perf_counter()
+                runtime.process_command(f"включи устройство {i}", "bench")
+                local.append((time.perf_counter() - started) * 1000)
+            with lock:
+                latencies.extend(local)
+
+        per_client = max(1, commands // clients)
+        threads = [threading.Thread(target=client, args=(per_client,)) for _ in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    return {
+        "commands": len(latencies),
+        "clients": clients,
+        "commands_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+        "latency_max_ms": max(latencies) if latencies else 0.0
+    }
+
+def bench_background(size: int, operations: int) -> Dict[str, float]:
+    """Время, на которое обновление устройства занимает поток интерфейса:
+    синхронный вызов против постановки в BackgroundExecutor"""
+    from background import BackgroundExecutor
+    from models import DeviceRepository, Device
+    from controllers import DeviceController
+
+    results = {"devices": size, "operations": operations}
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, "devices.json")
+        make_device_file(filename, size)
+        controller = DeviceController(DeviceRepository(filename))
+
+        def updated(i: int) -> Device:
+            device = controller.get_device_by_id(f"dev_{i}")
+            return Device(device.id, device.name, device.type, "offline", device.connection_info)
+
+        blocked = []
+        for i in range(operations):
+            started = time.perf_counter()
+            controller.update_device(updated(i))
+            blocked.append((time.perf_counter() - started) * 1000)
+        results["sync_blocked_p50_ms"] = percentile(blocked, 50)
+        results["sync_blocked_max_ms"] = max(blocked)
+
+        executor = BackgroundExecutor(max_workers=2, max_pending=operations)
+        controller.executor = executor
+        blocked = []
+        done = []
+        started_all = time.perf_counter()
+        for i in range(operations):
+            started = time.perf_counter()
+            controller.run_in_background(controller.update_device, updated(i), on_done=done.append)
+            blocked.append((time.perf_counter() - started) * 1000)
+        executor.shutdown(wait=True, cancel_pending=False)
+        results["async_blocked_p50_ms"] = percentile(blocked, 50)
+        results["async_blocked_max_ms"] = max(blocked)
+        results["async_total_ms"] = (time.perf_counter() - started_all) * 1000
+        results["async_completed"] = len(done)
+    return results
+
+def bench_intents(size: int, phrases: int = 2000) -> Dict[str, float]:
+    """Построение автомата названий, его дообновление и время разбора фразы"""
+    from models import DeviceRepository, Device
+    from controllers import DeviceController
+    from intents import IntentParser
+
+    results = {"devices": size}
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, "devices.json")
+        make_device_file(filename, size)
+        controller = DeviceController(DeviceRepository(filename))
+
+        started = time.perf_counter()
+        parser = IntentParser(controller)
+        results["build_ms"] = (time.perf_counter() - started) * 1000
+
+        # Дообновление без записи файла: события подаются напрямую
+        timings = []
+        for i in range(200):
+            device = Device(f"new_{i}", f"Новое устройство {i}", "сенсор", "online", "")
+            started = time.perf_counter()
+            parser.update({"type": "device_added", "device": device})
+            timings.append((time.perf_counter() - started) * 1000)
+        results["add_p50_ms"] = percentile(timings, 50)
+        results["add_max_ms"] = max(timings)
+
+        timings = []
+        for i in range(phrases):
+            text = f"включи устройство {i * 7919 % size} пожалуйста"
+            started = time.perf_counter()
+            parser.parse(text)
+            timings.append((time.perf_counter() - started) * 1000)
+        results["parse_p50_ms"] = percentile(timings, 50)
+        results["parse_p99_ms"] = percentile(timings, 99)
+    return results
+
+def bench_fuzzy(size: int, queries: int = 500) -> Dict[str, float]:
+    """Нечеткий поиск искаженных названий: время построения, поиска и доля верных ответов"""
+    import random
+    from models import DeviceRepository
+    from controllers import DeviceController
+    from fuzzy_index import FuzzyDeviceIndex
+
+    rng = random.Random(1)
+    results = {"devices": size}
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, "devices.json")
+        make_device_file(filename, size)
+        controller = DeviceController(DeviceRepository(filename))
+
+        started = time.perf_counter()
+        index = FuzzyDeviceIndex(controller)
+        results["build_ms"] = (time.perf_counter() - started) * 1000
+
+        timings = []
+        correct = 0
+        for _ in range(queries):
+            i = rng.randrange(size)
+            # Ошибка распознавания: пропущенная буква в слове
+            word = "устройство"
+            position = rng.randrange(len(word))
+            query = f"{word[:position]}{word[position + 1:]} {i}"
+            started = time.perf_counter()
+            candidates = index.resolve(query, limit=1)
+            timings.append((time.perf_counter() - started) * 1000)
+            correct += bool(candidates) and candidates[0][0] == f"dev_{i}"
+        results["resolve_p50_ms"] = percentile(timings, 50)
+        results["resolve_p99_ms"] = percentile(timings, 99)
+        results["top1_accuracy"] = correct / queries
+    return results
+
+def bench_pipeline(commands: int, call_ms: float, item_ms: float, batch: int) -> Dict[str, float]:
+    """Конвейер против последовательной цепочки.
+
+    Стратегия анализа имитирует модель: фиксированная цена вызова
+    call_ms плюс item_ms на каждый запрос пакета.
+    """
+    from headless import HeadlessRuntime
+    from patterns import IAnalysisStrategy
+    from models import Analysis
+
+    class SimulatedStrategy(IAnalysisStrategy):
+        def analyze_data(self, data):
+            return self.analyze_batch([data])[0]
+
+        def analyze_batch(self, items):
+            time.sleep((call_ms + item_ms * len(items)) / 1000)
+            return [Analysis(id="sim", result="Simulated", confidence=0.9) for _ in items]
+
+    results = {"commands": commands}
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            runtime = HeadlessRuntime()
+        finally:
+            os.chdir(cwd)
+        runtime.controllers['analysis'].set_strategy(SimulatedStrategy())
+
+        sequential = max(1, commands // 10)
+        started = time.perf_counter()
+        for i in range(sequential):
+            runtime.process_command(f"команда {i}")
+        results["sequential_per_s"] = sequential / (time.perf_counter() - started)
+
+        from pipeline import RequestPipeline
+        runtime.pipeline = RequestPipeline(runtime.controllers, analysis_batch=batch)
+        runtime.pipeline.start()
+        latencies: List[float] = []
+        started = time.perf_counter()
+        futures = []
+        for i in range(commands):
+            submitted = time.perf_counter()
+            future = runtime.submit_command(f"команда {i}", "bench")
+            future.add_done_callback(lambda _, t=submitted: latencies.append(time.perf_counter() - t))
+            futures.append(future)
+        for future in futures:
+            future.result()
+        results["pipeline_per_s"] = commands / (time.perf_counter() - started)
+        results["latency_p50_ms"] = percentile(latencies, 50) * 1000
+        results["latency_p95_ms"] = percentile(latencies, 95) * 1000
+        for name, stats in runtime.pipeline.get_stats().items():
+            results[f"{name} avg_batch"] = stats["avg_batch"]
+            results[f"{name} max_depth"] = stats["max_queue_depth"]
+            results[f"{name} utilization"] = stats["utilization"]
+        runtime.shutdown()
+    return results
+
+def bench_statistics(samples: int, repeats: int = 5) -> Dict[str, float]:
+    """Статистический анализ окна в samples значений: NumPy против чистого Python"""
+    import random
+    from models import (SensorDataRepository, SoundRepository, RequestRepository,
+                        SensorData, Sound, Request)
+    from controllers import AnalysisController
+    from patterns import StatisticalAnalysisStrategy
+    from sensor_statistics import numpy_available
+
+    rng = random.Random(1)
+    sensor_repo = SensorDataRepository()
+    sound_repo = SoundRepository()
+    for i in range(samples):
+        # Изредка - выбросы, которые должны попасть в аномалии
+        value = rng.gauss(21.0, 0.5) if i % 5000 else 35.0
+        sensor_repo.save(SensorData(id=str(i), timestamp="", purpose="bench", value=value))
+        sound_repo.save(Sound(id=i, frequency=int(rng.gauss(440, 30)), noise_level="normal"))
+    controller = AnalysisController(RequestRepository(), sensor_repo=sensor_repo,
+                                    sound_repo=sound_repo, window_size=samples)
+    request = Request(id="bench", language="ru", purpose="bench", recognition_accuracy=95)
+
+    results = {"samples": samples, "numpy": numpy_available()}
+    modes = [("numpy", True), ("python", False)] if numpy_available() else [("python", False)]
+    for name, use_numpy in modes:
+        strategy = StatisticalAnalysisStrategy(use_numpy=use_numpy)
+        timings = []
+        for _ in range(repeats if use_numpy else 1):
+            started = time.perf_counter()
+            analysis = controller.perform_analysis(request, strategy)
+            timings.append((time.perf_counter() - started) * 1000)
+        results[f"{name}_ms"] = min(timings)
+        results[f"{name}_confidence"] = analysis.confidence
+    print(analysis.result)
+    return results
+
+def bench_classifier(phrases: int, batch_size: int, model_dir: str = None) -> Dict[str, float]:
+    """Классификатор намерений: задержка по одной фразе и пакетами batch_size"""
+    import random
+    import intent_model
+    from patterns import MachineLearningStrategy
+    from models import Request
+
+    if intent_model.np is None:
+        print("Для классификатора намерений нужен NumPy")
+        return {}
+    examples = intent_model.load_examples()
+    temp = None
+    if model_dir is None:
+        # Модель обучается во временный каталог, чтобы замер не зависел от рабочей копии
+        temp = tempfile.TemporaryDirectory()
+        model_dir = temp.name
+        started = time.perf_counter()
+        intent_model.train(examples).save(model_dir)
+        train_ms = (time.perf_counter() - started) * 1000
+    else:
+        train_ms = 0.0
+
+    started = time.perf_counter()
+    model = intent_model.get_model(model_dir)
+    if model is None:
+        print(f"В каталоге {model_dir} нет обученной модели: сначала python intent_model.py train --out {model_dir}")
+        return {}
+    results = {"phrases": phrases, "batch": batch_size, "train_ms": train_ms,
+               "load_ms": (time.perf_counter() - started) * 1000}
+    rng = random.Random(1)
+    sample = [rng.choice(examples) for _ in range(phrases)]
+    texts = [text for text, _ in sample]
+
+    started = time.perf_counter()
+    single = [model.predict(text) for text in texts]
+    results["single_per_phrase_ms"] = (time.perf_counter() - started) * 1000 / phrases
+
+    started = time.perf_counter()
+    batched = []
+    for start in range(0, phrases, batch_size):
+        batched.extend(model.predict_batch(texts[start:start + batch_size]))
+    results["batch_per_phrase_ms"] = (time.perf_counter() - started) * 1000 / phrases
+    results["speedup"] = results["single_per_phrase_ms"] / results["batch_per_phrase_ms"]
+    results["accuracy"] = sum(label == expected for (label, _), (_, expected) in zip(batched, sample)) / phrases
+    results["batch_matches_single"] = all(a[0] == b[0] for a, b in zip(single, batched))
+
+    # Путь через стратегию анализа, как в конвейере
+    strategy = MachineLearningStrategy(model_dir)
+    requests = [[Request(id=str(i), language="ru", purpose=text, recognition_accuracy=95)]
+                for i, text in enumerate(texts[:batch_size])]
+    started = time.perf_counter()
+    strategy.analyze_batch(requests)
+    results["strategy_batch_ms"] = (time.perf_counter() - started) * 1000
+    if temp is not None:
+        temp.cleanup()
+    return results
+
+def bench_analysis_cache(samples: int, repeats: int) -> Dict[str, float]:
+    """Повторный статистический анализ неизменных данных: без кэша и с кэшем"""
+    import random
+    from analysis_cache import AnalysisCache
+    from models import SensorDataRepository, RequestRepository, SensorData, Request
+    from controllers import AnalysisController
+    from patterns import StatisticalAnalysisStrategy
+
+    rng = random.Random(1)
+    sensor_repo = SensorDataRepository()
+    for i in range(samples):
+        sensor_repo.save(SensorData(id=str(i), timestamp="", purpose="bench", value=rng.gauss(21.0, 0.5)))
+    request = Request(id="bench", language="ru", purpose="bench", recognition_accuracy=95)
+    results = {"samples": samples, "repeats": repeats}
+
+    for name, cache in (("uncached", AnalysisCache(max_entries=0)), ("cached", AnalysisCache())):
+        controller = AnalysisController(RequestRepository(), sensor_repo=sensor_repo,
+                                        window_size=samples, cache=cache)
+        timings = []
+        for _ in range(repeats):
+            # Новый экземпляр стратегии на каждое нажатие, как в AnalysisView
+            started = time.perf_counter()
+            controller.perform_analysis(request, StatisticalAnalysisStrategy())
+            timings.append((time.perf_counter() - started) * 1000)
+        results[f"{name}_avg_ms"] = sum(timings) / repeats
+        results[f"{name}_p50_ms"] = percentile(timings, 50)
+
+    # Новое значение сбрасывает кэш - следующий анализ считается заново
+    sensor_repo.save(SensorData(id="new", timestamp="", purpose="bench", value=40.0))
+    started = time.perf_counter()
+    controller.perform_analysis(request, StatisticalAnalysisStrategy())
+    results["after_new_data_ms"] = (time.perf_counter() - started) * 1000
+    results.update({f"cache_{key}": value for key, value in controller.cache.get_stats().items()})
+    return results
+
+def bench_incremental(samples: int, rounds: int, new: int) -> Dict[str, float]:
+    """Анализ после каждых new значений: пересчет всей истории и накопительная стратегия"""
+    import random
+    from models import SensorDataRepository, RequestRepository, SensorData, Request
+    from controllers import AnalysisController
+    from patterns import StatisticalAnalysisStrategy, IncrementalStatisticalStrategy
+
+    rng = random.Random(1)
+    sensor_repo = SensorDataRepository()
+
+    def add_values(count):
+        for _ in range(count):
+            sensor_repo.save(SensorData(id="", timestamp="", purpose="bench", value=rng.gauss(21.0, 0.5)))
+
+    add_values(samples)
+    controller = AnalysisController(RequestRepository(), sensor_repo=sensor_repo, window_size=samples + rounds * new)
+    request = Request(id="bench", language="ru", purpose="bench", recognition_accuracy=95)
+    batch_strategy = StatisticalAnalysisStrategy()
+    live_strategy = IncrementalStatisticalStrategy()
+
+    started = time.perf_counter()
+    controller.perform_analysis(request, live_strategy)
+    results = {"samples": samples, "rounds": rounds, "new_per_round": new,
+               "live_warmup_ms": (time.perf_counter() - started) * 1000}
+
+    full, live = [], []
+    for _ in range(rounds):
+        add_values(new)
+        started = time.perf_counter()
+        full_analysis = controller.perform_analysis(request, batch_strategy)
+        full.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        live_analysis = controller.perform_analysis(request, live_strategy)
+        live.append((time.perf_counter() - started) * 1000)
+    results["full_p50_ms"] = percentile(full, 50)
+    results["live_p50_ms"] = percentile(live, 50)
+    results["live_per_sample_us"] = percentile(live, 50) * 1000 / new
+    print(full_analysis.result)
+    print(live_analysis.result)
+    return results
+
+def bench_ensemble(runs: int, deadline_ms: float) -> Dict[str, float]:
+    """Три стратегии разной скорости и уверенности: по очереди и ансамблем
+    с каждой политикой. Самая медленная не укладывается в срок."""
+    from ensemble import EnsembleStrategy, POLICIES
+    from patterns import IAnalysisStrategy
+    from models import Analysis
+
+    class SimulatedStrategy(IAnalysisStrategy):
+        def __init__(self, name, delay_ms, confidence):
+            self.name = name
+            self.delay_ms = delay_ms
+            self.confidence = confidence
+
+        def analyze_data(self, data):
+            time.sleep(self.delay_ms / 1000)
+            return Analysis(id=self.name, result=self.name, confidence=self.confidence)
+
+    def strategies():
+        return [SimulatedStrategy("fast", 5, 0.3), SimulatedStrategy("medium", 40, 0.8),
+                SimulatedStrategy("slow", deadline_ms * 3, 0.95)]
+
+    results = {"runs": runs, "deadline_ms": deadline_ms}
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        for strategy in strategies():
+            strategy.analyze_data([])
+        timings.append((time.perf_counter() - started) * 1000)
+    results["sequential_p50_ms"] = percentile(timings, 50)
+
+    for policy in POLICIES:
+        ensemble = EnsembleStrategy(strategies(), policy=policy, deadline=deadline_ms / 1000)
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            analysis = ensemble.analyze_data([])
+            timings.append((time.perf_counter() - started) * 1000)
+        results[f"{policy}_p50_ms"] = percentile(timings, 50)
+        results[f"{policy}_answer"] = f"{analysis.result} ({analysis.confidence})"
+        ensemble.shutdown()
+    return results
+
+def bench_rules(sizes: List[int], decisions: int) -> Dict[str, float]:
+    """Решений в секунду при разном числе правил, компиляция и перезагрузка файла"""
+    import random
+    from datetime import datetime
+    from intents import TYPE_WORDS
+    from models import Analysis
+    from rule_engine import RuleEngine
+
+    intents = ["turn_on", "turn_off", "status", "add_device", "help", "greeting", "other"]
+    device_types = list(TYPE_WORDS) + [f"тип_{i}" for i in range(50)]
+    rng = random.Random(1)
+    results = {"decisions": decisions}
+    analyses = [Analysis(id="bench", result="bench", confidence=rng.random(),
+                         intent=rng.choice(intents), device_type=rng.choice(device_types))
+                for _ in range(1000)]
+    moments = [datetime(2026, 1, 1, rng.randrange(24), rng.randrange(60)) for _ in range(1000)]
+
+    def make_rules(count):
+        rules = []
+        for i in range(count):
+            when = {"intent": rng.choice(intents), "device_type": rng.choice(device_types),
+                    "min_confidence": round(rng.random(), 2)}
+            if i % 3 == 0:
+                start = rng.randrange(24)
+                when["time"] = f"{start:02d}:00-{(start + rng.randrange(1, 8)) % 24:02d}:00"
+            rules.append({"id": f"rule_{i}", "priority": rng.randrange(10), "when": when,
+                          "then": {"message": f"Правило {i}: {{device_type}}"}})
+        return {"rules": rules}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "rules.json")
+        for size in sizes:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(make_rules(size), f, ensure_ascii=False)
+            started = time.perf_counter()
+            engine = RuleEngine(path, check_interval=0.5)
+            results[f"{size} compile_ms"] = (time.perf_counter() - started) * 1000
+
+            matched = 0
+            started = time.perf_counter()
+            for i in range(decisions):
+                if engine.evaluate(analyses[i % 1000], moments[i % 1000]) is not None:
+                    matched += 1
+            elapsed = time.perf_counter() - started
+            results[f"{size} decisions_per_s"] = decisions / elapsed
+            results[f"{size} matched"] = matched / decisions
+
+        # Перезагрузка на лету: правило меняется в файле, проверка ловит изменение
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"rules": [{"id": "only", "then": {"message": "новое правило"}}]}, f)
+        engine.last_check = 0.0
+        decision = engine.evaluate(analyses[0], moments[0])
+        results["hot_reload_applied"] = decision is not None and decision[0].id == "only"
+    return results
+
+def bench_bus(events: int, devices: int, handler_ms: float) -> Dict[str, float]:
+    """Шина событий: задержка публикации при медленном подписчике,
+    объединение частых изменений устройств и сборка закрытых окон"""
+    import gc
+    from event_bus import EventBus, DEVICE, SYNC, BACKGROUND
+    from models import Device
+
+    class SlowView:
+        def __init__(self):
+            self.received = 0
+
+        def update(self, data):
+            time.sleep(handler_ms / 1000)
+            self.received += 1
+
+    updates = [{"type": "device_updated",
+                "device": Device(id=f"dev_{i % devices}", name="лампа", type="свет", status="on",
+                                 connection_info="")}
+               for i in range(events)]
+    results = {"events": events, "devices": devices}
+    for name, delivery, count in (("sync", SYNC, min(events, 500)), ("queued", BACKGROUND, events)):
+        bus = EventBus()
+        view = SlowView()
+        bus.subscribe(DEVICE, view, delivery)
+        latencies = []
+        started = time.perf_counter()
+        for update in updates[:count]:
+            published = time.perf_counter()
+            bus.publish(DEVICE, update)
+            latencies.append(time.perf_counter() - published)
+        publish_elapsed = time.perf_counter() - started
+        # Каждое событие доставлено, заменено более новым или вытеснено из очереди
+        stats = bus.get_stats()
+        while stats["delivered"] + stats["coalesced"] + stats["dropped"] < count:
+            time.sleep(0.005)
+            stats = bus.get_stats()
+        bus.shutdown()
+        results[f"{name} publish_p50_us"] = percentile(latencies, 50) * 1e6
+        results[f"{name} publish_p99_us"] = percentile(latencies, 99) * 1e6
+        results[f"{name} publish_total_ms"] = publish_elapsed * 1000
+        results[f"{name} delivered"] = stats["delivered"]
+        results[f"{name} coalesced"] = stats["coalesced"]
+        results[f"{name} max_queue_depth"] = stats["max_queue_depth"]
+
+    # Закрытое окно: подписка снимается при первой публикации после сборки
+    bus = EventBus()
+    for _ in range(100):
+        bus.subscribe(DEVICE, SlowView(), SYNC)
+    gc.collect()
+    bus.publish(DEVICE, updates[0])
+    results["collected_views"] = bus.get_stats()["collected"]
+    results["subscribers_left"] = bus.get_stats()["subscribers"]
+    return results
+
+def bench_telemetry(devices: int, messages: int, flush_ms: float, udp_rate: int) -> Dict[str, float]:
+    """Прием телеметрии: сообщений в секунду напрямую, через брокер, UDP и
+    TCP; сравнение с обновлением устройства на каждое сообщение.
+
+    UDP не подтверждает доставку, поэтому отправитель держит темп udp_rate
+    сообщений в секунду, а замер показывает долю принятых.
+    """
+    import random
+    import socket
+    from dataclasses import replace
+    from controllers import DeviceController
+    from models import DeviceRepository, SensorDataRepository
+    from telemetry import TelemetryIngester, TelemetryServer, LocalBroker, attach_broker
+
+    statuses = ["online", "offline", "error"]
+    rng = random.Random(1)
+    reports = []
+    expected = {}
+    for i in range(messages):
+        device_id = f"dev_{rng.randrange(devices)}"
+        status = rng.choice(statuses)
+        expected[device_id] = status
+        reports.append((device_id, json.dumps({"device": device_id, "status": status,
+                                               "value": round(rng.gauss(21.0, 0.5), 2)}).encode()))
+    results = {"devices": devices, "messages": messages}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        filename = os.path.join(workdir, "devices.json")
+        make_device_file(filename, devices)
+
+        def run(name, send):
+            controller = DeviceController(DeviceRepository(filename))
+            sensor_repo = SensorDataRepository()
+            ingester = TelemetryIngester(controller, sensor_repo, flush_interval=flush_ms / 1000)
+            ingester.start()
+            started = time.perf_counter()
+            sent = send(ingester)
+            # Ждем, пока все отправленное будет принято, но не дольше 10 с
+            deadline = time.perf_counter() + 10
+            while ingester.get_stats()["received"] < sent and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            ingester.stop()
+            elapsed = time.perf_counter() - started
+            stats = ingester.get_stats()
+            results[f"{name} msgs_per_s"] = stats["received"] / elapsed
+            results[f"{name} received"] = stats["received"] / sent
+            results[f"{name} flushes"] = stats["flushes"]
+            results[f"{name} flush_max_ms"] = stats["flush_max_ms"]
+            results[f"{name} coalesced"] = stats["coalesced"] / max(1, stats["received"])
+            if stats["received"] == sent:
+                correct = all(controller.get_device_by_id(device_id).status == status
+                              for device_id, status in expected.items())
+                results[f"{name} statuses_correct"] = correct
+                results[f"{name} readings_stored"] = sensor_repo.version
+
+        def direct(ingester):
+            for _, payload in reports:
+                ingester.ingest(payload)
+            return len(reports)
+
+        def broker(ingester):
+            local = LocalBroker()
+            attach_broker(ingester, local)
+            for device_id, payload in reports:
+                local.publish(f"devices/{device_id}/telemetry", payload)
+            return len(reports)
+
+        def udp(ingester):
+            server = TelemetryServer(ingester, udp_port=0)
+            server.start()
+            address = server.addresses()[0]
+            sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            # Отчеты пачками по 20 в датаграмме, как их шлет шлюз устройств
+            started = time.perf_counter()
+            for start in range(0, len(reports), 20):
+                sender.sendto(b"\n".join(payload for _, payload in reports[start:start + 20]), address)
+                ahead = started + start / udp_rate - time.perf_counter()
+                if ahead > 0:
+                    time.sleep(ahead)
+            sender.close()
+            sent = len(reports)
+            deadline = time.perf_counter() + 10
+            while ingester.get_stats()["received"] < sent and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            server.stop()
+            return sent
+
+        def tcp(ingester):
+            server = TelemetryServer(ingester, tcp_port=0)
+            server.start()
+            with socket.create_connection(server.addresses()[0]) as connection:
+                for start in range(0, len(reports), 1000):
+                    connection.sendall(b"".join(payload + b"\n" for _, payload in reports[start:start + 1000]))
+            sent = len(reports)
+            deadline = time.perf_counter() + 10
+            while ingester.get_stats()["received"] < sent and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            server.stop()
+            return sent
+
+        for name, send in (("direct", direct), ("broker", broker), ("udp", udp), ("tcp", tcp)):
+            run(name, send)
+
+        # Прежний путь: обновление устройства (и запись файла) на каждое сообщение
+        controller = DeviceController(DeviceRepository(filename))
+        count = min(200, messages)
+        started = time.perf_counter()
+        for device_id, payload in reports[:count]:
+            device = controller.get_device_by_id(device_id)
+            controller.update_device(replace(device, status=json.loads(payload)["status"]))
+        results["per_message msgs_per_s"] = count / (time.perf_counter() - started)
+    return results
+
+def print_results(results: Dict[str, float]) -> None:
+    for key, value in results.items():
+        print(f"{key:>20}: {value:.3f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки системы")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    replay = sub.add_parser("replay", help="воспроизведение записанной сессии")
+    replay.add_argument("--corpus", required=True)
+    replay.add_argument("--speed", type=float, default=0.0)
+    replay.add_argument("--latency", type=float, default=0.0,
+                        help="имитация задержки распознавателя, с")
+    replay.add_argument("--synthetic", type=int, default=0,
+                        help="сгенерировать корпус из N фраз, если его нет")
+    replay.add_argument("--sources", type=int, default=1, help="число одновременных источников")
+    replay.add_argument("--pool", type=int, default=2, help="размер пула распознавания")
+
+    record = sub.add_parser("record", help="запись живой сессии с микрофона")
+    record.add_argument("--corpus", required=True)
+    record.add_argument("--duration", type=float, default=60.0)
+
+    wakeword = sub.add_parser("wakeword", help="оценка фильтра по ключевой фразе")
+    wakeword.add_argument("--corpus", required=True)
+    wakeword.add_argument("--phrase", required=True)
+    wakeword.add_argument("--spotter", choices=["sphinx", "transcript"], default="sphinx")
+    wakeword.add_argument("--speed", type=float, default=10.0)
+
+    dispatch = sub.add_parser("dispatch", help="задержка доставки фраз в интерфейс")
+    dispatch.add_argument("--phrases", type=int, default=50)
+
+    chat = sub.add_parser("chat", help="цена вставки сообщения в длинной сессии")
+    chat.add_argument("--messages", type=int, default=100000)
+
+    devices = sub.add_parser("devices", help="обновление таблицы устройств")
+    devices.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+
+    search = sub.add_parser("search", help="поиск и сортировка устройств")
+    search.add_argument("--size", type=int, default=100000)
+
+    startup = sub.add_parser("startup", help="время холодного запуска")
+    startup.add_argument("--budget-ms", type=float, default=None,
+                         help="завершиться с ошибкой, если форма входа готова позже")
+
+    headless = sub.add_parser("headless", help="пропускная способность без интерфейса")
+    headless.add_argument("--commands", type=int, default=10000)
+    headless.add_argument("--clients", type=int, default=1)
+
+    background = sub.add_parser("background", help="блокировка интерфейса операциями контроллеров")
+    background.add_argument("--size", type=int, default=10000)
+    background.add_argument("--operations", type=int, default=50)
+
+    intents = sub.add_parser("intents", help="разбор голосовых команд по названиям устройств")
+    intents.add_argument("--size", type=int, default=50000)
+
+    fuzzy = sub.add_parser("fuzzy", help="нечеткий поиск устройства по искаженному названию")
+    fuzzy.add_argument("--size", type=int, default=50000)
+
+    pipeline = sub.add_parser("pipeline", help="конвейер запрос -> ответ с пакетным анализом")
+    pipeline.add_argument("--commands", type=int, default=5000)
+    pipeline.add_argument("--call-ms", type=float, default=2.0, help="цена вызова стратегии, мс")
+    pipeline.add_argument("--item-ms", type=float, default=0.05, help="цена одного запроса в пакете, мс")
+    pipeline.add_argument("--batch", type=int, default=16)
+
+    stats = sub.add_parser("stats", help="статистический анализ окон измерений")
+    stats.add_argument("--samples", type=int, default=1000000)
+
+    classifier = sub.add_parser("classifier", help="классификатор намерений: по одной фразе и пакетами")
+    classifier.add_argument("--phrases", type=int, default=2000)
+    classifier.add_argument("--batch", type=int, default=64)
+    classifier.add_argument("--model", default=None, help="каталог обученной модели (по умолчанию обучается заново)")
+
+    cache = sub.add_parser("cache", help="кэш результатов анализа")
+    cache.add_argument("--samples", type=int, default=1000000)
+    cache.add_argument("--repeats", type=int, default=20)
+
+    incremental = sub.add_parser("incremental", help="накопительный анализ поступающих данных")
+    incremental.add_argument("--samples", type=int, default=200000)
+    incremental.add_argument("--rounds", type=int, default=50)
+    incremental.add_argument("--new", type=int, default=100)
+
+    ensemble = sub.add_parser("ensemble", help="несколько стратегий одновременно со сроком")
+    ensemble.add_argument("--runs", type=int, default=20)
+    ensemble.add_argument("--deadline-ms", type=float, default=200)
+
+    rules = sub.add_parser("rules", help="движок правил принятия решений")
+    rules.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    rules.add_argument("--decisions", type=int, default=50000)
+    bus = sub.add_parser("bus", help="шина событий контроллеров")
+    bus.add_argument("--events", type=int, default=20000)
+    bus.add_argument("--devices", type=int, default=50)
+    bus.add_argument("--handler-ms", type=float, default=1.0)
+    telemetry = sub.add_parser("telemetry", help="прием телеметрии устройств")
+    telemetry.add_argument("--devices", type=int, default=10000)
+    telemetry.add_argument("--messages", type=int, default=200000)
+    telemetry.add_argument("--flush-ms", type=float, default=250.0)
+    telemetry.add_argument("--udp-rate", type=int, default=50000)
+
+    args = parser.parse_args()
+    if args.command == "replay":
+        if args.synthetic and not os.path.exists(os.path.join(args.corpus, MANIFEST_NAME)):
+            make_synthetic_corpus(args.corpus, [f"включи устройство {i}" for i in range(args.synthetic)])
+        print_results(bench_replay(args.corpus, args.speed, TranscriptRecognizer(args.latency),
+                                   args.sources, args.pool))
+    elif args.command == "record":
+        record_session(args.corpus, args.duration)
+    elif args.command == "wakeword":
+        print_results(bench_wake_word(args.corpus, args.phrase, args.spotter, args.speed))
+    elif args.command == "dispatch":
+        print_results(bench_dispatch(args.phrases))
+    elif args.command == "chat":
+        print_results(bench_chat(args.messages))
+    elif args.command == "devices":
+        for row in bench_device_view(args.sizes):
+            print_results(row)
+            print()
+    elif args.command == "search":
+        print_results(bench_device_search(args.size))
+    elif args.command == "startup":
+        results = bench_startup()
+        print_results(results)
+        measured = results.get("login_form_ready_ms")
+        if measured is None:
+            measured = results.get("import_application_ms")
+        if args.budget_ms is not None:
+            if measured is None:
+                print("Время запуска не измерено: бюджет проверить нельзя")
+                sys.exit(1)
+            if measured > args.budget_ms:
+                print(f"Превышен бюджет запуска: {measured:.1f} мс > {args.budget_ms:.1f} мс")
+                sys.exit(1)
+    elif args.command == "headless":
+        print_results(bench_headless(args.commands, args.clients))
+    elif args.command == "background":
+        print_results(bench_background(args.size, args.operations))
+    elif args.command == "intents":
+        print_results(bench_intents(args.size))
+    elif args.command == "fuzzy":
+        print_results(bench_fuzzy(args.size))
+    elif args.command == "pipeline":
+        print_results(bench_pipeline(args.commands, args.call_ms, args.item_ms, args.batch))
+    elif args.command == "stats":
+        print_results(bench_statistics(args.samples))
+    elif args.command == "classifier":
+        print_results(bench_classifier(args.phrases, args.batch, args.model))
+    elif args.command == "cache":
+        print_results(bench_analysis_cache(args.samples, args.repeats))
+    elif args.command == "incremental":
+        print_results(bench_incremental(args.samples, args.rounds, args.new))
+    elif args.command == "ensemble":
+        print_results(bench_ensemble(args.runs, args.deadline_ms))
+    elif args.command == "rules":
+        print_results(bench_rules(args.sizes, args.decisions))
+    elif args.command == "bus":
+        print_results(bench_bus(args.events, args.devices, args.handler_ms))
+    elif args.command == "telemetry":
+        print_results(bench_telemetry(args.devices, args.messages, args.flush_ms, args.udp_rate))
+
+if __name__ == "__main__":
+    main()
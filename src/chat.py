@@ -0,0 +1,166 @@
+import os
+import tkinter as tk
+from collections import deque
+from typing import List, Optional
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CHAT_LOG = os.path.join(MODULE_DIR, "chat_history.log")
+
+class ChatLog:
+    """Модель чата с ограниченной памятью.
+
+    В памяти хранятся последние max_lines строк, более старые
+    переносятся в файл архива и подгружаются оттуда постранично.
+    Архив дописывается: история прошлых сеансов остается в файле,
+    а при закрытии в него переносятся и строки из памяти.
+    """
+    def __init__(self, filename=DEFAULT_CHAT_LOG, max_lines=500):
+        self.filename = filename
+        self.max_lines = max_lines
+        self.lines = deque()
+        # Смещения начала каждой строки архива этого сеанса в файле
+        self.archive_offsets: List[int] = []
+        self.archive = open(self.filename, 'a+', encoding='utf-8')
+        self.session_start = self.archive.seek(0, os.SEEK_END)
+
+    @property
+    def archived_count(self) -> int:
+        return len(self.archive_offsets)
+
+    @property
+    def total_lines(self) -> int:
+        return self.archived_count + len(self.lines)
+
+    def append(self, line: str) -> None:
+        self.lines.append(line.replace("\n", " "))
+        while len(self.lines) > self.max_lines:
+            self._archive_line(self.lines.popleft())
+
+    def get_lines(self, start: int, count: int) -> List[str]:
+        """Строки с абсолютного номера start (архив + память)"""
+        result = []
+        end = min(start + count, self.total_lines)
+        if start < self.archived_count:
+            result.extend(self._read_archive(start, min(end, self.archived_count)))
+        memory_start = max(start, self.archived_count) - self.archived_count
+        memory_end = end - self.archived_count
+        if memory_end > memory_start:
+            result.extend(list(self.lines)[memory_start:memory_end])
+        return result
+
+    def clear(self) -> None:
+        self.lines.clear()
+        self.archive_offsets.clear()
+        # Прошлые сеансы не трогаем
+        self.archive.truncate(self.session_start)
+
+    def close(self) -> None:
+        if self.archive.closed:
+            return
+        while self.lines:
+            self._archive_line(self.lines.popleft())
+        self.archive.close()
+
+    def _archive_line(self, line: str) -> None:
+        self.archive.seek(0, os.SEEK_END)
+        self.archive_offsets.append(self.archive.tell())
+        self.archive.write(line + "\n")
+
+    def _read_archive(self, start: int, end: int) -> List[str]:
+        self.archive.flush()
+        self.archive.seek(self.archive_offsets[start])
+        return [self.archive.readline().rstrip("\n") for _ in range(end - start)]
+
+class ChatPanel:
+    """Отрисовка ChatLog в tk.Text.
+
+    Строки, пришедшие в пределах одного кадра, вставляются одним
+    обновлением, а в виджете держится не более max_rendered строк.
+    При листании назад виджет показывает окно из истории, новые
+    сообщения копятся в модели до возврата к последним.
+    """
+    FRAME_MS = 16
+
+    def __init__(self, chat_log: ChatLog, max_rendered=200, page_size=100):
+        self.chat_log = chat_log
+        self.max_rendered = max_rendered
+        self.page_size = page_size
+        self.text: Optional[tk.Text] = None
+        self.pending: List[str] = []
+        self.flush_job = None
+        self.rendered = 0
+        # Номер первой показанной строки, если пользователь листает историю
+        self.window_start: Optional[int] = None
+
+    def attach(self, text: tk.Text) -> None:
+        """Подключить новый виджет и показать последние сообщения"""
+        self.text = text
+        self.flush_job = None
+        self.show_latest()
+
+    def add(self, line: str) -> None:
+        self.chat_log.append(line)
+        if self.window_start is not None or self.text is None:
+            return
+        self.pending.append(line)
+        if self.flush_job is None:
+            self.flush_job = self.text.after(self.FRAME_MS, self.flush)
+
+    def flush(self) -> None:
+        self.flush_job = None
+        if not self.pending or not self._widget_alive():
+            self.pending.clear()
+            return
+
+        lines, self.pending = self.pending, []
+        self.text.config(state='normal')
+        self.text.insert(tk.END, "\n".join(lines) + "\n")
+        self.rendered += len(lines)
+
+        # Удаляем верхние строки, чтобы цена вставки не росла со временем
+        excess = self.rendered - self.max_rendered
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+            self.rendered -= excess
+
+        self.text.see(tk.END)
+        self.text.config(state='disabled')
+
+    def show_older(self) -> None:
+        """Показать предыдущую страницу истории"""
+        first = self.window_start
+        if first is None:
+            first = max(0, self.chat_log.total_lines - self.rendered)
+        if first == 0:
+            return
+        self.window_start = max(0, first - self.page_size)
+        self._render(self.chat_log.get_lines(self.window_start, self.max_rendered))
+        self.text.see("1.0")
+
+    def show_latest(self) -> None:
+        """Вернуться к последним сообщениям"""
+        self.window_start = None
+        self.pending.clear()
+        total = self.chat_log.total_lines
+        start = max(0, total - self.max_rendered)
+        if self._widget_alive():
+            self._render(self.chat_log.get_lines(start, total - start))
+            self.text.see(tk.END)
+
+    def clear(self) -> None:
+        self.chat_log.clear()
+        self.show_latest()
+
+    def _render(self, lines: List[str]) -> None:
+        self.text.config(state='normal')
+        self.text.delete("1.0", tk.END)
+        if lines:
+            self.text.insert(tk.END, "\n".join(lines) + "\n")
+        self.rendered = len(lines)
+        self.text.config(state='disabled')
+
+    def _widget_alive(self) -> bool:
+        try:
+            return self.text is not None and bool(self.text.winfo_exists())
+        except tk.TclError:
+            return False
@@ -1,13 +1,23 @@
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Any, Dict
 from datetime import datetime
 from models import (
-    Sound, SensorData, Request, Analysis, Decision, Response,
+    Sound, SensorData, Request, Analysis, Decision, Response, DataWindow,
     AuthUser, Device,
     SoundRepository, SensorDataRepository, RequestRepository,
     DecisionRepository, ResponseRepository, AuthRepository, DeviceRepository
 )
-from patterns import IAnalysisStrategy, MachineLearningStrategy, ICommand, AnalysisCommand, ResponseCommand
+from analysis_cache import AnalysisCache
+from event_bus import EventBus, Topic, UI, AUTH, DEVICE, REQUEST, ANALYSIS, DECISION, RESPONSE
+from background import BackgroundTask
+from ensemble import EnsembleStrategy, WEIGHTED
+from rule_engine import RuleEngine
+from patterns import (
+    IAnalysisStrategy, IIncrementalAnalysisStrategy, MachineLearningStrategy,
+    CommandHistory, StateCommand
+)
 
 class IController(ABC):
     @abstractmethod
@@ -24,11 +34,68 @@ class IView(ABC):
         pass
 
 
-class AuthController(IController):
+class EventPublisher:
+    """Уведомление представлений через общую шину событий (EventBus).
+
+    Контроллер публикует события в свою тему; представления подписаны
+    слабыми ссылками и получают события через свои очереди, в потоке
+    интерфейса. Шину назначает фабрика; без нее контроллер создает
+    собственную при первом обращении.
+    """
+    topic: Topic = None
+    bus: EventBus = None
+    # Способ доставки для add_view без явного указания
+    default_delivery = UI
+    bus_lock = threading.Lock()
+    
+    def get_bus(self) -> EventBus:
+        if self.bus is None:
+            with EventPublisher.bus_lock:
+                if self.bus is None:
+                    self.bus = EventBus()
+        return self.bus
+    
+    def add_view(self, view: IView, delivery: str = None) -> None:
+        self.get_bus().subscribe(self.topic, view, delivery or self.default_delivery)
+    
+    def notify_views(self, data: Any) -> None:
+        self.get_bus().publish(self.topic, data)
+    
+    def update_view(self, data: Any) -> None:
+        self.notify_views(data)
+
+
+class BackgroundOperations:
+    """Выполнение блокирующих методов контроллера вне потока интерфейса.
+
+    executor - BackgroundExecutor, назначается фабрикой; без него методы
+    выполняются синхронно. Уведомления представлений в поток интерфейса
+    передает шина событий.
+    """
+    executor = None
+    
+    def run_in_background(self, operation, *args, on_done=None, on_error=None):
+        if self.executor is None:
+            task = BackgroundTask()
+            try:
+                result = operation(*args)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(e)
+            else:
+                if on_done is not None:
+                    on_done(result)
+            return task
+        return self.executor.submit(operation, *args, on_done=on_done, on_error=on_error)
+
+
+class AuthController(EventPublisher, IController):
+    topic = AUTH
+    
     def __init__(self, auth_repo: AuthRepository):
         self.auth_repo = auth_repo
         self.current_user: Optional[AuthUser] = None
-        self.views: List[IView] = []
     
     def login(self, username: str, password: str) -> Optional[AuthUser]:
         user = self.auth_repo.authenticate(username, password)
@@ -54,72 +121,92 @@ class AuthController(IController):
         self.notify_views({"type": "user_exists", "message": "Пользователь уже существует"})
         return False
     
-    def add_view(self, view: IView) -> None:
-        self.views.append(view)
-    
-    def notify_views(self, data: Any) -> None:
-        for view in self.views:
-            view.update(data)
-    
-    def update_view(self, data: Any) -> None:
-        self.notify_views(data)
 
-class DeviceController(IController):
+class DeviceController(EventPublisher, BackgroundOperations, IController):
+    topic = DEVICE
+    
     def __init__(self, device_repo: DeviceRepository):
         self.device_repo = device_repo
-        self.views: List[IView] = []
+        # Счетчик изменений: подписчики сверяют его, чтобы не пропустить события
+        self.version = 0
+        # Операции могут выполняться в потоках BackgroundExecutor
+        self.lock = threading.RLock()
     
     def get_all_devices(self) -> List[Device]:
         return self.device_repo.get_all()
     
     def add_device(self, device: Device) -> bool:
-        if not self.device_repo.get_by_id(device.id):
-            self.device_repo.save(device)
-            self.notify_views({"type": "device_added", "device": device})
-            return True
+        # Уведомления ставятся в очередь под блокировкой, чтобы события
+        # из разных рабочих потоков приходили в порядке версий
+        with self.lock:
+            if not self.device_repo.get_by_id(device.id):
+                self.device_repo.save(device)
+                self.version += 1
+                self.notify_views({"type": "device_added", "device": device})
+                return True
         self.notify_views({"type": "device_exists", "message": "Устройство с таким ID уже существует"})
         return False
     
     def update_device(self, device: Device) -> bool:
-        existing = self.device_repo.get_by_id(device.id)
-        if existing:
-            self.device_repo.save(device)
-            self.notify_views({"type": "device_updated", "device": device})
-            return True
+        with self.lock:
+            existing = self.device_repo.get_by_id(device.id)
+            if existing:
+                self.device_repo.save(device)
+                self.version += 1
+                self.notify_views({"type": "device_updated", "device": device})
+                return True
         return False
     
+    def apply_statuses(self, statuses: Dict[str, str], persist: bool = True) -> List[Device]:
+        """Применить пачку статусов (id -> статус) из телеметрии.
+
+        Измененные устройства уходят подписчикам одним событием
+        devices_updated, а не событием на каждое устройство.
+        """
+        with self.lock:
+            changed = self.device_repo.update_statuses(statuses, persist)
+            if changed:
+                self.version += 1
+                self.notify_views({"type": "devices_updated", "devices": changed})
+        return changed
+    
     def delete_device(self, device_id: str) -> bool:
-        success = self.device_repo.delete(device_id)
-        if success:
-            self.notify_views({"type": "device_deleted", "device_id": device_id})
+        with self.lock:
+            success = self.device_repo.delete(device_id)
+            if success:
+                self.version += 1
+                self.notify_views({"type": "device_deleted", "device_id": device_id})
         return success
     
     def get_device_by_id(self, device_id: str) -> Optional[Device]:
         return self.device_repo.get_by_id(device_id)
     
-    def add_view(self, view: IView) -> None:
-        self.views.append(view)
-    
-    def notify_views(self, data: Any) -> None:
-        for view in self.views:
-            view.update(data)
-    
-    def update_view(self, data: Any) -> None:
-        self.notify_views(data)
+    def filter_device_ids(self, status: Optional[str] = None, device_type: Optional[str] = None):
+        """id устройств с заданным статусом и типом (None - фильтр не задан)"""
+        # Множества репозитория меняются под self.lock в других потоках:
+        # копируем их под той же блокировкой
+        with self.lock:
+            by_status = set(self.device_repo.get_ids_by_status(status)) if status else None
+            by_type = set(self.device_repo.get_ids_by_type(device_type)) if device_type else None
+        if by_status is None or by_type is None:
+            return by_status if by_type is None else by_type
+        return by_status & by_type
 
 
-class RequestController(IController):
+class RequestController(EventPublisher, IController):
+    topic = REQUEST
+    
     def __init__(self, sound_repo: SoundRepository, sensor_repo: SensorDataRepository):
         self.sound_repo = sound_repo
         self.sensor_repo = sensor_repo
         self.current_request = None
-        self.views: List[IView] = []
     
-    def create_request(self, sound_data: Sound, sensor_data: SensorData) -> Request:
+    def create_request(self, sound_data: Sound, sensor_data: SensorData,
+                       purpose: str = "Анализ данных") -> Request:
         request = Request(
             id=f"req_{datetime.now().timestamp()}",
             language="ru",
-            purpose="Анализ данных",
+            purpose=purpose,
             recognition_accuracy=95
         )
         self.current_request = request
@@ -131,105 +218,203 @@ class RequestController(IController):
     def get_request(self) -> Optional[Request]:
         return self.current_request
     
-    def add_view(self, view: IView) -> None:
-        self.views.append(view)
-    
-    def notify_views(self, data: Any) -> None:
-        for view in self.views:
-            view.update(data)
-    
-    def update_view(self, data: Any) -> None:
-        self.notify_views(data)
 
-class AnalysisController(IController):
-    def __init__(self, request_repo: RequestRepository, strategy: IAnalysisStrategy = None):
+class AnalysisController(EventPublisher, BackgroundOperations, IController):
+    topic = ANALYSIS
+    
+    def __init__(self, request_repo: RequestRepository, strategy: IAnalysisStrategy = None,
+                 sensor_repo: SensorDataRepository = None, sound_repo: SoundRepository = None,
+                 window_size: int = 100000, cache: AnalysisCache = None):
         self.request_repo = request_repo
+        # Источники окон измерений для стратегий
+        self.sensor_repo = sensor_repo
+        self.sound_repo = sound_repo
+        self.window_size = window_size
         self.strategy = strategy or MachineLearningStrategy()
+        # Повторный анализ тех же данных той же стратегией берется из кэша
+        self.cache = cache if cache is not None else AnalysisCache()
+        # Общий пул ансамблей стратегий (EnsembleStrategy) этого контроллера
+        self.ensemble_pool: Optional[ThreadPoolExecutor] = None
         self.current_analysis = None
-        self.views: List[IView] = []
-        self.commands: List[ICommand] = []
-    
-    def perform_analysis(self, request: Request) -> Analysis:
-        # Получаем данные для анализа
-        sensor_data = []
-        analysis = self.strategy.analyze_data(sensor_data)
-        self.current_analysis = analysis
+        self.history = CommandHistory()
+        self.lock = threading.RLock()
+    
+    def perform_analysis(self, request: Request, strategy: IAnalysisStrategy = None) -> Analysis:
+        # Стратегия фиксируется при постановке задачи, а не при ее выполнении
+        strategy = strategy or self.strategy
+        if isinstance(strategy, IIncrementalAnalysisStrategy):
+            return self.perform_live_analysis(strategy)
+        # Получаем данные для анализа: сам запрос и окна измерений
+        sensor_data = [request] + self.collect_data()
         
-        # Создаем и выполняем команду
-        command = AnalysisCommand(self, sensor_data)
-        command.execute()
-        self.commands.append(command)
+        key = self.cache_key(strategy, sensor_data)
+        analysis = self.cache.get(key) if key is not None else None
+        if analysis is None:
+            # Стратегия работает вне блокировки: параллельные анализы не ждут друг друга
+            analysis = strategy.analyze_data(sensor_data)
+            if key is not None:
+                self.cache.put(key, analysis)
         
-        self.notify_views(analysis)
+        with self.lock:
+            # История хранит разницу с предыдущим анализом для отмены
+            self.history.execute(StateCommand(self, analysis))
+            self.notify_views(analysis)
         return analysis
     
+    def perform_analysis_batch(self, requests: List[Request],
+                               strategy: IAnalysisStrategy = None) -> List[Analysis]:
+        """Анализ пакета запросов одним вызовом стратегии (для конвейера)"""
+        strategy = strategy or self.strategy
+        if isinstance(strategy, IIncrementalAnalysisStrategy):
+            # Накопительный анализ от запроса не зависит - один снимок на пакет
+            analysis = self.perform_live_analysis(strategy)
+            return [analysis for _ in requests]
+        # Окна измерений общие для всех запросов пакета
+        windows = self.collect_data()
+        batch = [[request] + windows for request in requests]
+        
+        keys = [self.cache_key(strategy, data) for data in batch]
+        analyses = [self.cache.get(key) if key is not None else None for key in keys]
+        # Стратегия получает только данные, которых нет в кэше
+        missing = [i for i, analysis in enumerate(analyses) if analysis is None]
+        if missing:
+            for i, analysis in zip(missing, strategy.analyze_batch([batch[i] for i in missing])):
+                analyses[i] = analysis
+                if keys[i] is not None:
+                    self.cache.put(keys[i], analysis)
+        
+        if analyses:
+            with self.lock:
+                self.history.execute(StateCommand(self, analyses[-1]))
+                self.notify_views(analyses[-1])
+        return analyses
+    
+    def perform_ensemble_analysis(self, request: Request, strategies: List[IAnalysisStrategy],
+                                  policy: str = WEIGHTED, deadline: float = 0.5) -> Analysis:
+        """Анализ несколькими стратегиями одновременно: ответ - лучший из
+        успевших за deadline секунд по политике policy"""
+        return self.perform_analysis(request, EnsembleStrategy(strategies, policy, deadline,
+                                                               executor=self.ensemble_executor()))
+    
+    def ensemble_executor(self, max_workers: int = 8) -> ThreadPoolExecutor:
+        """Пул для ансамблей стратегий: один на контроллер, закрывается в shutdown()"""
+        with self.lock:
+            if self.ensemble_pool is None:
+                self.ensemble_pool = ThreadPoolExecutor(max_workers=max_workers,
+                                                        thread_name_prefix="analysis-ensemble")
+            return self.ensemble_pool
+    
+    def shutdown(self) -> None:
+        with self.lock:
+            pool, self.ensemble_pool = self.ensemble_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    @staticmethod
+    def cache_key(strategy: IAnalysisStrategy, data: List[Any]):
+        """Ключ кэша; None - результат стратегии не кэшируется"""
+        strategy_key = strategy.cache_key()
+        if strategy_key is None:
+            return None
+        return (strategy_key, strategy.fingerprint(data))
+    
+    def perform_live_analysis(self, strategy: IIncrementalAnalysisStrategy) -> Analysis:
+        """Анализ накопительной стратегией: она получает только значения,
+        поступившие после предыдущего вызова, история не перечитывается"""
+        with strategy.feed_lock:
+            strategy.update(self.collect_new_data(strategy))
+            analysis = strategy.snapshot()
+        
+        with self.lock:
+            self.history.execute(StateCommand(self, analysis))
+            self.notify_views(analysis)
+        return analysis
+    
+    def collect_new_data(self, strategy: IIncrementalAnalysisStrategy) -> List[DataWindow]:
+        """Значения датчиков и частот звука, еще не учтенные стратегией"""
+        windows = []
+        if self.sensor_repo is not None:
+            values, version = self.sensor_repo.get_values_since(strategy.position("датчики"))
+            windows.append(DataWindow("датчики", values, version))
+        if self.sound_repo is not None:
+            values, version = self.sound_repo.get_frequencies_since(strategy.position("звук"))
+            windows.append(DataWindow("звук", values, version))
+        return windows
+    
+    def collect_data(self) -> List[DataWindow]:
+        """Последние window_size значений датчиков и частот звука"""
+        windows = []
+        # Версия читается до среза: запись, пришедшая между ними, не попадет в кэш под новой версией
+        if self.sensor_repo is not None:
+            version = self.sensor_repo.version
+            windows.append(DataWindow("датчики", self.sensor_repo.get_value_window(self.window_size), version))
+        if self.sound_repo is not None:
+            version = self.sound_repo.version
+            windows.append(DataWindow("звук", self.sound_repo.get_frequency_window(self.window_size), version))
+        # Кэш не сбрасывается: версии окон входят в отпечаток только тех
+        # стратегий, что читают окна, прочие записи живут до LRU и ttl
+        return windows
+    
     def get_analytics(self) -> List[Analysis]:
         return [self.current_analysis] if self.current_analysis else []
     
     def set_strategy(self, strategy: IAnalysisStrategy) -> None:
         self.strategy = strategy
     
-    def add_view(self, view: IView) -> None:
-        self.views.append(view)
-    
-    def notify_views(self, data: Any) -> None:
-        for view in self.views:
-            view.update(data)
-    
-    def update_view(self, data: Any) -> None:
-        self.notify_views(data)
-    
     def get_current_state(self):
         return self.current_analysis
     
     def restore_state(self, state):
         self.current_analysis = state
 
-class DecisionController(IController):
-    def __init__(self, request_repo: RequestRepository, decision_repo: DecisionRepository):
+class DecisionController(EventPublisher, IController):
+    topic = DECISION
+    
+    def __init__(self, request_repo: RequestRepository, decision_repo: DecisionRepository,
+                 rules: RuleEngine = None):
         self.request_repo = request_repo
         self.decision_repo = decision_repo
+        # Правила из файла; без них решение - пересказ анализа
+        self.rules = rules
         self.current_decision = None
-        self.views: List[IView] = []
-        self.commands: List[ICommand] = []
+        self.history = CommandHistory()
     
     def make_decision(self, analysis: Analysis) -> Decision:
-        decision = Decision(
-            id=f"dec_{datetime.now().timestamp()}",
-            language="ru",
-            message=f"Решение на основе анализа: {analysis.result}"
-        )
-        self.current_decision = decision
+        now = datetime.now()
+        matched = self.rules.evaluate(analysis, now) if self.rules is not None else None
+        if matched is not None:
+            rule, message = matched
+            decision = Decision(id=f"dec_{now.timestamp()}", language="ru", message=message, rule_id=rule.id)
+        else:
+            decision = Decision(
+                id=f"dec_{now.timestamp()}",
+                language="ru",
+                message=f"Решение на основе анализа: {analysis.result}"
+            )
+        # Команда устанавливает решение и запоминает разницу с предыдущим
+        self.history.execute(StateCommand(self, decision))
         self.decision_repo.save(decision)
         
-        # Создаем команду
-        command = AnalysisCommand(self, [analysis])
-        command.execute()
-        self.commands.append(command)
-        
         self.notify_views(decision)
         return decision
     
     def get_decision(self) -> Optional[Decision]:
         return self.current_decision
     
-    def add_view(self, view: IView) -> None:
-        self.views.append(view)
-    
-    def notify_views(self, data: Any) -> None:
-        for view in self.views:
-            view.update(data)
+    def get_current_state(self):
+        return self.current_decision
     
-    def update_view(self, data: Any) -> None:
-        self.notify_views(data)
+    def restore_state(self, state):
+        self.current_decision = state
 
-class ResponseController(IController):
+class ResponseController(EventPublisher, IController):
+    topic = RESPONSE
+    
     def __init__(self, request_repo: RequestRepository, response_repo: ResponseRepository):
         self.request_repo = request_repo
         self.response_repo = response_repo
         self.current_response = None
-        self.views: List[IView] = []
-        self.commands: List[ICommand] = []
+        self.history = CommandHistory()
     
     def generate_response(self, decision: Decision) -> Response:
         response = Response(
@@ -237,33 +422,35 @@ class ResponseController(IController):
             language=decision.language,
             message=f"Ответ: {decision.message}"
         )
-        self.current_response = response
+        # Команда устанавливает ответ и запоминает разницу с предыдущим
+        self.history.execute(StateCommand(self, response))
         self.response_repo.save(response)
         
-        # Создаем команду
-        command = ResponseCommand(self, decision)
-        command.execute()
-        self.commands.append(command)
-        
         self.notify_views(response)
         return response
     
     def get_response(self) -> Optional[Response]:
         return self.current_response
     
-    def add_view(self, view: IView) -> None:
-        self.views.append(view)
-    
-    def notify_views(self, data: Any) -> None:
-        for view in self.views:
-            view.update(data)
-    
-    def update_view(self, data: Any) -> None:
-        self.notify_views(data)
-    
-    def get_last_response(self):
+    def get_current_state(self):
         return self.current_response
     
-    def restore_response(self, response):
-        self.current_response = response
+    def restore_state(self, state):
+        self.current_response = state
+    
+    def undo(self) -> bool:
+        """Вернуть предыдущий ответ; False - отменять нечего"""
+        if not self.history.undo():
+            return False
+        # Отмена первого ответа оставляет пустое состояние - публиковать нечего
+        if self.current_response is not None:
+            self.notify_views(self.current_response)
+        return True
+    
+    def redo(self) -> bool:
+        if not self.history.redo():
+            return False
+        if self.current_response is not None:
+            self.notify_views(self.current_response)
+        return True
 
@@ -0,0 +1,152 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from models import Device
+
+SEARCH_FIELDS = ("id", "name", "type", "connection_info", "aliases")
+SORT_FIELDS = ("id", "name", "type", "status", "connection_info")
+NGRAM = 3
+# Больше стольких изменений статуса - столбец пересортировывается целиком
+STATUS_REBUILD_BATCH = 64
+
+def ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+class DeviceSearchIndex:
+    """Индекс поиска и сортировки устройств.
+
+    Поиск подстроки: для запросов от трех символов - пересечение списков
+    триграмм запроса, для коротких - префиксный поиск по
+    отсортированным словам. Для каждого столбца хранится заранее отсортированный массив
+    (ключ, id), поддерживаемый вставками через bisect.
+    """
+    def __init__(self, devices: Iterable[Device] = ()):
+        self.devices: Dict[str, Device] = {}
+        self.texts: Dict[str, str] = {}
+        self.grams: Dict[str, Set[str]] = defaultdict(set)
+        self.words: List[tuple] = []
+        self.sorted_keys: Dict[str, List[tuple]] = {field: [] for field in SORT_FIELDS}
+        self.rebuild(devices)
+
+    def rebuild(self, devices: Iterable[Device]) -> None:
+        self.devices.clear()
+        self.texts.clear()
+        self.grams.clear()
+        self.words = []
+        self.sorted_keys = {field: [] for field in SORT_FIELDS}
+        for device in devices:
+            self._index(device)
+        # Массовая загрузка: сортируем один раз
+        self.words.sort()
+        for keys in self.sorted_keys.values():
+            keys.sort()
+
+    def add(self, device: Device) -> None:
+        if device.id in self.devices:
+            self.remove(device.id)
+        self._index(device, incremental=True)
+
+    def update_statuses(self, devices: Iterable[Device]) -> None:
+        """Заменить устройства, у которых изменился только статус.
+
+        Статус не участвует в поиске: меняется лишь столбец сортировки,
+        а при большой пачке он пересобирается одной сортировкой.
+        """
+        devices = list(devices)
+        keys = self.sorted_keys["status"]
+        if len(devices) > STATUS_REBUILD_BATCH:
+            for device in devices:
+                if device.id in self.devices:
+                    self.devices[device.id] = device
+            keys[:] = sorted((self._sort_key(device, "status"), device.id) for device in self.devices.values())
+            return
+        for device in devices:
+            previous = self.devices.get(device.id)
+            if previous is None:
+                continue
+            self._remove_sorted(keys, (self._sort_key(previous, "status"), device.id))
+            insort(keys, (self._sort_key(device, "status"), device.id))
+            self.devices[device.id] = device
+
+    def remove(self, device_id: str) -> None:
+        device = self.devices.pop(device_id, None)
+        if device is None:
+            return
+        text = self.texts.pop(device_id)
+        for gram in ngrams(text):
+            postings = self.grams.get(gram)
+            if postings is not None:
+                postings.discard(device_id)
+                if not postings:
+                    del self.grams[gram]
+        for word in set(text.split()):
+            self._remove_sorted(self.words, (word, device_id))
+        for field, keys in self.sorted_keys.items():
+            self._remove_sorted(keys, (self._sort_key(device, field), device_id))
+
+    def search(self, query: str) -> Optional[Set[str]]:
+        """id устройств, содержащих query в любом из полей (None - без фильтра)"""
+        query = query.strip().lower()
+        if not query:
+            return None
+        if len(query) < NGRAM:
+            # Короткий запрос: совпадение с началом слова, это непрерывный
+            # диапазон отсортированного списка слов
+            start = bisect_left(self.words, (query,))
+            end = bisect_left(self.words, (query + "\uffff",), start)
+            return {device_id for _, device_id in self.words[start:end]}
+
+        postings = sorted((self.grams.get(gram, ()) for gram in ngrams(query)), key=len)
+        if not postings[0]:
+            return set()
+        if len(query) == NGRAM:
+            return set(postings[0])
+        # Пересечение от самого редкого триграмма; триграммы могли совпасть
+        # в разных местах строки, поэтому подстрока проверяется напрямую
+        candidates = postings[0].intersection(*postings[1:])
+        texts = self.texts
+        return {device_id for device_id in candidates if query in texts[device_id]}
+
+    def ordered(self, field: str, ids: Optional[Set[str]] = None, descending: bool = False) -> List[str]:
+        """id устройств в порядке столбца field, ограниченные множеством ids"""
+        keys = self.sorted_keys[field]
+        if ids is None:
+            result = [device_id for _, device_id in keys]
+        elif len(ids) * 8 < len(keys):
+            # Мало результатов - дешевле отсортировать только их
+            result = sorted(ids, key=lambda i: (self._sort_key(self.devices[i], field), i))
+        else:
+            result = [device_id for _, device_id in keys if device_id in ids]
+        if descending:
+            result.reverse()
+        return result
+
+    def _index(self, device: Device, incremental: bool = False) -> None:
+        self.devices[device.id] = device
+        text = " ".join(self._field_text(device, field) for field in SEARCH_FIELDS).lower()
+        self.texts[device.id] = text
+        grams = self.grams
+        for gram in ngrams(text):
+            grams[gram].add(device.id)
+
+        add = insort if incremental else list.append
+        for word in set(text.split()):
+            add(self.words, (word, device.id))
+        for field, keys in self.sorted_keys.items():
+            add(keys, (self._sort_key(device, field), device.id))
+
+    @staticmethod
+    def _field_text(device: Device, field: str) -> str:
+        value = getattr(device, field)
+        return " ".join(value) if isinstance(value, list) else str(value)
+
+    @staticmethod
+    def _sort_key(device: Device, field: str) -> str:
+        return str(getattr(device, field)).lower()
+
+    @staticmethod
+    def _remove_sorted(items: List[tuple], item: tuple) -> None:
+        position = bisect_left(items, item)
+        if position < len(items) and items[position] == item:
+            del items[position]
@@ -0,0 +1,180 @@
+import threading
+import time
+from dataclasses import replace
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence
+
+from models import Analysis
+from patterns import IAnalysisStrategy
+
+# Политики объединения результатов
+FIRST_ACCEPTABLE = "first_acceptable"  # первый результат с достаточным доверием
+WEIGHTED = "weighted"                  # голосование, взвешенное доверием
+FALLBACK = "fallback"                  # первая стратегия, остальные - если она не успела или не уверена
+POLICIES = (FIRST_ACCEPTABLE, WEIGHTED, FALLBACK)
+
+class EnsembleStrategy(IAnalysisStrategy):
+    """Несколько стратегий одновременно в пуле потоков с ограничением
+    по времени deadline секунд.
+
+    Пул передается извне (executor, например пул AnalysisController,
+    общий для всех ансамблей приложения) и закрывается владельцем; без
+    него ансамбль создает свой пул на max_workers потоков и закрывает
+    его в shutdown().
+
+    Стратегии, не успевшие к сроку, в ответ не попадают (их задачи
+    снимаются из очереди, уже начатые дорабатывают в фоне и до своего
+    окончания пропускаются), поэтому ответ приходит не позже срока даже
+    при медленной стратегии. Одновременные вызовы друг другу не мешают:
+    пропускаются только стратегии с брошенными по сроку задачами.
+    Результат с доверием ниже min_confidence считается неприемлемым.
+    """
+    def __init__(self, strategies: Sequence[IAnalysisStrategy], policy: str = WEIGHTED,
+                 deadline: float = 0.5, min_confidence: float = 0.5,
+                 weights: Sequence[float] = None, max_workers: int = 8,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Неизвестная политика объединения: {policy}")
+        self.strategies = list(strategies)
+        self.policy = policy
+        self.deadline = deadline
+        self.min_confidence = min_confidence
+        self.weights = list(weights) if weights is not None else [1.0] * len(self.strategies)
+        self.max_workers = max_workers
+        self.pool = executor
+        self.owns_pool = executor is None
+        self.lock = threading.Lock()
+        # Номер стратегии -> ее задача, брошенная по сроку и еще выполняющаяся
+        self.abandoned: Dict[int, Future] = {}
+        self.stats = {self.strategy_name(i): {"completed": 0, "timeouts": 0, "skipped": 0,
+                                              "errors": 0, "total_ms": 0.0}
+                      for i in range(len(self.strategies))}
+
+    def executor(self) -> ThreadPoolExecutor:
+        with self.lock:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                               thread_name_prefix="analysis-ensemble")
+            return self.pool
+
+    def shutdown(self) -> None:
+        """Закрыть собственный пул; переданный извне закрывает его владелец"""
+        with self.lock:
+            pool, owned = self.pool, self.owns_pool
+            if owned:
+                self.pool = None
+        if owned and pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def strategy_name(self, index: int) -> str:
+        return f"{index}:{type(self.strategies[index]).__name__}"
+
+    def cache_key(self):
+        # Состав ответа зависит от того, кто успел к сроку - такие результаты не кэшируются
+        return None
+
+    def analyze_data(self, data: List[Any]) -> Analysis:
+        return self.analyze_batch([data])[0]
+
+    def analyze_batch(self, batch: List[List[Any]]) -> List[Analysis]:
+        started = time.perf_counter()
+        deadline = started + self.deadline
+        executor = self.executor()
+        futures = {}
+        with self.lock:
+            for i, strategy in enumerate(self.strategies):
+                # Стратегия, чья брошенная по сроку задача еще работает,
+                # пропускается: зависшие задачи не должны занимать весь пул
+                abandoned = self.abandoned.get(i)
+                if abandoned is not None:
+                    if not abandoned.done():
+                        self.stats[self.strategy_name(i)]["skipped"] += 1
+                        continue
+                    del self.abandoned[i]
+                future = executor.submit(self.run_strategy, strategy, batch)
+                futures[future] = i
+
+        # Номер стратегии -> ее результаты по пакету, в порядке готовности
+        results: Dict[int, List[Analysis]] = {}
+        pending = set(futures)
+        while pending and not self.satisfied(results, len(batch)):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                name = self.strategy_name(index)
+                error = future.exception()
+                with self.lock:
+                    if error is not None:
+                        self.stats[name]["errors"] += 1
+                        continue
+                    analyses, elapsed_ms = future.result()
+                    self.stats[name]["completed"] += 1
+                    self.stats[name]["total_ms"] += elapsed_ms
+                results[index] = analyses
+
+        for future in pending:
+            with self.lock:
+                if not future.cancel():
+                    self.abandoned[futures[future]] = future
+                self.stats[self.strategy_name(futures[future])]["timeouts"] += 1
+
+        return [self.combine([(index, analyses[item]) for index, analyses in results.items()])
+                for item in range(len(batch))]
+
+    @staticmethod
+    def run_strategy(strategy: IAnalysisStrategy, batch: List[List[Any]]):
+        started = time.perf_counter()
+        analyses = strategy.analyze_batch(batch)
+        return analyses, (time.perf_counter() - started) * 1000
+
+    def acceptable(self, analysis: Analysis) -> bool:
+        return analysis.confidence >= self.min_confidence
+
+    def satisfied(self, results: Dict[int, List[Analysis]], size: int) -> bool:
+        """Можно ли отвечать, не дожидаясь остальных стратегий"""
+        if self.policy == FIRST_ACCEPTABLE:
+            return all(any(self.acceptable(analyses[item]) for analyses in results.values())
+                       for item in range(size))
+        if self.policy == FALLBACK:
+            return 0 in results and all(self.acceptable(analysis) for analysis in results[0])
+        return len(results) == len(self.strategies)
+
+    def combine(self, candidates: List[tuple]) -> Analysis:
+        """Ответ из успевших результатов (номер стратегии, анализ) в порядке готовности"""
+        if not candidates:
+            return Analysis(id="ens_1", result=f"Анализ не успел завершиться за {self.deadline} с",
+                            confidence=0.0)
+        best = max(candidates, key=lambda candidate: candidate[1].confidence)[1]
+        if self.policy == FIRST_ACCEPTABLE:
+            return next((analysis for _, analysis in candidates if self.acceptable(analysis)), best)
+        if self.policy == FALLBACK:
+            primary = next((analysis for index, analysis in candidates if index == 0), None)
+            if primary is not None and self.acceptable(primary):
+                return primary
+            return best
+
+        # Голосуют за намерение; стратегии без намерения (статистика)
+        # воздерживаются. Если намерения нет ни у кого - голосуют выводы
+        if any(analysis.intent for _, analysis in candidates):
+            voters = [(index, analysis, analysis.intent) for index, analysis in candidates if analysis.intent]
+        else:
+            voters = [(index, analysis, analysis.result) for index, analysis in candidates]
+        scores: Dict[str, float] = {}
+        weights: Dict[str, float] = {}
+        for index, analysis, key in voters:
+            scores[key] = scores.get(key, 0.0) + self.weights[index] * analysis.confidence
+            weights[key] = weights.get(key, 0.0) + self.weights[index]
+        key = max(scores, key=scores.get)
+        # Доверие - взвешенное среднее доверия стратегий, поддержавших вывод
+        winner = max((analysis for _, analysis, vote in voters if vote == key),
+                     key=lambda analysis: analysis.confidence)
+        return replace(winner, id="ens_1",
+                       confidence=round(scores[key] / weights[key], 4) if weights[key] else 0.0)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            return {name: dict(item, avg_ms=item["total_ms"] / item["completed"] if item["completed"] else 0.0)
+                    for name, item in self.stats.items()}
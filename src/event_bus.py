@@ -0,0 +1,213 @@
+import inspect
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from models import Analysis, Decision, Request, Response
+
+# Способы доставки события подписчику
+SYNC = "sync"              # сразу, в потоке публикации
+UI = "ui"                  # в потоке интерфейса, через очередь подписчика
+BACKGROUND = "background"  # в рабочем потоке шины, через очередь подписчика
+
+@dataclass(frozen=True)
+class Topic:
+    """Тема событий: имя, тип событий и ключ объединения.
+
+    coalesce возвращает ключ события; события с одинаковым ключом,
+    еще ждущие в очереди подписчика, заменяются последним. None -
+    событие не объединяется. overflow - событие, которое встает в конец
+    очереди, если из нее вытеснены события: по нему подписчик перечитывает
+    состояние целиком. None - вытесненные события просто теряются.
+    """
+    name: str
+    payload: type = object
+    coalesce: Optional[Callable[[Any], Optional[Hashable]]] = None
+    overflow: Any = None
+
+def device_event_key(event: Any) -> Optional[Hashable]:
+    # Частые изменения одного устройства: подписчику нужно только последнее
+    if isinstance(event, dict) and event.get('type') == 'device_updated':
+        return ('device_updated', event['device'].id)
+    return None
+
+# Ключ события overflow в очереди подписчика
+OVERFLOW = 'overflow'
+
+def latest(event: Any) -> Hashable:
+    return 'latest'
+
+AUTH = Topic("auth", dict)
+DEVICE = Topic("device", dict, device_event_key, {"type": "devices_resync"})
+REQUEST = Topic("request", Request)
+ANALYSIS = Topic("analysis", Analysis, latest)
+DECISION = Topic("decision", Decision, latest)
+RESPONSE = Topic("response", Response, latest)
+SPEECH = Topic("speech", dict)
+
+class Subscription:
+    """Подписка: слабая ссылка на подписчика и его очередь доставки"""
+    def __init__(self, bus: "EventBus", topic: Topic, subscriber: Any, delivery: str, max_queue: int):
+        self.bus = bus
+        self.topic = topic
+        self.delivery = delivery
+        self.max_queue = max_queue
+        # Представления и связанные методы не удерживаются шиной: закрытое
+        # окно исчезает из подписчиков само. Функции хранятся как есть -
+        # на них обычно нет других ссылок
+        if hasattr(subscriber, 'update'):
+            self.ref = weakref.ref(subscriber)
+            self.method = 'update'
+        elif inspect.ismethod(subscriber):
+            self.ref = weakref.WeakMethod(subscriber)
+            self.method = None
+        else:
+            self.ref = lambda: subscriber
+            self.method = None
+        self.queue: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.scheduled = False
+        self.lock = threading.Lock()
+        self.active = True
+
+    def target(self) -> Optional[Callable]:
+        subscriber = self.ref()
+        if subscriber is None:
+            return None
+        return getattr(subscriber, self.method) if self.method else subscriber
+
+    def enqueue(self, event: Any, sequence: int) -> bool:
+        """Поставить событие в очередь; True - нужно запланировать доставку"""
+        key = self.topic.coalesce(event) if self.topic.coalesce else None
+        with self.lock:
+            if key is not None and key in self.queue:
+                # Устаревшее событие уходит, новое встает в конец очереди
+                del self.queue[key]
+                self.bus.count('coalesced')
+            self.queue[key if key is not None else sequence] = event
+            if len(self.queue) > self.max_queue:
+                self.queue.popitem(last=False)
+                self.bus.count('dropped')
+                if self.topic.overflow is not None:
+                    # Вместо потерянных событий - одна полная сверка после ждущих
+                    self.queue.pop(OVERFLOW, None)
+                    self.queue[OVERFLOW] = self.topic.overflow
+                    if len(self.queue) > self.max_queue:
+                        self.queue.popitem(last=False)
+                        self.bus.count('dropped')
+            self.bus.track_depth(len(self.queue))
+            if self.scheduled:
+                return False
+            self.scheduled = True
+            return True
+
+    def drain(self) -> None:
+        while True:
+            with self.lock:
+                if not self.queue or not self.active:
+                    self.scheduled = False
+                    return
+                _, event = self.queue.popitem(last=False)
+            self.bus.deliver(self, event)
+
+class EventBus:
+    """Общая шина событий контроллеров.
+
+    Публикация не ждет подписчиков с очередью (UI, BACKGROUND): событие
+    кладется в очередь подписчика, а очередь разбирается в потоке
+    интерфейса (через dispatcher, TkDispatcher) или в рабочем потоке
+    шины - медленный подписчик задерживает только себя. Без dispatcher
+    подписчики UI получают события сразу, как SYNC.
+    """
+    def __init__(self, dispatcher=None, max_queue: int = 256, workers: int = 2):
+        self.dispatcher = dispatcher
+        self.max_queue = max_queue
+        self.workers = workers
+        self.pool: Optional[ThreadPoolExecutor] = None
+        # Поток интерфейса - тот, что создал шину
+        self.ui_thread = threading.get_ident()
+        self.subscriptions: Dict[str, List[Subscription]] = {}
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+
+        # Метрики
+        self.counters = {'published': 0, 'delivered': 0, 'coalesced': 0, 'dropped': 0,
+                         'failed': 0, 'collected': 0}
+        self.max_depth = 0
+
+    def subscribe(self, topic: Topic, subscriber: Any, delivery: str = UI,
+                  max_queue: int = None) -> Subscription:
+        """subscriber - объект с методом update(event) или функция"""
+        subscription = Subscription(self, topic, subscriber, delivery, max_queue or self.max_queue)
+        with self.lock:
+            # Список заменяется целиком: публикация читает его без блокировки
+            self.subscriptions[topic.name] = self.subscriptions.get(topic.name, []) + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            subscription.active = False
+            current = self.subscriptions.get(subscription.topic.name, [])
+            self.subscriptions[subscription.topic.name] = [item for item in current if item is not subscription]
+
+    def publish(self, topic: Topic, event: Any) -> None:
+        if not isinstance(event, topic.payload):
+            raise TypeError(f"Тема {topic.name} ожидает {topic.payload.__name__}, "
+                            f"получено {type(event).__name__}")
+        self.count('published')
+        for subscription in self.subscriptions.get(topic.name, ()):
+            if subscription.delivery == SYNC or (subscription.delivery == UI and self.inline_ui()
+                                                 and not subscription.queue):
+                # В потоке интерфейса - сразу, если событие не обгоняет ждущие в очереди
+                self.deliver(subscription, event)
+            elif subscription.enqueue(event, next(self.sequence)):
+                self.schedule(subscription)
+
+    def inline_ui(self) -> bool:
+        return self.dispatcher is None or threading.get_ident() == self.ui_thread
+
+    def schedule(self, subscription: Subscription) -> None:
+        if subscription.delivery == UI:
+            self.dispatcher.post(subscription.drain)
+            return
+        with self.lock:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="event-bus")
+        self.pool.submit(subscription.drain)
+
+    def deliver(self, subscription: Subscription, event: Any) -> None:
+        target = subscription.target()
+        if target is None:
+            # Подписчик удален сборщиком мусора
+            self.unsubscribe(subscription)
+            self.count('collected')
+            return
+        try:
+            target(event)
+        except Exception as e:
+            self.count('failed')
+            print(f"Ошибка подписчика темы {subscription.topic.name}: {e}")
+            return
+        self.count('delivered')
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.counters[name] += 1
+
+    def track_depth(self, depth: int) -> None:
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def shutdown(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            stats = dict(self.counters)
+            stats['subscribers'] = sum(len(items) for items in self.subscriptions.values())
+            stats['max_queue_depth'] = self.max_depth
+            return stats
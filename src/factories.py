@@ -1,4 +1,5 @@
-from typing import Dict
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List
 from models import (
     SoundRepository, SensorDataRepository, RequestRepository,
     DecisionRepository, ResponseRepository, AuthRepository, DeviceRepository
@@ -7,48 +8,165 @@ from controllers import (
     RequestController, AnalysisController, DecisionController,
     ResponseController, AuthController, DeviceController
 )
-from patterns import MachineLearningStrategy
-from speech_recognition_module import SpeechRecognitionController
+from patterns import MachineLearningStrategy, StatisticalAnalysisStrategy
+from ensemble import EnsembleStrategy, FALLBACK
+from rule_engine import RuleEngine
+from event_bus import EventBus
+
+class LazyRegistry(Mapping):
+    """Словарь компонентов, создаваемых при первом обращении по ключу"""
+    def __init__(self, builders: Dict[str, Callable]):
+        self.builders = builders
+        self.created = {}
+        self.hooks: Dict[str, List[Callable]] = {}
+    
+    def __getitem__(self, key):
+        if key not in self.created:
+            self.created[key] = self.builders[key]()
+            for hook in self.hooks.pop(key, []):
+                hook(self.created[key])
+        return self.created[key]
+    
+    def __contains__(self, key) -> bool:
+        return key in self.builders
+    
+    def __iter__(self):
+        return iter(self.builders)
+    
+    def __len__(self) -> int:
+        return len(self.builders)
+    
+    def is_created(self, key) -> bool:
+        return key in self.created
+    
+    def when_created(self, key, hook: Callable) -> None:
+        """Вызвать hook(компонент) сразу после создания (или немедленно, если он уже создан)"""
+        if key in self.created:
+            hook(self.created[key])
+        else:
+            self.hooks.setdefault(key, []).append(hook)
+
+def create_speech_controller():
+    # Стек распознавания речи загружается только при включении голосового ввода
+    from speech_recognition_module import SpeechRecognitionController
+    return SpeechRecognitionController()
+
+def create_analysis_controller(repositories: Dict) -> AnalysisController:
+    controller = AnalysisController(
+        repositories['request'],
+        sensor_repo=repositories['sensor'],
+        sound_repo=repositories['sound']
+    )
+    # Ответ на команду - не позже 0.5 с: классификатор, а если он
+    # не уверен или не успел - статистика измерений
+    controller.set_strategy(EnsembleStrategy([MachineLearningStrategy(), StatisticalAnalysisStrategy()],
+                                             policy=FALLBACK, deadline=0.5,
+                                             executor=controller.ensemble_executor()))
+    return controller
 
 class ControllerFactory:
     @staticmethod
-    def create_controllers(repositories: Dict) -> Dict:
-        controllers = {
-            'request': RequestController(
+    def create_controllers(repositories: Dict, executor=None, bus: EventBus = None) -> Mapping:
+        """executor - BackgroundExecutor для блокирующих операций контроллеров,
+        bus - общая шина событий (по умолчанию новая, без передачи в поток интерфейса)"""
+        bus = bus or EventBus()
+        
+        def with_bus(controller):
+            controller.bus = bus
+            return controller
+        
+        def with_executor(controller):
+            controller.executor = executor
+            return with_bus(controller)
+        
+        controllers = LazyRegistry({
+            'request': lambda: with_bus(RequestController(
                 repositories['sound'],
                 repositories['sensor']
-            ),
-            'analysis': AnalysisController(
+            )),
+            'analysis': lambda: with_executor(create_analysis_controller(repositories)),
+            'decision': lambda: with_bus(DecisionController(
                 repositories['request'],
-                MachineLearningStrategy()
-            ),
-            'decision': DecisionController(
-                repositories['request'],
-                repositories['decision']
-            ),
-            'response': ResponseController(
+                repositories['decision'],
+                RuleEngine()
+            )),
+            'response': lambda: with_bus(ResponseController(
                 repositories['request'],
                 repositories['response']
-            ),
-            'auth': AuthController(repositories['auth']),
-            'device': DeviceController(repositories['device']),
-            'speech': SpeechRecognitionController()  # Добавляем контроллер распознавания речи
-        }
+            )),
+            'auth': lambda: with_bus(AuthController(repositories['auth'])),
+            'device': lambda: with_executor(DeviceController(repositories['device'])),
+            'speech': lambda: with_bus(create_speech_controller())  # Контроллер распознавания речи
+        })
         return controllers
 
 class ViewFactory:
     @staticmethod
-    def create_views(controllers: Dict, parent) -> Dict:
-        from views import (
-            AnalysisView, DecisionView, ResponseView,
-            AuthView, DeviceView
-        )
-        views = {
-            'analysis': AnalysisView(controllers['analysis'], parent),
-            'decision': DecisionView(controllers['decision'], parent),
-            'response': ResponseView(controllers['response'], parent),
-            'auth': AuthView(controllers['auth'], parent),
-            'device': DeviceView(controllers['device'], parent)
-        }
-        return views
+    def create_views(controllers: Mapping, parent) -> Mapping:
+        """Представления строятся при первом переходе на соответствующий экран"""
+        def view(name, controller_key):
+            def build():
+                import views
+                return getattr(views, name)(controllers[controller_key], parent)
+            return build
+        
+        return LazyRegistry({
+            'analysis': view('AnalysisView', 'analysis'),
+            'decision': view('DecisionView', 'decision'),
+            'response': view('ResponseView', 'response'),
+            'auth': view('AuthView', 'auth'),
+            'device': view('DeviceView', 'device'),
+            'connected_devices': view('ConnectedDevicesPanel', 'device')
+        })
+
+# ====================== КОНТЕЙНЕР ЗАВИСИМОСТЕЙ ======================
 
+class DependencyContainer:
+    def __init__(self):
+        self.registry = {}
+    
+    def register(self, interface, implementation):
+        self.registry[interface] = implementation
+    
+    def resolve(self, interface):
+        if interface in self.registry:
+            return self.registry[interface]()
+        raise ValueError(f"Не зарегистрировано: {interface}")
+
+class SystemConfigurator:
+    def __init__(self):
+        self.container = DependencyContainer()
+        self.setup_dependencies()
+    
+    def setup_dependencies(self):
+        from patterns import IAnalysisStrategy, MachineLearningStrategy
+        # Регистрируем репозитории
+        self.container.register(SoundRepository, SoundRepository)
+        self.container.register(SensorDataRepository, SensorDataRepository)
+        self.container.register(RequestRepository, RequestRepository)
+        self.container.register(DecisionRepository, DecisionRepository)
+        self.container.register(ResponseRepository, ResponseRepository)
+        self.container.register(AuthRepository, AuthRepository)
+        self.container.register(DeviceRepository, DeviceRepository)
+        
+        # Регистрируем стратегии
+        self.container.register(IAnalysisStrategy, MachineLearningStrategy)
+    
+    def create_repositories(self) -> Dict[str, Any]:
+        repos = {
+            'sound': self.container.resolve(SoundRepository),
+            'sensor': self.container.resolve(SensorDataRepository),
+            'request': self.container.resolve(RequestRepository),
+            'decision': self.container.resolve(DecisionRepository),
+            'response': self.container.resolve(ResponseRepository),
+            'auth': self.container.resolve(AuthRepository),
+            'device': self.container.resolve(DeviceRepository)
+        }
+        return repos
+    
+    def create_controllers(self, repos: Dict, executor=None, bus=None) -> Mapping:
+        return ControllerFactory.create_controllers(repos, executor, bus)
+    
+    def link_components(self):
+        # Дополнительная логика связывания компонентов
+        pass
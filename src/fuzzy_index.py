@@ -0,0 +1,170 @@
+import heapq
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from controllers import IView
+from intents import normalize
+from models import Device
+
+# Упрощенная фонетика русского: оглушение парных согласных, редукция
+# безударных гласных и удаление знаков - чтобы "лампу", "лампа" и
+# "лампо" давали близкие ключи
+PHONETIC = str.maketrans({
+    "б": "п", "в": "ф", "г": "к", "д": "т", "ж": "ш", "з": "с",
+    "о": "а", "я": "а", "е": "и", "э": "и", "ы": "и", "ю": "у", "й": "и",
+    "ь": None, "ъ": None
+})
+
+def phonetic_key(text: str) -> str:
+    key = normalize(text).translate(PHONETIC)
+    # Удвоенные буквы на слух не различаются (цифры в номерах - различаются)
+    return "".join(char for i, char in enumerate(key)
+                   if i == 0 or char != key[i - 1] or not char.isalpha())
+
+def trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Расстояние Левенштейна; если оно больше limit - возвращается limit + 1"""
+    if len(a) < len(b):
+        a, b = b, a
+    if len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+class FuzzyDeviceIndex(IView):
+    """Нечеткий поиск устройства по названию и псевдонимам.
+
+    Названия приводятся к фонетическому ключу и индексируются по
+    триграммам. Кандидаты набираются от самых редких триграмм запроса
+    с ограничением на число просмотренных записей, затем лучшие
+    max_candidates ранжируются по расстоянию редактирования - время
+    поиска ограничено независимо от размера парка.
+    """
+    def __init__(self, device_controller, max_candidates: int = 30, scan_budget: int = 5000):
+        self.max_candidates = max_candidates
+        self.scan_budget = scan_budget
+        # Фонетический ключ -> исходное название и id устройств
+        self.keys: Dict[str, Tuple[str, Set[str]]] = {}
+        self.device_keys: Dict[str, List[str]] = {}
+        self.grams: Dict[str, Set[str]] = defaultdict(set)
+        self.device_controller = device_controller
+        self.rebuild(device_controller.get_all_devices())
+        device_controller.add_view(self)
+
+    def rebuild(self, devices: Iterable[Device]) -> None:
+        self.keys.clear()
+        self.device_keys.clear()
+        self.grams.clear()
+        for device in devices:
+            self.add_device(device)
+
+    def add_device(self, device: Device) -> None:
+        if device.id in self.device_keys:
+            self.remove_device(device.id)
+        keys = []
+        for name in [device.name] + list(device.aliases):
+            key = phonetic_key(name)
+            if not key:
+                continue
+            keys.append(key)
+            if key not in self.keys:
+                self.keys[key] = (name, set())
+                for gram in trigrams(key):
+                    self.grams[gram].add(key)
+            self.keys[key][1].add(device.id)
+        self.device_keys[device.id] = keys
+
+    def remove_device(self, device_id: str) -> None:
+        for key in self.device_keys.pop(device_id, []):
+            entry = self.keys.get(key)
+            if entry is None:
+                continue
+            entry[1].discard(device_id)
+            if entry[1]:
+                continue
+            del self.keys[key]
+            for gram in trigrams(key):
+                postings = self.grams.get(gram)
+                if postings is not None:
+                    postings.discard(key)
+                    if not postings:
+                        del self.grams[gram]
+
+    def lookup(self, query: str, limit: int = 5, min_score: float = 0.5) -> List[Tuple[str, str, float]]:
+        """Кандидаты (id устройства, название, оценка 0..1) по убыванию оценки"""
+        query_key = phonetic_key(query)
+        if not query_key:
+            return []
+        query_grams = trigrams(query_key)
+        counts: Dict[str, int] = defaultdict(int)
+        budget = self.scan_budget
+        for gram in sorted(query_grams, key=lambda g: len(self.grams.get(g, ()))):
+            postings = self.grams.get(gram)
+            if not postings:
+                continue
+            if len(postings) > budget:
+                break
+            budget -= len(postings)
+            for key in postings:
+                counts[key] += 1
+
+        # Коэффициент Дайса по триграммам: у ключа длины n их не больше n + 1
+        def overlap(key):
+            return 2 * counts[key] / (len(query_grams) + len(key) + 1)
+
+        shortlist = heapq.nlargest(self.max_candidates, counts, key=overlap)
+        results = []
+        for key in shortlist:
+            # Оценка - среднее Дайса и сходства по расстоянию; расстояние
+            # дальше порога min_score можно не досчитывать
+            length = max(len(query_key), len(key))
+            limit_distance = int((1 - (2 * min_score - overlap(key))) * length)
+            if limit_distance < 0:
+                continue
+            distance = edit_distance(query_key, key, limit_distance)
+            if distance > limit_distance:
+                continue
+            score = (overlap(key) + 1 - distance / length) / 2
+            if score >= min_score:
+                name, device_ids = self.keys[key]
+                results.extend((device_id, name, score) for device_id in sorted(device_ids))
+        results.sort(key=lambda result: result[2], reverse=True)
+        return results[:limit]
+
+    def resolve(self, text: str, max_words: int = 3, limit: int = 5,
+                min_score: float = 0.5) -> List[Tuple[str, str, float]]:
+        """Лучшие кандидаты среди отрезков фразы до max_words слов"""
+        words = normalize(text).split()
+        best: Dict[str, Tuple[str, str, float]] = {}
+        for size in range(1, max_words + 1):
+            for start in range(len(words) - size + 1):
+                query = " ".join(words[start:start + size])
+                for device_id, name, score in self.lookup(query, limit, min_score):
+                    if device_id not in best or score > best[device_id][2]:
+                        best[device_id] = (device_id, name, score)
+        return sorted(best.values(), key=lambda result: result[2], reverse=True)[:limit]
+
+    def update(self, data: Any) -> None:
+        if not isinstance(data, dict):
+            return
+        if data.get('type') in ('device_added', 'device_updated'):
+            self.add_device(data['device'])
+        elif data.get('type') == 'device_deleted':
+            self.remove_device(data['device_id'])
+        elif data.get('type') == 'devices_resync':
+            # Часть событий потеряна - индекс собирается заново
+            self.rebuild(self.device_controller.get_all_devices())
+
+    def display(self, data: Any) -> None:
+        pass
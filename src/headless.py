@@ -0,0 +1,136 @@
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Mapping, Optional
+
+from models import Response
+from factories import SystemConfigurator
+from pipeline import RequestPipeline, create_command_request
+from ui_dispatch import ImmediateDispatcher, SpeechEventBridge
+from telemetry import TelemetryIngester, TelemetryServer
+
+class HeadlessRuntime:
+    """Работа системы без графического интерфейса.
+
+    Те же репозитории и контроллеры, что и в SystemApplication, собираются
+    через SystemConfigurator. Команды поступают из stdin, TCP-сокета или
+    контроллера распознавания речи и проходят цепочку
+    запрос -> анализ -> решение -> ответ. Одиночные команды выполняются
+    последовательно, а сокет и голос с многими одновременными сеансами
+    идут через конвейер RequestPipeline.
+    """
+    def __init__(self, configurator: Optional[SystemConfigurator] = None):
+        configurator = configurator or SystemConfigurator()
+        self.repositories = configurator.create_repositories()
+        self.controllers: Mapping = configurator.create_controllers(self.repositories)
+        # Контроллеры хранят текущее состояние - цепочка выполняется последовательно
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.server = None
+        self.bridge = None
+        self.telemetry: Optional[TelemetryIngester] = None
+        self.telemetry_server: Optional[TelemetryServer] = None
+        self.pipeline: Optional[RequestPipeline] = None
+
+    def process_command(self, text: str, source: str = "text") -> Response:
+        """Провести команду через всю цепочку и вернуть ответ"""
+        with self.lock:
+            request = create_command_request(self.controllers['request'], text, source)
+            analysis = self.controllers['analysis'].perform_analysis(request)
+            decision = self.controllers['decision'].make_decision(analysis)
+            response = self.controllers['response'].generate_response(decision)
+            self.processed += 1
+        return response
+
+    def submit_command(self, text: str, source: str = "text") -> Future:
+        """Поставить команду в конвейер; Future завершится ответом"""
+        if self.pipeline is None:
+            self.pipeline = RequestPipeline(self.controllers)
+            self.pipeline.start()
+        return self.pipeline.submit(text, source)
+
+    def serve_stdin(self, stream=None, out=None) -> None:
+        """Читать команды построчно из stdin и печатать ответы"""
+        stream = stream or sys.stdin
+        out = out or sys.stdout
+        for line in stream:
+            text = line.strip()
+            if not text:
+                continue
+            response = self.process_command(text, "stdin")
+            out.write(response.message + "\n")
+            out.flush()
+
+    def serve_socket(self, host: str = "127.0.0.1", port: int = 8765) -> None:
+        """TCP-сервер: одна команда на строку, один ответ на строку"""
+        runtime = self
+
+        class CommandHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw in self.rfile:
+                    text = raw.decode('utf-8').strip()
+                    if not text:
+                        continue
+                    try:
+                        reply = runtime.submit_command(text, "socket").result().message
+                    except Exception as e:
+                        print(f"Ошибка обработки команды \"{text}\": {e}")
+                        reply = f"Ошибка: {e}"
+                    self.wfile.write((reply + "\n").encode('utf-8'))
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), CommandHandler)
+        self.server.daemon_threads = True
+        print(f"Ожидание команд на {host}:{port}")
+        self.server.serve_forever()
+
+    def serve_speech(self, timeout=None) -> bool:
+        """Голосовые команды: распознанные фразы сразу уходят в цепочку"""
+        speech_controller = self.controllers['speech']
+
+        def on_phrase(result):
+            def on_done(done):
+                try:
+                    reply = done.result().message
+                except Exception as e:
+                    print(f"[{result.source}] Ошибка обработки команды \"{result.text}\": {e}")
+                    return
+                print(f"[{result.source}] {result.text} -> {reply}")
+
+            self.submit_command(result.text, f"voice:{result.source}").add_done_callback(on_done)
+
+        # Шина держит подписчиков по слабым ссылкам: мост хранится здесь
+        self.bridge = SpeechEventBridge(speech_controller, ImmediateDispatcher(), on_phrase)
+        speech_controller.add_view(self.bridge)
+        if not speech_controller.start_listening(timeout):
+            return False
+        print("Голосовой ввод активирован (Ctrl+C для выхода)")
+        try:
+            while speech_controller.is_listening:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            speech_controller.stop_listening()
+        return True
+
+    def start_telemetry(self, host: str = "127.0.0.1", port: int = 8766) -> None:
+        """Прием телеметрии устройств по UDP и TCP на одном порту, в фоне"""
+        self.telemetry = TelemetryIngester(self.controllers['device'], self.repositories['sensor'])
+        self.telemetry_server = TelemetryServer(self.telemetry, host, udp_port=port, tcp_port=port)
+        self.telemetry.start()
+        self.telemetry_server.start()
+        print(f"Прием телеметрии на {host}:{port} (UDP и TCP)")
+
+    def shutdown(self) -> None:
+        if self.telemetry_server is not None:
+            self.telemetry_server.stop()
+            self.telemetry.stop()
+        if self.server is not None:
+            self.server.shutdown()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        if self.controllers.is_created('speech'):
+            self.controllers['speech'].shutdown(timeout=2.0)
+        if self.controllers.is_created('analysis'):
+            self.controllers['analysis'].shutdown()
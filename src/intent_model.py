@@ -0,0 +1,241 @@
+"""Локальный классификатор намерений распознанных фраз.
+
+Признаки - хешированные слова, пары слов и буквенные триграммы (устойчивы
+к искажениям распознавания), модель - линейная многоклассовая
+логистическая регрессия на NumPy. Модель хранится каталогом .npy файлов
+и открывается через memory map один раз на процесс.
+
+Обучение и проверка:
+    python intent_model.py train --data intent_examples.json --out intent_model
+    python intent_model.py evaluate --data intent_examples.json --model intent_model
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from intents import normalize
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL_DIR = os.path.join(MODULE_DIR, "intent_model")
+DEFAULT_EXAMPLES = os.path.join(MODULE_DIR, "intent_examples.json")
+FEATURE_BITS = 14
+
+def hashed_features(text: str, bits: int = FEATURE_BITS) -> Dict[int, float]:
+    """Разреженный вектор признаков с нормой 1: индекс -> вес"""
+    mask = (1 << bits) - 1
+    words = normalize(text).split()
+    tokens = [f"w:{word}" for word in words]
+    tokens += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        tokens += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    # crc32 вместо hash(): индексы не должны меняться между запусками
+    counts: Dict[int, float] = {}
+    for token in tokens:
+        index = zlib.crc32(token.encode('utf-8')) & mask
+        counts[index] = counts.get(index, 0.0) + 1.0
+    norm = sum(value * value for value in counts.values()) ** 0.5 or 1.0
+    return {index: value / norm for index, value in counts.items()}
+
+def to_sparse(texts: List[str], bits: int = FEATURE_BITS):
+    """Пакет фраз в плоские массивы (индексы, веса, номер фразы)"""
+    indices, weights, rows = [], [], []
+    for row, text in enumerate(texts):
+        for index, weight in hashed_features(text, bits).items():
+            indices.append(index)
+            weights.append(weight)
+            rows.append(row)
+    return (np.asarray(indices, dtype=np.int64), np.asarray(weights, dtype=np.float32),
+            np.asarray(rows, dtype=np.int64))
+
+class IntentClassifier:
+    def __init__(self, weights, bias, labels: List[str], bits: int = FEATURE_BITS):
+        self.weights = weights  # (2**bits, число классов)
+        self.bias = bias
+        self.labels = labels
+        self.bits = bits
+
+    def scores(self, texts: List[str]):
+        """Логиты пакета: одна выборка строк весов и одно суммирование на весь пакет"""
+        indices, weights, rows = to_sparse(texts, self.bits)
+        logits = np.tile(self.bias, (len(texts), 1)).astype(np.float32)
+        if indices.size:
+            # Признаки фраз идут подряд: суммы по фразам - одним reduceat по началам отрезков
+            present, starts = np.unique(rows, return_index=True)
+            logits[present] += np.add.reduceat(self.weights[indices] * weights[:, None], starts, axis=0)
+        return logits
+
+    def predict_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """(намерение, вероятность) для каждой фразы"""
+        if not texts:
+            return []
+        probabilities = softmax(self.scores(texts))
+        best = probabilities.argmax(axis=1)
+        return [(self.labels[label], float(probabilities[row, label])) for row, label in enumerate(best)]
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        return self.predict_batch([text])[0]
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "weights.npy"), np.ascontiguousarray(self.weights))
+        np.save(os.path.join(directory, "bias.npy"), np.asarray(self.bias))
+        with open(os.path.join(directory, "labels.json"), 'w', encoding='utf-8') as f:
+            json.dump({"labels": self.labels, "bits": self.bits}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str) -> "IntentClassifier":
+        with open(os.path.join(directory, "labels.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        # Веса не читаются в память целиком: страницы подгружаются по мере обращения
+        weights = np.load(os.path.join(directory, "weights.npy"), mmap_mode='r')
+        bias = np.load(os.path.join(directory, "bias.npy"))
+        return cls(weights, bias, meta["labels"], meta["bits"])
+
+def softmax(logits):
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+def load_examples(path: str = DEFAULT_EXAMPLES) -> List[Tuple[str, str]]:
+    """Обучающие фразы: шаблоны с {device} раскрываются по списку устройств"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    examples = []
+    for label, templates in data["intents"].items():
+        for template in templates:
+            if "{device}" in template:
+                examples += [(template.format(device=device), label) for device in data["devices"]]
+            else:
+                examples.append((template, label))
+    return examples
+
+def train(examples: List[Tuple[str, str]], epochs: int = 40, learning_rate: float = 1.0,
+          l2: float = 1e-5, batch_size: int = 32, seed: int = 0, bits: int = FEATURE_BITS) -> IntentClassifier:
+    """Мини-пакетный градиентный спуск по перекрестной энтропии"""
+    labels = sorted({label for _, label in examples})
+    label_index = {label: i for i, label in enumerate(labels)}
+    model = IntentClassifier(np.zeros((1 << bits, len(labels)), dtype=np.float32),
+                             np.zeros(len(labels), dtype=np.float32), labels, bits)
+    rng = random.Random(seed)
+    examples = list(examples)
+    for _ in range(epochs):
+        rng.shuffle(examples)
+        for start in range(0, len(examples), batch_size):
+            batch = examples[start:start + batch_size]
+            texts = [text for text, _ in batch]
+            targets = np.asarray([label_index[label] for _, label in batch])
+            gradient = softmax(model.scores(texts))
+            gradient[np.arange(len(batch)), targets] -= 1.0
+            gradient /= len(batch)
+
+            indices, weights, rows = to_sparse(texts, bits)
+            # Обновляются только строки весов, встретившиеся в пакете
+            np.add.at(model.weights, indices, -learning_rate * weights[:, None] * gradient[rows])
+            if l2:
+                touched = np.unique(indices)
+                model.weights[touched] *= (1 - learning_rate * l2)
+            model.bias -= learning_rate * gradient.sum(axis=0)
+    return model
+
+def evaluate(model: IntentClassifier, examples: List[Tuple[str, str]]) -> float:
+    predictions = model.predict_batch([text for text, _ in examples])
+    correct = sum(predicted == label for (predicted, _), (_, label) in zip(predictions, examples))
+    return correct / len(examples) if examples else 0.0
+
+_models: Dict[str, Optional[IntentClassifier]] = {}
+_models_lock = threading.Lock()
+_training: Dict[str, threading.Thread] = {}
+
+def get_model(directory: str = DEFAULT_MODEL_DIR, block: bool = True) -> Optional[IntentClassifier]:
+    """Модель из каталога, загруженная один раз на процесс; None - нет NumPy или модели.
+
+    Модели по умолчанию в репозитории нет: при первом обращении она
+    обучается на DEFAULT_EXAMPLES (около секунды) и сохраняется в каталог.
+    block=False - не ждать обучения: оно идет в фоне, а пока возвращается None.
+    """
+    with _models_lock:
+        if directory in _models:
+            return _models[directory]
+        if np is None:
+            _models[directory] = None
+            return None
+        if os.path.exists(os.path.join(directory, "labels.json")):
+            _models[directory] = IntentClassifier.load(directory)
+            return _models[directory]
+        if directory != DEFAULT_MODEL_DIR:
+            _models[directory] = None
+            return None
+        thread = _training.get(directory)
+        if thread is None:
+            thread = threading.Thread(target=_train_default, args=(directory,),
+                                      name="intent-model-train", daemon=True)
+            _training[directory] = thread
+            thread.start()
+    if not block:
+        return None
+    thread.join()
+    with _models_lock:
+        return _models.get(directory)
+
+def _train_default(directory: str) -> None:
+    model = None
+    try:
+        model = train(load_examples(DEFAULT_EXAMPLES))
+        model.save(directory)
+    except OSError as e:
+        # Каталог недоступен для записи - модель живет только в памяти
+        print(f"Не удалось сохранить модель намерений в {directory}: {e}")
+    except (ValueError, KeyError) as e:
+        print(f"Ошибка обучения модели намерений: {e}")
+    with _models_lock:
+        _models[directory] = model
+        _training.pop(directory, None)
+
+def is_loaded(directory: str = DEFAULT_MODEL_DIR) -> bool:
+    """Модель уже в памяти (без загрузки и обучения)"""
+    return _models.get(directory) is not None
+
+def main():
+    parser = argparse.ArgumentParser(description="Классификатор намерений")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = sub.add_parser("train", help="обучить модель")
+    train_parser.add_argument("--data", default=DEFAULT_EXAMPLES)
+    train_parser.add_argument("--out", default=DEFAULT_MODEL_DIR)
+    train_parser.add_argument("--epochs", type=int, default=40)
+    train_parser.add_argument("--holdout", type=float, default=0.2,
+                              help="доля фраз для проверки точности")
+
+    evaluate_parser = sub.add_parser("evaluate", help="точность модели на фразах")
+    evaluate_parser.add_argument("--data", default=DEFAULT_EXAMPLES)
+    evaluate_parser.add_argument("--model", default=DEFAULT_MODEL_DIR)
+
+    args = parser.parse_args()
+    if np is None:
+        print("Для классификатора намерений нужен NumPy")
+        return
+    examples = load_examples(args.data)
+    if args.command == "train":
+        random.Random(1).shuffle(examples)
+        split = int(len(examples) * (1 - args.holdout))
+        model = train(examples[:split], epochs=args.epochs)
+        print(f"Точность на отложенных фразах: {evaluate(model, examples[split:]):.3f}")
+        # Итоговая модель учится на всех фразах
+        model = train(examples, epochs=args.epochs)
+        model.save(args.out)
+        print(f"Модель сохранена в {args.out}: {len(model.labels)} классов, {len(examples)} фраз")
+    elif args.command == "evaluate":
+        print(f"Точность: {evaluate(IntentClassifier.load(args.model), examples):.3f}")
+
+if __name__ == "__main__":
+    main()
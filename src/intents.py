@@ -0,0 +1,301 @@
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from controllers import IView
+from models import Device
+
+# Глаголы команд и формы названий типов устройств
+ACTION_WORDS = {
+    "turn_on": ["включи", "включить", "включите", "зажги", "запусти"],
+    "turn_off": ["выключи", "выключить", "выключите", "отключи", "погаси", "останови"],
+    "status": ["статус", "состояние", "проверь", "покажи"]
+}
+TYPE_WORDS = {
+    "сенсор": ["сенсор", "сенсора", "сенсоры", "сенсоров", "датчик", "датчики", "датчиков"],
+    "актуатор": ["актуатор", "актуатора", "актуаторы", "актуаторов"],
+    "камера": ["камера", "камеру", "камеры", "камер"],
+    "динамик": ["динамик", "динамики", "динамиков", "колонка", "колонку", "колонки"],
+    "микрофон": ["микрофон", "микрофоны", "микрофонов"],
+    "контроллер": ["контроллер", "контроллеры", "контроллеров"]
+}
+ACTION_STATUS = {"turn_on": "online", "turn_off": "offline"}
+
+def normalize(text: str) -> str:
+    """Нижний регистр, ё -> е, пунктуация и повторные пробелы -> один пробел"""
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower().replace("ё", "е")).split())
+
+TYPE_BY_WORD = {word: device_type for device_type, words in TYPE_WORDS.items() for word in words}
+
+def device_type_of(text: str) -> Optional[str]:
+    """Тип устройства, первым упомянутый во фразе"""
+    for word in normalize(text).split():
+        if word in TYPE_BY_WORD:
+            return TYPE_BY_WORD[word]
+    return None
+
+class PatternAutomaton:
+    """Автомат Ахо-Корасик: все вхождения множества строк за один проход по тексту"""
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Шаблон, заканчивающийся в узле, и ближайший по суффиксной ссылке узел с шаблоном
+        self.output: List[Optional[str]] = [None]
+        self.link: List[int] = [0]
+        self.patterns: Set[str] = set()
+        for pattern in patterns:
+            self.add(pattern)
+        self.build()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def add(self, pattern: str) -> None:
+        """Добавить шаблон в бор; ссылки пересчитываются в build()"""
+        if not pattern or pattern in self.patterns:
+            return
+        self.patterns.add(pattern)
+        node = 0
+        for char in pattern:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.link.append(0)
+            node = next_node
+        self.output[node] = pattern
+
+    def build(self) -> None:
+        """Суффиксные ссылки обходом бора в ширину"""
+        queue = deque(self.goto[0].values())
+        for node in queue:
+            self.fail[node] = 0
+            self.link[node] = 0
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                fallback = self.goto[state].get(char, 0)
+                self.fail[child] = fallback if fallback != child else 0
+                self.link[child] = self.fail[child] if self.output[self.fail[child]] else self.link[self.fail[child]]
+                queue.append(child)
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """Все вхождения шаблонов: (начало, конец, шаблон)"""
+        goto, fail, output, link = self.goto, self.fail, self.output, self.link
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            node = state if output[state] else link[state]
+            while node:
+                pattern = output[node]
+                matches.append((position + 1 - len(pattern), position + 1, pattern))
+                node = link[node]
+        return matches
+
+@dataclass
+class Intent:
+    action: str
+    text: str
+    device_ids: List[str] = field(default_factory=list)
+    device_type: Optional[str] = None
+    matched: List[str] = field(default_factory=list)
+    # 1.0 - точное совпадение названия, меньше - нечеткое
+    score: float = 1.0
+
+class IntentParser(IView):
+    """Разбор распознанной фразы в команду устройству.
+
+    Названия и псевдонимы устройств, глаголы и типы компилируются в
+    автомат Ахо-Корасик, так что разбор не зависит от размера парка.
+    Новые названия попадают в небольшой дополнительный автомат, который
+    перестраивается целиком; основной перестраивается, только когда
+    дополнительный или число удаленных названий вырастает до delta_limit.
+    """
+    def __init__(self, device_controller, delta_limit: int = 256, fuzzy=None, fuzzy_score: float = 0.7):
+        self.device_controller = device_controller
+        self.delta_limit = delta_limit
+        # FuzzyDeviceIndex для названий, искаженных распознаванием
+        self.fuzzy = fuzzy
+        self.fuzzy_score = fuzzy_score
+        # Название -> id устройств с этим названием или псевдонимом
+        self.device_patterns: Dict[str, Set[str]] = {}
+        self.device_names: Dict[str, List[str]] = {}
+        self.static_patterns: Dict[str, Tuple[str, str]] = {}
+        for action, words in ACTION_WORDS.items():
+            for word in words:
+                self.static_patterns[word] = ("action", action)
+        for device_type, words in TYPE_WORDS.items():
+            for word in words:
+                self.static_patterns[word] = ("type", device_type)
+
+        self.main = PatternAutomaton()
+        self.delta = PatternAutomaton()
+        self.dead = 0
+        self.rebuild(device_controller.get_all_devices())
+        device_controller.add_view(self)
+
+    def rebuild(self, devices: Iterable[Device]) -> None:
+        self.device_patterns.clear()
+        self.device_names.clear()
+        for device in devices:
+            self._register(device)
+        self.main = PatternAutomaton(list(self.static_patterns) + list(self.device_patterns))
+        self.delta = PatternAutomaton()
+        self.dead = 0
+
+    def add_device(self, device: Device) -> None:
+        previous = self.device_names.get(device.id)
+        if previous is not None:
+            if set(previous) == self._names(device):
+                # Изменились только статус или тип - шаблоны те же
+                return
+            self.remove_device(device.id)
+        added = False
+        for pattern in self._names(device):
+            in_automaton = pattern in self.main.patterns or pattern in self.delta.patterns
+            if in_automaton and pattern not in self.device_patterns and pattern not in self.static_patterns:
+                # Мертвый шаблон снова обозначает устройство
+                self.dead -= 1
+        for pattern in self._register(device):
+            if pattern not in self.main.patterns and pattern not in self.delta.patterns:
+                self.delta.add(pattern)
+                added = True
+        if len(self.delta) > self.delta_limit:
+            self.rebuild(self.device_controller.get_all_devices())
+        elif added:
+            self.delta.build()
+
+    def remove_device(self, device_id: str) -> None:
+        for pattern in self.device_names.pop(device_id, []):
+            owners = self.device_patterns.get(pattern)
+            if owners is None:
+                continue
+            owners.discard(device_id)
+            if not owners:
+                # Шаблон остается в автомате, но больше ничего не значит
+                del self.device_patterns[pattern]
+                if pattern not in self.static_patterns:
+                    self.dead += 1
+        if self.dead > self.delta_limit:
+            self.rebuild(self.device_controller.get_all_devices())
+
+    def parse(self, text: str) -> Optional[Intent]:
+        """Команда из фразы или None, если в ней нет глагола"""
+        normalized = normalize(text)
+        action = None
+        device_type = None
+        device_ids: List[str] = []
+        matched = []
+        residual = normalized
+        for start, end, pattern in self._longest_matches(normalized):
+            meaning = self.static_patterns.get(pattern)
+            owners = self.device_patterns.get(pattern)
+            if owners:
+                device_ids.extend(sorted(owners - set(device_ids)))
+                matched.append(pattern)
+            elif meaning and meaning[0] == "action":
+                if action is None:
+                    action = meaning[1]
+                residual = residual[:start] + " " * (end - start) + residual[end:]
+            elif meaning and meaning[0] == "type" and device_type is None:
+                device_type = meaning[1]
+                matched.append(pattern)
+        if action is None:
+            return None
+        intent = Intent(action=action, text=text, device_ids=device_ids,
+                        device_type=device_type, matched=matched)
+        if not device_ids and device_type is None and self.fuzzy is not None:
+            self._resolve_fuzzy(intent, residual)
+        return intent
+
+    def _resolve_fuzzy(self, intent: Intent, residual: str) -> None:
+        """Название не совпало точно - берем уверенного нечеткого кандидата"""
+        candidates = self.fuzzy.resolve(residual, limit=2)
+        if not candidates or candidates[0][2] < self.fuzzy_score:
+            return
+        device_id, name, score = candidates[0]
+        # Два равно похожих разных названия - не угадываем
+        if len(candidates) > 1 and candidates[1][1] != name and score - candidates[1][2] < 0.05:
+            return
+        intent.device_ids = [device_id]
+        intent.matched.append(name)
+        intent.score = score
+
+    def update(self, data: Any) -> None:
+        if not isinstance(data, dict):
+            return
+        if data.get('type') in ('device_added', 'device_updated'):
+            self.add_device(data['device'])
+        elif data.get('type') == 'device_deleted':
+            self.remove_device(data['device_id'])
+        elif data.get('type') == 'devices_resync':
+            # Часть событий потеряна - шаблоны собираются заново
+            self.rebuild(self.device_controller.get_all_devices())
+
+    def display(self, data: Any) -> None:
+        pass
+
+    @staticmethod
+    def _names(device: Device) -> Set[str]:
+        names = {normalize(name) for name in [device.name] + list(device.aliases)}
+        names.discard("")
+        return names
+
+    def _register(self, device: Device) -> List[str]:
+        names = self._names(device)
+        self.device_names[device.id] = list(names)
+        for name in names:
+            self.device_patterns.setdefault(name, set()).add(device.id)
+        return list(names)
+
+    def _longest_matches(self, text: str) -> List[Tuple[int, int, str]]:
+        """Непересекающиеся вхождения целых слов, самые левые и самые длинные"""
+        matches = [
+            match for match in self.main.find(text) + self.delta.find(text)
+            if (match[0] == 0 or text[match[0] - 1] == " ")
+            and (match[1] == len(text) or text[match[1]] == " ")
+            and (match[2] in self.static_patterns or match[2] in self.device_patterns)
+        ]
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        result = []
+        covered = 0
+        for match in matches:
+            if match[0] >= covered:
+                result.append(match)
+                covered = match[1]
+        return result
+
+def apply_intent(intent: Intent, device_controller, limit: int = 5) -> str:
+    """Выполнить команду через DeviceController и вернуть ответ для чата"""
+    device_ids = intent.device_ids
+    if not device_ids and intent.device_type:
+        device_ids = sorted(device_controller.filter_device_ids(device_type=intent.device_type))
+    devices = [device for device in map(device_controller.get_device_by_id, device_ids) if device]
+    if not devices:
+        return "Не понял, к какому устройству относится команда"
+
+    if intent.action == "status":
+        lines = [f"{device.name}: {device.status}" for device in devices[:limit]]
+        if len(devices) > limit:
+            lines.append(f"и еще {len(devices) - limit}")
+        return "Состояние: " + "; ".join(lines)
+
+    status = ACTION_STATUS[intent.action]
+    # Одна пачка: файл устройств записывается и событие публикуется один раз
+    changed = len(device_controller.apply_statuses(
+        {device.id: status for device in devices if device.status != status}))
+    verb = "Включено" if intent.action == "turn_on" else "Выключено"
+    names = ", ".join(device.name for device in devices[:limit])
+    if len(devices) > limit:
+        names += f" и еще {len(devices) - limit}"
+    return f"{verb}: {names} (изменено {changed})"
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict
+
+from audio_sources import AudioClip, load_manifest, load_speech_recognition, read_wav
+
+# Интерфейс локального детектора ключевой фразы
+class IKeywordSpotter(ABC):
+    # False - детектор не может работать (нет библиотеки или модели языка)
+    available = True
+
+    @abstractmethod
+    def detect(self, clip: AudioClip) -> bool:
+        pass
+
+class SphinxKeywordSpotter(IKeywordSpotter):
+    """Поиск ключевой фразы через pocketsphinx (локально, без сети).
+
+    Язык по умолчанию - язык приложения: фраза ищется в словаре модели
+    этого языка. Для ru-RU модель pocketsphinx ставится отдельно.
+    """
+    def __init__(self, wake_phrase: str, sensitivity: float = 0.8, language="ru-RU"):
+        self.wake_phrase = wake_phrase
+        self.sensitivity = sensitivity
+        self.language = language
+        sr = load_speech_recognition()
+        self.recognizer = sr.Recognizer() if sr else None
+        self.available = self.recognizer is not None
+
+    def detect(self, clip: AudioClip) -> bool:
+        if not self.available:
+            return False
+        sr = load_speech_recognition()
+        try:
+            text = self.recognizer.recognize_sphinx(
+                clip.to_audio_data(),
+                language=self.language,
+                keyword_entries=[(self.wake_phrase, self.sensitivity)]
+            )
+        except sr.UnknownValueError:
+            return False
+        except sr.RequestError as e:
+            # Нет pocketsphinx или модели языка - дальше детектор не вызывается
+            print(f"Ошибка поиска ключевой фразы ({self.language}): {e}")
+            self.available = False
+            return False
+        return self.wake_phrase.lower() in text.lower()
+
+class TranscriptKeywordSpotter(IKeywordSpotter):
+    """Детектор по расшифровке записи - для прогонов на воспроизводимом корпусе"""
+    def __init__(self, wake_phrase: str):
+        self.wake_phrase = wake_phrase.lower()
+
+    def detect(self, clip: AudioClip) -> bool:
+        return self.wake_phrase in clip.transcript.lower()
+
+class WakeWordGate:
+    """Фильтр перед полным распознаванием.
+
+    Фраза передается в распознавание только после обнаружения ключевой
+    фразы: окно window секунд открывается отдельно для каждого источника.
+    Если детектор недоступен, фразы передаются в распознавание без фильтра.
+    """
+    def __init__(self, spotter: IKeywordSpotter, window: float = 5.0, forward_wake_clip: bool = True):
+        self.spotter = spotter
+        self.window = window
+        self.forward_wake_clip = forward_wake_clip
+        self.open_until: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.bypass_reported = False
+
+        # Метрики
+        self.clips_seen = 0
+        self.wake_detections = 0
+        self.forwarded = 0
+        self.avoided = 0
+
+    def accept(self, clip: AudioClip, source: str = "default") -> bool:
+        now = time.time()
+        with self.lock:
+            self.clips_seen += 1
+            is_open = self.open_until.get(source, 0.0) > now
+
+        detected = False if is_open else self.spotter.detect(clip)
+
+        with self.lock:
+            if not self.spotter.available:
+                if not self.bypass_reported:
+                    self.bypass_reported = True
+                    print("Детектор ключевой фразы недоступен: фразы распознаются без фильтра")
+                self.forwarded += 1
+                return True
+
+            if detected:
+                self.wake_detections += 1
+                self.open_until[source] = now + self.window
+            elif is_open:
+                # Каждая команда продлевает окно диалога
+                self.open_until[source] = now + self.window
+
+            forward = is_open or (detected and self.forward_wake_clip)
+            if forward:
+                self.forwarded += 1
+            else:
+                self.avoided += 1
+        return forward
+
+    def get_stats(self) -> Dict[str, float]:
+        with self.lock:
+            return {
+                "clips_seen": self.clips_seen,
+                "wake_detections": self.wake_detections,
+                "forwarded": self.forwarded,
+                "avoided_recognitions": self.avoided,
+                "avoided_ratio": self.avoided / self.clips_seen if self.clips_seen else 0.0
+            }
+
+def evaluate_spotter(spotter: IKeywordSpotter, corpus: str, wake_phrase: str) -> Dict[str, float]:
+    """Оценить детектор на записанном корпусе.
+
+    Эталонная разметка - поле "wake" в манифесте, а если его нет -
+    наличие ключевой фразы в расшифровке.
+    """
+    wake_phrase = wake_phrase.lower()
+    tp = fp = tn = fn = 0
+    for entry in load_manifest(corpus):
+        clip = read_wav(os.path.join(corpus, entry["file"]))
+        clip.transcript = entry.get("transcript", "")
+        expected = entry.get("wake", wake_phrase in clip.transcript.lower())
+        detected = spotter.detect(clip)
+        if expected and detected:
+            tp += 1
+        elif expected:
+            fn += 1
+        elif detected:
+            fp += 1
+        else:
+            tn += 1
+
+    return {
+        "clips": tp + fp + tn + fn,
+        "true_accepts": tp,
+        "false_accepts": fp,
+        "false_rejects": fn,
+        "false_accept_rate": fp / (fp + tn) if fp + tn else 0.0,
+        "false_reject_rate": fn / (fn + tp) if fn + tp else 0.0
+    }
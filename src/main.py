@@ -1,7 +1,49 @@
-from application import SystemApplication
+import argparse
 import os
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Система управления умным домом")
+    parser.add_argument("--headless", action="store_true",
+                        help="работа без графического интерфейса (команды из stdin)")
+    # Источник команд в режиме без интерфейса - один (по умолчанию stdin)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--socket", metavar="HOST:PORT",
+                        help="принимать команды по TCP (вместе с --headless)")
+    source.add_argument("--voice", action="store_true",
+                        help="принимать голосовые команды (вместе с --headless)")
+    parser.add_argument("--telemetry", metavar="HOST:PORT",
+                        help="принимать телеметрию устройств по UDP и TCP (вместе с --headless)")
+    parser.add_argument("--watchdog", type=int, metavar="MS", default=None,
+                        help="отчет о зависаниях интерфейса дольше MS миллисекунд")
+    return parser.parse_args()
+
+def run_headless(args):
+    # Без графического интерфейса tkinter не импортируется вовсе
+    from headless import HeadlessRuntime
+    runtime = HeadlessRuntime()
+    try:
+        if args.telemetry:
+            host, _, port = args.telemetry.rpartition(":")
+            runtime.start_telemetry(host or "127.0.0.1", int(port))
+        if args.socket:
+            host, _, port = args.socket.rpartition(":")
+            runtime.serve_socket(host or "127.0.0.1", int(port))
+        elif args.voice:
+            if not runtime.serve_speech():
+                print("Не удалось запустить голосовой ввод")
+        else:
+            runtime.serve_stdin()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runtime.shutdown()
+
 def main():
+    args = parse_args()
+    if args.headless:
+        run_headless(args)
+        return
+
     print("Запуск системы управления умным домом...")
     
     # Проверяем наличие JSON файлов
@@ -11,8 +53,9 @@ def main():
         print("Создаю файл devices.json...")
     
     # Создаем и запускаем приложение
-    app = SystemApplication()
+    from application import SystemApplication
+    app = SystemApplication(watchdog_threshold_ms=args.watchdog)
     app.run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Any
-from dataclasses import dataclass, asdict
+from typing import List, Optional, Any, Dict, Tuple
+from dataclasses import dataclass, asdict, field, replace
 import json
 import os
+import threading
+from collections import deque
+from array import array
 
 # Интерфейс репозитория
 class IRepository(ABC):
@@ -30,6 +33,16 @@ class SensorData:
     id: str
     timestamp: str
     purpose: str
+    # Измеренное значение; у служебных записей (команды) его нет
+    value: Optional[float] = None
+
+@dataclass
+class DataWindow:
+    """Последние значения одного ряда измерений для стратегий анализа"""
+    name: str
+    values: Any
+    # Версия хранилища на момент среза: одинаковая версия - одинаковые значения
+    version: int = 0
     
 @dataclass
 class Request:
@@ -43,12 +56,17 @@ class Analysis:
     id: str
     result: str
     confidence: float
+    # Распознанные намерение и тип устройства - для правил принятия решений
+    intent: Optional[str] = None
+    device_type: Optional[str] = None
     
 @dataclass
 class Decision:
     id: str
     language: str
     message: str
+    # Сработавшее правило (None - ни одно правило не подошло)
+    rule_id: Optional[str] = None
     
 @dataclass
 class Response:
@@ -62,6 +80,10 @@ class User:
     user_type: str
     id: int
 
+# Типы и статусы устройств для списков выбора и фильтров
+DEVICE_TYPES = ["сенсор", "актуатор", "камера", "динамик", "микрофон", "контроллер"]
+DEVICE_STATUSES = ["online", "offline", "error", "обслуживание"]
+
 @dataclass
 class Device:
     id: str
@@ -69,6 +91,8 @@ class Device:
     type: str
     status: str
     connection_info: str
+    # Другие названия устройства для голосовых команд
+    aliases: List[str] = field(default_factory=list)
 
 @dataclass
 class AuthUser:
@@ -79,8 +103,21 @@ class AuthUser:
 
 # Репозитории
 class SoundRepository(IRepository):
-    def __init__(self):
-        self.sounds: List[Sound] = []
+    """Записи звука и ряд частот для анализа.
+
+    Как в SensorDataRepository, хранятся только последние max_records
+    записей и max_values частот; version - число частот за все время,
+    first_version - версия самой старой из хранимых.
+    """
+    def __init__(self, max_values: int = 1000000, max_records: int = 10000):
+        self.sounds = deque(maxlen=max_records)
+        # Частоты подряд в одном буфере: окно для анализа берется срезом без обхода объектов
+        self.frequencies = array('d')
+        self.max_values = max_values
+        self.first_version = 0
+        # Растет с каждым новым значением частоты (для кэша анализа)
+        self.version = 0
+        self.lock = threading.Lock()
     
     def get_by_id(self, id: str) -> Optional[Sound]:
         for sound in self.sounds:
@@ -90,17 +127,43 @@ class SoundRepository(IRepository):
     
     def save(self, item: Sound) -> None:
         self.sounds.append(item)
+        # Нулевая частота - звук не измерялся (текстовая команда)
+        if item.frequency:
+            with self.lock:
+                self.frequencies.append(item.frequency)
+                self.version += 1
+                # Лишнее срезается с запасом в четверть, как в SensorDataRepository
+                excess = len(self.frequencies) - self.max_values
+                if excess > self.max_values // 4:
+                    del self.frequencies[:excess]
+                    self.first_version += excess
     
     def create(self, item: Sound) -> None:
         self.save(item)
     
     def get_all(self) -> List[Sound]:
-        return self.sounds
+        return list(self.sounds)
+    
+    def get_frequency_window(self, size: int) -> array:
+        with self.lock:
+            return self.frequencies[-size:]
+    
+    def get_frequencies_since(self, version: int) -> Tuple[array, int]:
+        """Частоты после версии version и версия, на которой они кончаются.
+        Уже вытесненные частоты пропускаются"""
+        with self.lock:
+            return self.frequencies[max(version - self.first_version, 0):], self.version
 
 class DeviceRepository(IRepository):
     def __init__(self, filename="devices.json"):
         self.filename = filename
-        self.devices: List[Device] = []
+        # Устройства по id в порядке сохранения (O(1) поиск для больших парков)
+        self.devices: Dict[str, Device] = {}
+        # Индексы для фильтров: значение поля -> множество id
+        self.by_status: Dict[str, set] = {}
+        self.by_type: Dict[str, set] = {}
+        # Есть изменения статусов, еще не записанные в файл
+        self.unsaved = False
         self.load_from_file()
     
     def load_from_file(self):
@@ -108,42 +171,88 @@ class DeviceRepository(IRepository):
             try:
                 with open(self.filename, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.devices = [Device(**item) for item in data]
+                    self.devices = {item['id']: Device(**item) for item in data}
             except:
-                self.devices = []
+                self.devices = {}
         else:
-            self.devices = []
+            self.devices = {}
+        self.rebuild_indexes()
+    
+    def rebuild_indexes(self):
+        self.by_status = {}
+        self.by_type = {}
+        for device in self.devices.values():
+            self._index(device)
+    
+    def _index(self, device: Device):
+        self.by_status.setdefault(device.status, set()).add(device.id)
+        self.by_type.setdefault(device.type, set()).add(device.id)
+    
+    def _unindex(self, device: Device):
+        self.by_status.get(device.status, set()).discard(device.id)
+        self.by_type.get(device.type, set()).discard(device.id)
     
     def save_to_file(self):
+        # Поля устройства плоские: vars быстрее глубокого копирования asdict
+        text = json.dumps([vars(device) for device in self.devices.values()], ensure_ascii=False, indent=2)
         with open(self.filename, 'w', encoding='utf-8') as f:
-            json.dump([asdict(device) for device in self.devices], f, ensure_ascii=False, indent=2)
+            f.write(text)
+        self.unsaved = False
     
     def get_by_id(self, id: str) -> Optional[Device]:
-        for device in self.devices:
-            if device.id == id:
-                return device
-        return None
+        return self.devices.get(id)
     
     def save(self, item: Device) -> None:
-        existing = self.get_by_id(item.id)
+        # Сохраненное устройство переносится в конец списка
+        existing = self.devices.pop(item.id, None)
         if existing:
-            self.devices.remove(existing)
-        self.devices.append(item)
+            self._unindex(existing)
+        self.devices[item.id] = item
+        self._index(item)
         self.save_to_file()
     
     def create(self, item: Device) -> None:
         self.save(item)
     
     def delete(self, id: str) -> bool:
-        device = self.get_by_id(id)
+        device = self.devices.pop(id, None)
         if device:
-            self.devices.remove(device)
+            self._unindex(device)
             self.save_to_file()
             return True
         return False
     
     def get_all(self) -> List[Device]:
-        return self.devices
+        return list(self.devices.values())
+    
+    def update_statuses(self, statuses: Dict[str, str], persist: bool = True) -> List[Device]:
+        """Изменить статусы устройств (id -> статус) одной записью файла.
+
+        Устройства остаются на своих местах; неизвестные id и статусы без
+        изменений пропускаются. persist=False откладывает запись файла до
+        следующего вызова с persist=True. Возвращает измененные устройства.
+        """
+        changed = []
+        for device_id, status in statuses.items():
+            device = self.devices.get(device_id)
+            if device is None or device.status == status:
+                continue
+            self.by_status.get(device.status, set()).discard(device_id)
+            device = replace(device, status=status)
+            self.devices[device_id] = device
+            self.by_status.setdefault(status, set()).add(device_id)
+            changed.append(device)
+        if changed:
+            self.unsaved = True
+        if persist and self.unsaved:
+            self.save_to_file()
+        return changed
+    
+    def get_ids_by_status(self, status: str) -> set:
+        return self.by_status.get(status, set())
+    
+    def get_ids_by_type(self, device_type: str) -> set:
+        return self.by_type.get(device_type, set())
 
 class AuthRepository(IRepository):
     def __init__(self, filename="users.json"):
@@ -196,8 +305,20 @@ class AuthRepository(IRepository):
         return None
 
 class SensorDataRepository(IRepository):
-    def __init__(self):
-        self.data: List[SensorData] = []
+    """Записи измерений и ряд значений для анализа.
+
+    Хранятся только последние max_records записей и max_values значений:
+    окна анализа читают хвост ряда, а телеметрия пишет значения без
+    отдельных записей. version - число значений за все время,
+    first_version - версия самого старого из хранимых.
+    """
+    def __init__(self, max_values: int = 1000000, max_records: int = 10000):
+        self.data = deque(maxlen=max_records)
+        self.values = array('d')
+        self.max_values = max_values
+        self.first_version = 0
+        self.version = 0
+        self.lock = threading.Lock()
     
     def get_by_id(self, id: str) -> Optional[SensorData]:
         for item in self.data:
@@ -207,12 +328,36 @@ class SensorDataRepository(IRepository):
     
     def save(self, item: SensorData) -> None:
         self.data.append(item)
+        if item.value is not None:
+            self.save_values([item.value])
     
     def create(self, item: SensorData) -> None:
         self.save(item)
     
+    def save_values(self, values: List[float]) -> None:
+        """Добавить значения в ряд без записей (телеметрия)"""
+        with self.lock:
+            # Значения добавляются до увеличения версии
+            self.values.extend(values)
+            self.version += len(values)
+            # Лишнее срезается с запасом в четверть, чтобы не сдвигать ряд на каждой записи
+            excess = len(self.values) - self.max_values
+            if excess > self.max_values // 4:
+                del self.values[:excess]
+                self.first_version += excess
+    
     def get_all(self) -> List[SensorData]:
-        return self.data
+        return list(self.data)
+    
+    def get_value_window(self, size: int) -> array:
+        with self.lock:
+            return self.values[-size:]
+    
+    def get_values_since(self, version: int) -> Tuple[array, int]:
+        """Значения после версии version и версия, на которой они кончаются.
+        Уже вытесненные значения пропускаются"""
+        with self.lock:
+            return self.values[max(version - self.first_version, 0):], self.version
 
 class RequestRepository(IRepository):
     def __init__(self):
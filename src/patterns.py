@@ -1,21 +1,222 @@
+import copy
+import sys
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Any
-from models import Analysis, Decision
+from collections import deque
+from dataclasses import fields, is_dataclass, replace
+from typing import Any, Deque, Dict, Hashable, List, Tuple
+from models import Analysis, DataWindow, Request
 
 class IAnalysisStrategy(ABC):
     @abstractmethod
     def analyze_data(self, data: List[Any]) -> Analysis:
         pass
+    
+    def analyze_batch(self, batch: List[List[Any]]) -> List[Analysis]:
+        """Анализ нескольких наборов данных за один вызов; стратегии,
+        которым выгодна пакетная обработка, переопределяют этот метод"""
+        return [self.analyze_data(data) for data in batch]
+    
+    def cache_key(self) -> Hashable:
+        """Тождество стратегии для кэша: класс и простые параметры, так что
+        два экземпляра с одинаковыми настройками делят результаты.
+        None - результаты стратегии не кэшируются"""
+        params = tuple(sorted((name, value) for name, value in vars(self).items()
+                              if isinstance(value, (str, int, float, bool, type(None)))))
+        return (type(self).__name__, params)
+    
+    def fingerprint(self, data: List[Any]) -> Hashable:
+        """Дешевый отпечаток входных данных: окна - по имени, версии и длине,
+        запросы - по тексту. Стратегии, которые читают не все данные,
+        сужают отпечаток"""
+        return tuple(data_fingerprint(item) for item in data)
+
+def data_fingerprint(item: Any) -> Hashable:
+    if isinstance(item, DataWindow):
+        return ("window", item.name, item.version, len(item.values))
+    if isinstance(item, Request):
+        return ("request", item.purpose)
+    # Неизвестные данные не сравниваются по содержимому
+    return ("object", id(item))
 
 class MachineLearningStrategy(IAnalysisStrategy):
+    """Классификация намерения текста запроса (Request в данных) локальной
+    моделью intent_model. Модель открывается один раз на процесс; пакет
+    запросов классифицируется одним вызовом predict_batch. Пока модель
+    обучается или без NumPy намерение определяется по глаголу команды."""
+    # Доверие к намерению, найденному по глаголу
+    KEYWORD_CONFIDENCE = 0.75
+    
+    def __init__(self, model_dir: str = None):
+        self.model_dir = model_dir
+    
+    def get_model(self, block: bool = False):
+        # Модуль модели подгружает NumPy - только при первом анализе
+        import intent_model
+        return intent_model.get_model(self.model_dir or intent_model.DEFAULT_MODEL_DIR, block)
+    
     def analyze_data(self, data: List[Any]) -> Analysis:
-        # Реализация анализа через машинное обучение
-        return Analysis(id="ml_1", result="ML Analysis Result", confidence=0.95)
+        return self.analyze_batch([data])[0]
+    
+    def analyze_batch(self, batch: List[List[Any]]) -> List[Analysis]:
+        texts = [self.request_text(data) for data in batch]
+        model = self.get_model()
+        
+        from intents import device_type_of
+        # Пустые тексты в модель не передаются
+        indices = [i for i, text in enumerate(texts) if text]
+        if model is not None:
+            predictions = dict(zip(indices, model.predict_batch([texts[i] for i in indices])))
+        else:
+            predictions = {i: self.keyword_intent(texts[i]) for i in indices}
+        analyses = []
+        for i in range(len(batch)):
+            label, probability = predictions.get(i, (None, 0.0))
+            if label is None:
+                analyses.append(Analysis(id="ml_1", result="Намерение не распознано", confidence=0.0))
+                continue
+            analyses.append(Analysis(id="ml_1", result=f"Намерение: {label}",
+                                     confidence=round(probability, 4), intent=label,
+                                     device_type=device_type_of(texts[i])))
+        return analyses
+    
+    def keyword_intent(self, text: str):
+        """(намерение, доверие) по глаголу команды; (None, 0.0) - глагола нет"""
+        from intents import ACTION_WORDS, normalize
+        words = set(normalize(text).split())
+        for action, verbs in ACTION_WORDS.items():
+            if words.intersection(verbs):
+                return action, self.KEYWORD_CONFIDENCE
+        return None, 0.0
+    
+    def fingerprint(self, data: List[Any]) -> Hashable:
+        # Результат зависит от текста запроса и от того, готова ли модель
+        import intent_model
+        return (self.request_text(data),
+                intent_model.is_loaded(self.model_dir or intent_model.DEFAULT_MODEL_DIR))
+    
+    @staticmethod
+    def request_text(data: List[Any]) -> str:
+        for item in data:
+            if isinstance(item, Request):
+                return item.purpose
+        return ""
 
 class StatisticalAnalysisStrategy(IAnalysisStrategy):
+    """Статистика окон измерений (DataWindow): среднее, разброс, процентили
+    и аномалии по z-оценке относительно скользящего окна. Доверие
+    вычисляется из объема выборки и доли аномалий."""
+    def __init__(self, rolling: int = 60, z_threshold: float = 3.0, use_numpy: bool = True):
+        self.rolling = rolling
+        self.z_threshold = z_threshold
+        self.use_numpy = use_numpy
+    
+    def analyze_data(self, data: List[Any]) -> Analysis:
+        # Модуль статистики подгружает NumPy - только при первом анализе
+        from sensor_statistics import window_stats, confidence
+        stats = [
+            window_stats(window.name, window.values, self.rolling, self.z_threshold, self.use_numpy)
+            for window in data if isinstance(window, DataWindow)
+        ]
+        if not any(item.count for item in stats):
+            return Analysis(id="stat_1", result="Недостаточно данных для статистического анализа",
+                            confidence=0.0)
+        return Analysis(
+            id="stat_1",
+            result="; ".join(item.summary() for item in stats),
+            confidence=round(confidence(stats), 4)
+        )
+    
+    def fingerprint(self, data: List[Any]) -> Hashable:
+        # Запрос на статистику не влияет
+        return tuple(data_fingerprint(item) for item in data if isinstance(item, DataWindow))
+    
+    def analyze_batch(self, batch: List[List[Any]]) -> List[Analysis]:
+        # Запросы одного пакета обычно получают одни и те же окна - считаем их один раз
+        results = {}
+        keys = [tuple(id(item) for item in data if isinstance(item, DataWindow)) for data in batch]
+        for key, data in zip(keys, batch):
+            if key not in results:
+                results[key] = self.analyze_data(data)
+        return [results[key] for key in keys]
+
+class IIncrementalAnalysisStrategy(IAnalysisStrategy):
+    """Стратегия, которая накапливает состояние по мере поступления данных:
+    update получает только новые значения, snapshot выдает анализ по всему
+    полученному без повторного обхода истории"""
+    # Держится вокруг чтения позиции, выборки новых данных и update:
+    # иначе два одновременных вызова учтут одни и те же значения дважды
+    feed_lock: threading.Lock
+    
+    @abstractmethod
+    def update(self, new_items: List[Any]) -> None:
+        pass
+    
+    @abstractmethod
+    def snapshot(self) -> Analysis:
+        pass
+    
+    @abstractmethod
+    def position(self, name: str) -> int:
+        """Версия ряда name, до которой данные уже учтены"""
+        pass
+    
     def analyze_data(self, data: List[Any]) -> Analysis:
-        # Реализация статистического анализа
-        return Analysis(id="stat_1", result="Statistical Analysis Result", confidence=0.88)
+        # Разовый анализ полного набора данных - на свежем состоянии
+        fresh = copy.copy(self)
+        fresh.reset()
+        fresh.update(data)
+        return fresh.snapshot()
+    
+    def reset(self) -> None:
+        pass
+
+class IncrementalStatisticalStrategy(IIncrementalAnalysisStrategy):
+    """Статистика рядов измерений, обновляемая за O(1) на значение: среднее
+    и разброс по Уэлфорду, EWMA, процентили скетчем P² и аномалии по
+    z-оценке относительно скользящего окна"""
+    def __init__(self, rolling: int = 60, z_threshold: float = 3.0, alpha: float = 0.05):
+        self.rolling = rolling
+        self.z_threshold = z_threshold
+        self.alpha = alpha
+        self.reset()
+    
+    def reset(self) -> None:
+        self.streams = {}
+        self.positions = {}
+        self.lock = threading.Lock()
+        self.feed_lock = threading.Lock()
+    
+    def update(self, new_items: List[Any]) -> None:
+        from streaming_statistics import StreamStats
+        with self.lock:
+            for window in new_items:
+                if not isinstance(window, DataWindow):
+                    continue
+                stream = self.streams.get(window.name)
+                if stream is None:
+                    stream = StreamStats(window.name, self.rolling, self.z_threshold, self.alpha)
+                    self.streams[window.name] = stream
+                stream.update(window.values)
+                self.positions[window.name] = window.version
+    
+    def position(self, name: str) -> int:
+        return self.positions.get(name, 0)
+    
+    def snapshot(self) -> Analysis:
+        from sensor_statistics import confidence
+        with self.lock:
+            stats = [stream.snapshot() for stream in self.streams.values()]
+            trends = [f"{stream.name}: EWMA={stream.ewma.mean:.2f}±{stream.ewma.std:.2f}"
+                      for stream in self.streams.values() if stream.ewma.mean is not None]
+        if not any(item.count for item in stats):
+            return Analysis(id="inc_1", result="Недостаточно данных для статистического анализа",
+                            confidence=0.0)
+        return Analysis(
+            id="inc_1",
+            result="; ".join([item.summary() for item in stats] + trends),
+            confidence=round(confidence(stats), 4)
+        )
 
 class ICommand(ABC):
     @abstractmethod
@@ -25,34 +226,142 @@ class ICommand(ABC):
     @abstractmethod
     def undo(self) -> None:
         pass
+    
+    def redo(self) -> None:
+        self.execute()
+    
+    def size(self) -> int:
+        """Примерный объем памяти, занятый командой, в байтах"""
+        return sys.getsizeof(self)
 
-class AnalysisCommand(ICommand):
-    def __init__(self, controller, data: List[Any]):
+class StateCommand(ICommand):
+    """Смена текущего состояния контроллера (анализа, решения, ответа).
+    
+    Результат вычисляет контроллер, команда только устанавливает его и
+    хранит разницу с предыдущим состоянием: для объектов одного класса -
+    изменившиеся поля (старое и новое значение), иначе - оба объекта.
+    Отмена и повтор применяют разницу к текущему состоянию, поэтому
+    работают только в порядке стека истории.
+    """
+    __slots__ = ("controller", "new_state", "changes", "replaced")
+    
+    def __init__(self, controller, new_state: Any):
         self.controller = controller
-        self.data = data
-        self.previous_state = None
+        self.new_state = new_state
+        self.changes = None
+        self.replaced = None
     
     def execute(self) -> None:
-        self.previous_state = self.controller.get_current_state()
-        result = self.controller.perform_analysis(self.data)
-        return result
+        previous = self.controller.get_current_state()
+        new_state = self.new_state
+        if is_dataclass(previous) and type(previous) is type(new_state):
+            self.changes = {item.name: (getattr(previous, item.name), getattr(new_state, item.name))
+                            for item in fields(new_state)
+                            if getattr(previous, item.name) != getattr(new_state, item.name)}
+        else:
+            self.replaced = (previous, new_state)
+        # Новое состояние восстанавливается из разницы - целиком не храним
+        self.new_state = None
+        self.controller.restore_state(new_state)
     
     def undo(self) -> None:
-        if self.previous_state:
-            self.controller.restore_state(self.previous_state)
+        self.apply(0)
+    
+    def redo(self) -> None:
+        self.apply(1)
+    
+    def apply(self, side: int) -> None:
+        if self.replaced is not None:
+            state = self.replaced[side]
+        else:
+            state = replace(self.controller.get_current_state(),
+                            **{name: values[side] for name, values in self.changes.items()})
+        self.controller.restore_state(state)
+    
+    def size(self) -> int:
+        total = sys.getsizeof(self)
+        if self.changes is not None:
+            total += sys.getsizeof(self.changes) + sum(
+                sys.getsizeof(old) + sys.getsizeof(new) for old, new in self.changes.values())
+        else:
+            total += sum(state_size(state) for state in self.replaced)
+        return total
 
-class ResponseCommand(ICommand):
-    def __init__(self, controller, decision: Decision):
-        self.controller = controller
-        self.decision = decision
-        self.previous_response = None
+def state_size(state: Any) -> int:
+    if state is None:
+        return 0
+    if is_dataclass(state):
+        return sys.getsizeof(state) + sum(sys.getsizeof(getattr(state, item.name)) for item in fields(state))
+    return sys.getsizeof(state)
+
+class CommandHistory:
+    """История команд с отменой и повтором.
     
-    def execute(self) -> None:
-        self.previous_response = self.controller.get_last_response()
-        result = self.controller.generate_response(self.decision)
-        return result
+    Хранит не больше capacity команд и не больше max_bytes памяти:
+    при переполнении забываются самые старые. Новая команда очищает
+    стек повтора.
+    """
+    def __init__(self, capacity: int = 100, max_bytes: int = 1 << 20):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.undo_stack: Deque[Tuple[ICommand, int]] = deque()
+        self.redo_stack: List[Tuple[ICommand, int]] = []
+        self.bytes = 0
+        self.evicted = 0
+        self.lock = threading.RLock()
     
-    def undo(self) -> None:
-        if self.previous_response:
-            self.controller.restore_response(self.previous_response)
+    def execute(self, command: ICommand) -> None:
+        with self.lock:
+            command.execute()
+            for _, size in self.redo_stack:
+                self.bytes -= size
+            self.redo_stack.clear()
+            self.push(self.undo_stack, command)
+            self.trim()
+    
+    def undo(self) -> bool:
+        with self.lock:
+            if not self.undo_stack:
+                return False
+            command, size = self.undo_stack.pop()
+            command.undo()
+            self.redo_stack.append((command, size))
+            return True
+    
+    def redo(self) -> bool:
+        with self.lock:
+            if not self.redo_stack:
+                return False
+            command, size = self.redo_stack.pop()
+            command.redo()
+            self.undo_stack.append((command, size))
+            return True
+    
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+    
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+    
+    def clear(self) -> None:
+        with self.lock:
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+            self.bytes = 0
+    
+    def push(self, stack, command: ICommand) -> None:
+        size = command.size()
+        stack.append((command, size))
+        self.bytes += size
+    
+    def trim(self) -> None:
+        while self.undo_stack and (len(self.undo_stack) > self.capacity or self.bytes > self.max_bytes):
+            _, size = self.undo_stack.popleft()
+            self.bytes -= size
+            self.evicted += 1
+    
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {"undo_depth": len(self.undo_stack), "redo_depth": len(self.redo_stack),
+                    "bytes": self.bytes, "evicted": self.evicted}
 
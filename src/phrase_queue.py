@@ -0,0 +1,108 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+# Политики переполнения очереди
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+class PhraseQueue:
+    """Ограниченная очередь распознанных фраз.
+
+    При переполнении отбрасывает самую старую или самую новую фразу,
+    может схлопывать повторы уже ожидающей фразы из того же источника
+    и отбрасывает фразы старше expire_after секунд. Интерфейс get/put/
+    empty/qsize совместим с queue.Queue.
+    """
+    def __init__(self, maxsize: int = 20, policy: str = DROP_OLDEST,
+                 expire_after: Optional[float] = None, coalesce_duplicates: bool = False):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Неизвестная политика переполнения: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.expire_after = expire_after
+        self.coalesce_duplicates = coalesce_duplicates
+        self.items = deque()
+        self.not_empty = threading.Condition()
+
+        # Счетчики потерь
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self.coalesced = 0
+        self.expired = 0
+
+    def put(self, item: Any) -> bool:
+        """Добавить фразу; возвращает False, если фраза была отброшена"""
+        with self.not_empty:
+            self._expire()
+            if self.coalesce_duplicates and self._has_duplicate(item):
+                self.coalesced += 1
+                return False
+            if self.maxsize and len(self.items) >= self.maxsize:
+                if self.policy == DROP_NEWEST:
+                    self.dropped_newest += 1
+                    return False
+                self.items.popleft()
+                self.dropped_oldest += 1
+            self.items.append((time.time(), item))
+            self.not_empty.notify()
+            return True
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        deadline = time.time() + timeout if timeout is not None else None
+        with self.not_empty:
+            while True:
+                self._expire()
+                if self.items:
+                    return self.items.popleft()[1]
+                if not block:
+                    raise queue.Empty
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self.not_empty.wait(remaining)
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        with self.not_empty:
+            self._expire()
+            return len(self.items)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def clear(self) -> None:
+        with self.not_empty:
+            self.items.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.not_empty:
+            self._expire()
+            return {
+                "depth": len(self.items),
+                "maxsize": self.maxsize,
+                "dropped_oldest": self.dropped_oldest,
+                "dropped_newest": self.dropped_newest,
+                "coalesced": self.coalesced,
+                "expired": self.expired
+            }
+
+    def _expire(self) -> None:
+        if not self.expire_after:
+            return
+        limit = time.time() - self.expire_after
+        while self.items and self.items[0][0] < limit:
+            self.items.popleft()
+            self.expired += 1
+
+    def _has_duplicate(self, item: Any) -> bool:
+        key = (getattr(item, "text", item), getattr(item, "source", None))
+        for _, queued in self.items:
+            if (getattr(queued, "text", queued), getattr(queued, "source", None)) == key:
+                return True
+        return False
@@ -0,0 +1,212 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, Dict, List, Mapping, Optional
+
+from models import Sound, SensorData
+
+# Маркер остановки рабочих потоков ступени
+STOP = object()
+
+def create_command_request(request_controller, text: str, source: str):
+    """Запрос для текстовой или голосовой команды: звук и данные датчика - служебные"""
+    now = datetime.now()
+    return request_controller.create_request(
+        Sound(id=int(now.timestamp() * 1000), frequency=0, noise_level="unknown"),
+        SensorData(id=f"cmd_{now.timestamp()}", timestamp=now.isoformat(), purpose=source),
+        purpose=text
+    )
+
+class PipelineJob:
+    """Команда, проходящая через ступени конвейера"""
+    __slots__ = ("text", "source", "request", "analysis", "decision", "response",
+                 "future", "submitted_at")
+
+    def __init__(self, text: str, source: str):
+        self.text = text
+        self.source = source
+        self.request = None
+        self.analysis = None
+        self.decision = None
+        self.response = None
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+
+class PipelineStage:
+    """Ступень конвейера: workers потоков читают входную очередь и пишут в выходную.
+
+    handler получает список заданий (пакет до batch_size штук, собранный
+    не дольше batch_wait секунд) и дополняет их результатами.
+    """
+    def __init__(self, name: str, handler: Callable[[List[PipelineJob]], None],
+                 input_queue: queue.Queue, output_queue: Optional[queue.Queue],
+                 workers: int = 1, batch_size: int = 1, batch_wait: float = 0.0):
+        self.name = name
+        self.handler = handler
+        self.input = input_queue
+        self.output = output_queue
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.threads: List[threading.Thread] = []
+        self.lock = threading.Lock()
+
+        # Метрики
+        self.processed = 0
+        self.failed = 0
+        self.batches = 0
+        self.busy_time = 0.0
+        self.max_depth = 0
+        self.started_at = None
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self) -> None:
+        """Дождаться обработки всего, что уже в очереди, и остановить потоки"""
+        for _ in self.threads:
+            self.input.put(STOP)
+        for thread in self.threads:
+            thread.join()
+        self.threads.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        with self.lock:
+            elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+            return {
+                "processed": self.processed,
+                "failed": self.failed,
+                "queue_depth": self.input.qsize(),
+                "max_queue_depth": self.max_depth,
+                "avg_batch": self.processed / self.batches if self.batches else 0.0,
+                "throughput_per_s": self.processed / elapsed if elapsed else 0.0,
+                "utilization": self.busy_time / (elapsed * self.workers) if elapsed else 0.0
+            }
+
+    def _run(self) -> None:
+        while True:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._process(batch)
+            if stopping:
+                return
+
+    def _next_batch(self):
+        item = self.input.get()
+        if item is STOP:
+            return [], True
+        depth = self.input.qsize() + 1
+        batch = [item]
+        deadline = time.perf_counter() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self.input.get(timeout=timeout) if timeout > 0 else self.input.get_nowait()
+            except queue.Empty:
+                break
+            if item is STOP:
+                return batch, True
+            batch.append(item)
+        with self.lock:
+            self.max_depth = max(self.max_depth, depth)
+        return batch, False
+
+    def _process(self, batch: List[PipelineJob]) -> None:
+        started = time.perf_counter()
+        try:
+            self.handler(batch)
+        except Exception as e:
+            for job in batch:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            with self.lock:
+                self.failed += len(batch)
+                self.busy_time += time.perf_counter() - started
+            return
+        with self.lock:
+            self.processed += len(batch)
+            self.batches += 1
+            self.busy_time += time.perf_counter() - started
+        if self.output is not None:
+            for job in batch:
+                # Ограниченная очередь: медленная следующая ступень притормаживает эту
+                self.output.put(job)
+
+class RequestPipeline:
+    """Конвейер запрос -> анализ -> решение -> ответ.
+
+    Ступени работают одновременно и связаны ограниченными очередями,
+    поэтому в работе может находиться много команд сразу, а переполнение
+    доходит до submit в виде ожидания. Запросы поступают в стратегию
+    анализа пакетами до analysis_batch штук.
+    """
+    def __init__(self, controllers: Mapping, queue_size: int = 64, analysis_batch: int = 16,
+                 batch_wait: float = 0.002, analysis_workers: int = 2):
+        self.controllers = controllers
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in range(4)]
+        self.stages = [
+            PipelineStage("request", self._create_requests, self.queues[0], self.queues[1]),
+            PipelineStage("analysis", self._analyze, self.queues[1], self.queues[2],
+                          workers=analysis_workers, batch_size=analysis_batch, batch_wait=batch_wait),
+            PipelineStage("decision", self._decide, self.queues[2], self.queues[3]),
+            PipelineStage("response", self._respond, self.queues[3], None)
+        ]
+        self.running = False
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.running = True
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self) -> None:
+        """Остановить ступени по порядку, доведя начатые команды до ответа"""
+        if not self.running:
+            return
+        self.running = False
+        for stage in self.stages:
+            stage.stop()
+
+    def submit(self, text: str, source: str = "text", timeout: Optional[float] = None) -> Optional[Future]:
+        """Поставить команду в конвейер; Future завершится ответом (Response).
+
+        None - входная очередь не освободилась за timeout секунд.
+        """
+        job = PipelineJob(text, source)
+        try:
+            self.queues[0].put(job, timeout=timeout)
+        except queue.Full:
+            return None
+        return job.future
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        return {stage.name: stage.get_stats() for stage in self.stages}
+
+    def _create_requests(self, batch: List[PipelineJob]) -> None:
+        controller = self.controllers['request']
+        for job in batch:
+            job.request = create_command_request(controller, job.text, job.source)
+
+    def _analyze(self, batch: List[PipelineJob]) -> None:
+        analyses = self.controllers['analysis'].perform_analysis_batch([job.request for job in batch])
+        for job, analysis in zip(batch, analyses):
+            job.analysis = analysis
+
+    def _decide(self, batch: List[PipelineJob]) -> None:
+        controller = self.controllers['decision']
+        for job in batch:
+            job.decision = controller.make_decision(job.analysis)
+
+    def _respond(self, batch: List[PipelineJob]) -> None:
+        controller = self.controllers['response']
+        for job in batch:
+            job.response = controller.generate_response(job.decision)
+            if not job.future.cancelled():
+                job.future.set_result(job.response)
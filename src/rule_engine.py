@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import Analysis
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RULES = os.path.join(MODULE_DIR, "rules.json")
+# Условие "любое значение" в ключе таблицы
+ANY = "*"
+
+@dataclass
+class Rule:
+    """Правило: если намерение, тип устройства, время суток и доверие
+    подходят - решение message (шаблон с полями {intent}, {device_type},
+    {result}, {confidence})"""
+    id: str
+    message: str
+    # Допустимые значения; пусто - любое
+    intents: Tuple[str, ...] = ()
+    device_types: Tuple[str, ...] = ()
+    # Минуты от полуночи [начало, конец); конец меньше начала - интервал через полночь
+    time_from: Optional[int] = None
+    time_to: Optional[int] = None
+    min_confidence: float = 0.0
+    # Верхняя граница доверия (не включая) - для правил на неуверенное распознавание
+    max_confidence: Optional[float] = None
+    priority: int = 0
+    # Порядок в файле: из правил одного приоритета срабатывает раньше записанное
+    order: int = 0
+    rank: Tuple[int, int] = field(init=False)
+
+    def __post_init__(self):
+        self.rank = (-self.priority, self.order)
+
+    def hours(self) -> List[int]:
+        """Часы, которые задевает интервал времени правила"""
+        if self.time_from is None:
+            return list(range(24))
+        start, end = self.time_from // 60, (self.time_to - 1) // 60
+        if self.time_to > self.time_from:
+            return list(range(start, end + 1))
+        return sorted(set(range(start, 24)) | set(range(0, end + 1)))
+
+    def matches(self, minute: int, confidence: float) -> bool:
+        if confidence < self.min_confidence:
+            return False
+        if self.max_confidence is not None and confidence >= self.max_confidence:
+            return False
+        if self.time_from is None:
+            return True
+        if self.time_from < self.time_to:
+            return self.time_from <= minute < self.time_to
+        return minute >= self.time_from or minute < self.time_to
+
+def parse_time(value: str) -> int:
+    hours, minutes = value.split(":")
+    minute = int(hours) * 60 + int(minutes)
+    if not 0 <= minute <= 24 * 60:
+        raise ValueError(f"Неверное время: {value}")
+    return minute
+
+def parse_values(value: Any) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(str(item) for item in value)
+
+def parse_rule(item: Dict[str, Any], order: int) -> Rule:
+    """Правило из записи файла:
+    {"id": ..., "when": {"intent", "device_type" (значение или список),
+     "time": "22:00-06:00", "min_confidence", "max_confidence"},
+     "then": {"message": ...}, "priority": 0}"""
+    when = item.get("when", {})
+    max_confidence = when.get("max_confidence")
+    rule = Rule(
+        id=str(item["id"]),
+        message=item["then"]["message"],
+        intents=parse_values(when.get("intent")),
+        device_types=parse_values(when.get("device_type")),
+        min_confidence=float(when.get("min_confidence", 0.0)),
+        max_confidence=float(max_confidence) if max_confidence is not None else None,
+        priority=int(item.get("priority", 0)),
+        order=order
+    )
+    if "time" in when:
+        start, end = when["time"].split("-")
+        rule.time_from, rule.time_to = parse_time(start), parse_time(end)
+        if rule.time_from == rule.time_to:
+            raise ValueError("пустой интервал времени")
+    return rule
+
+class RuleSet:
+    """Скомпилированные правила: таблица (намерение, тип устройства, час) ->
+    правила по убыванию приоритета.
+
+    Решение просматривает не больше четырех списков (точные значения и
+    "любое" для намерения и типа) и только правила нужного часа, поэтому
+    цена не растет с общим числом правил.
+    """
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+        table: Dict[Tuple[str, str, int], List[Rule]] = {}
+        for rule in rules:
+            hours = rule.hours()
+            for intent in rule.intents or (ANY,):
+                for device_type in rule.device_types or (ANY,):
+                    for hour in hours:
+                        table.setdefault((intent, device_type, hour), []).append(rule)
+        for bucket in table.values():
+            bucket.sort(key=lambda rule: rule.rank)
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, intent: Optional[str], device_type: Optional[str],
+              minute: int, confidence: float) -> Optional[Rule]:
+        hour = minute // 60
+        intents = (intent, ANY) if intent else (ANY,)
+        device_types = (device_type, ANY) if device_type else (ANY,)
+        best = None
+        for intent_key in intents:
+            for type_key in device_types:
+                for rule in self.table.get((intent_key, type_key, hour), ()):
+                    if best is not None and rule.rank >= best.rank:
+                        break
+                    if rule.matches(minute, confidence):
+                        best = rule
+                        break
+        return best
+
+class RuleEngine:
+    """Правила принятия решений из JSON-файла с перезагрузкой на лету.
+
+    Файл проверяется не чаще раза в check_interval секунд; измененный
+    файл компилируется заново и заменяет правила целиком. Файл с ошибкой
+    не применяется - остаются прежние правила.
+    """
+    def __init__(self, path: str = DEFAULT_RULES, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.rules = RuleSet([])
+        self.signature = None
+        self.last_check = 0.0
+        self.last_error: Optional[str] = None
+        self.reloads = 0
+        self.lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> bool:
+        """Перечитать файл, если он изменился; True - правила заменены"""
+        with self.lock:
+            self.last_check = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                return False
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self.signature:
+                return False
+            self.signature = signature
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                rules = RuleSet([parse_rule(item, order) for order, item in enumerate(data["rules"])])
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.last_error = str(e)
+                print(f"Ошибка в файле правил {self.path}: {e}")
+                return False
+            # Замена одной ссылкой: идущие проверки дорабатывают со старыми правилами
+            self.rules = rules
+            self.last_error = None
+            self.reloads += 1
+            return True
+
+    def evaluate(self, analysis: Analysis, now: datetime = None) -> Optional[Tuple[Rule, str]]:
+        """Первое подходящее правило и текст решения; None - ни одно не подошло"""
+        if time.monotonic() - self.last_check >= self.check_interval:
+            self.reload()
+        now = now or datetime.now()
+        rule = self.rules.match(analysis.intent, analysis.device_type,
+                                now.hour * 60 + now.minute, analysis.confidence)
+        if rule is None:
+            return None
+        facts = {"intent": analysis.intent or "", "device_type": analysis.device_type or "устройство",
+                 "result": analysis.result, "confidence": analysis.confidence}
+        try:
+            return rule, rule.message.format_map(facts)
+        except (KeyError, ValueError, IndexError):
+            return rule, rule.message
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"rules": len(self.rules), "buckets": len(self.rules.table),
+                "reloads": self.reloads, "last_error": self.last_error}
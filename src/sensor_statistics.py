@@ -0,0 +1,122 @@
+import math
+import statistics
+from dataclasses import dataclass
+from typing import Dict, Sequence
+
+# NumPy необязателен: без него статистика считается на чистом Python
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def numpy_available() -> bool:
+    return np is not None
+
+@dataclass
+class WindowStats:
+    name: str
+    count: int
+    mean: float = 0.0
+    std: float = 0.0
+    p5: float = 0.0
+    p50: float = 0.0
+    p95: float = 0.0
+    # Сколько значений проверено на аномалию (у первых rolling нет истории)
+    checked: int = 0
+    anomalies: int = 0
+    last_z: float = 0.0
+
+    @property
+    def anomaly_ratio(self) -> float:
+        return self.anomalies / self.checked if self.checked else 0.0
+
+    def summary(self) -> str:
+        if not self.count:
+            return f"{self.name}: нет данных"
+        return (f"{self.name}: n={self.count}, среднее={self.mean:.2f}, σ={self.std:.2f}, "
+                f"p5/p50/p95={self.p5:.2f}/{self.p50:.2f}/{self.p95:.2f}, "
+                f"аномалий={self.anomalies} ({self.anomaly_ratio:.1%})")
+
+def window_stats(name: str, values: Sequence[float], rolling: int = 60,
+                 z_threshold: float = 3.0, use_numpy: bool = True) -> WindowStats:
+    """Статистика окна и аномалии по z-оценке относительно скользящего окна
+    из rolling предыдущих значений"""
+    if use_numpy and np is not None:
+        return _window_stats_numpy(name, values, rolling, z_threshold)
+    return _window_stats_python(name, values, rolling, z_threshold)
+
+def _window_stats_numpy(name, values, rolling, z_threshold) -> WindowStats:
+    # array('d') читается через протокол буфера, без поэлементного преобразования
+    x = np.asarray(values, dtype=np.float64)
+    count = x.size
+    if not count:
+        return WindowStats(name, 0)
+    p5, p50, p95 = np.percentile(x, [5, 50, 95])
+    result = WindowStats(name, int(count), float(x.mean()), float(x.std()), float(p5), float(p50), float(p95))
+    if count <= rolling:
+        return result
+
+    # Скользящие сумма и сумма квадратов через накопленные суммы: O(n) для любого окна.
+    # Значение i сравнивается со статистикой окна [i - rolling, i)
+    shifted = x - result.mean  # центрирование уменьшает потерю точности в суммах квадратов
+    sums = np.concatenate(([0.0], np.cumsum(shifted)))
+    squares = np.concatenate(([0.0], np.cumsum(shifted * shifted)))
+    window_sum = sums[rolling:-1] - sums[:-rolling - 1]
+    window_squares = squares[rolling:-1] - squares[:-rolling - 1]
+    rolling_mean = window_sum / rolling
+    rolling_var = np.maximum(window_squares / rolling - rolling_mean * rolling_mean, 0.0)
+    rolling_std = np.sqrt(rolling_var)
+
+    current = shifted[rolling:]
+    result.checked = int(current.size)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(rolling_std > 0, (current - rolling_mean) / rolling_std, 0.0)
+    result.anomalies = int(np.count_nonzero(np.abs(z) > z_threshold))
+    result.last_z = float(z[-1])
+    return result
+
+def _window_stats_python(name, values, rolling, z_threshold) -> WindowStats:
+    x = list(values)
+    count = len(x)
+    if not count:
+        return WindowStats(name, 0)
+    ordered = sorted(x)
+
+    def percentile(p):
+        position = (count - 1) * p / 100
+        low = math.floor(position)
+        high = min(low + 1, count - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    result = WindowStats(name, count, statistics.fmean(x), statistics.pstdev(x),
+                         percentile(5), percentile(50), percentile(95))
+    if count <= rolling:
+        return result
+
+    result.checked = count - rolling
+    x = [value - result.mean for value in x]
+    window_sum = sum(x[:rolling])
+    window_squares = sum(v * v for v in x[:rolling])
+    z = 0.0
+    for i in range(rolling, count):
+        mean = window_sum / rolling
+        std = math.sqrt(max(window_squares / rolling - mean * mean, 0.0))
+        z = (x[i] - mean) / std if std > 0 else 0.0
+        if abs(z) > z_threshold:
+            result.anomalies += 1
+        old = x[i - rolling]
+        window_sum += x[i] - old
+        window_squares += x[i] * x[i] - old * old
+    result.last_z = z
+    return result
+
+def confidence(stats: Sequence[WindowStats]) -> float:
+    """Доверие к анализу: растет с объемом выборки и падает с долей аномалий"""
+    measured = [item for item in stats if item.count]
+    if not measured:
+        return 0.0
+    return min((1 - 1 / math.sqrt(item.count + 1)) * (1 - item.anomaly_ratio) for item in measured)
+
+def stats_to_dict(stats: WindowStats) -> Dict[str, float]:
+    return {key: getattr(stats, key)
+            for key in ("count", "mean", "std", "p5", "p50", "p95", "checked", "anomalies", "last_z")}
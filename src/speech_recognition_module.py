@@ -1,27 +1,71 @@
 import threading
 import queue
 import time
-from typing import List, Any, Optional
-from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Dict
 
-# Импорты для распознавания речи
-try:
-    import speech_recognition as sr
-    SPEECH_RECOGNITION_AVAILABLE = True
-except ImportError:
-    SPEECH_RECOGNITION_AVAILABLE = False
-    print("Предупреждение: speech_recognition не установлен. Установите: pip install SpeechRecognition")
+from controllers import IController, EventPublisher
+from event_bus import SPEECH, SYNC
+from audio_sources import (
+    AudioClip, IAudioSource, IRecognizer, MicrophoneSource, GoogleRecognizer,
+    load_speech_recognition
+)
+from keyword_spotting import IKeywordSpotter, SphinxKeywordSpotter, WakeWordGate
+from phrase_queue import PhraseQueue, DROP_OLDEST
 
-from controllers import IController, IView
+# Распознанная фраза с указанием источника
+@dataclass
+class RecognizedPhrase:
+    text: str
+    source: str
+    captured_at: float
+    recognized_at: float
 
-# Контроллер для распознавания речи (только Google Speech API)
-class SpeechRecognitionController(IController):
-    """Контроллер управления распознаванием речи"""
-    def __init__(self):
-        self.is_listening = False
-        self.audio_queue = queue.Queue()
-        self.views: List[IView] = []
-        self.microphone = None
+# Контроллер для распознавания речи
+class SpeechRecognitionController(EventPublisher, IController):
+    """Контроллер управления распознаванием речи.
+
+    Каждый именованный источник аудио слушается в своем потоке захвата,
+    а распознавание выполняет общий ограниченный пул потоков.
+    """
+    DEFAULT_SOURCE = "default"
+    topic = SPEECH
+    # Подписчики (SpeechEventBridge) сами передают фразы в поток интерфейса
+    default_delivery = SYNC
+    
+    def __init__(self, source_factory=None, recognizer: Optional[IRecognizer] = None,
+                 pool_size: int = 2, max_pending: int = 8):
+        # Ограниченная очередь: устаревшие команды не должны выполняться с опозданием
+        self.audio_queue = PhraseQueue(maxsize=20, policy=DROP_OLDEST, expire_after=30.0)
+        
+        # Источник аудио и распознаватель (по умолчанию микрофон и Google Speech API)
+        self.source_factory = source_factory
+        self.recognizer = recognizer
+        
+        # Именованные источники и их потоки захвата
+        self.sources: Dict[str, IAudioSource] = {}
+        self.listen_threads: Dict[str, threading.Thread] = {}
+        self.active_sources = set()
+        
+        # Общий пул распознавания
+        self.pool_size = pool_size
+        self.max_pending = max_pending
+        self.submit_timeout = 1.0
+        self.pool: Optional[ThreadPoolExecutor] = None
+        # Сколько ждать завершения прежнего потока захвата при повторном запуске
+        # (start_listening вызывается из обработчиков интерфейса)
+        self.restart_timeout = 0.5
+        # Запуск и завершение потоков захвата, создание и закрытие пула
+        self.threads_lock = threading.Lock()
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.pending_count = 0
+        self.pending_by_source: Dict[str, int] = {}
+        self.pending_lock = threading.Condition()
+        self.dropped_clips = 0
+        
+        # Необязательный локальный фильтр по ключевой фразе
+        self.wake_gate: Optional[WakeWordGate] = None
         
         # Параметры распознавания
         self.energy_threshold = 300  # Порог энергии для обнаружения речи
@@ -30,105 +74,250 @@ class SpeechRecognitionController(IController):
         
         # История распознанных фраз
         self.recognition_history = []
+        self.history_limit = 50
+        self.history_lock = threading.Lock()
     
-    def start_listening(self, timeout=None):
-        """Начать прослушивание микрофона в отдельном потоке"""
-        if self.is_listening:
+    @property
+    def is_listening(self) -> bool:
+        return bool(self.active_sources)
+    
+    def add_source(self, name: str, source: IAudioSource) -> None:
+        """Зарегистрировать именованный источник аудио (например, микрофон комнаты)"""
+        self.sources[name] = source
+    
+    def remove_source(self, name: str) -> None:
+        self.stop_listening(name)
+        self.sources.pop(name, None)
+    
+    def start_listening(self, timeout=None, source: Optional[IAudioSource] = None,
+                        name: str = DEFAULT_SOURCE):
+        """Начать прослушивание источника аудио в отдельном потоке"""
+        if name in self.active_sources:
             return False
         
-        if not SPEECH_RECOGNITION_AVAILABLE:
-            return False
+        if source is None:
+            source = self.sources.get(name) or self.create_source()
+            if source is None:
+                return False
+        self.sources[name] = source
         
-        self.is_listening = True
+        # Поток после stop_listening еще может дослушивать фразу: ждем его
+        # недолго, чтобы источник не читали два потока сразу
+        previous = self.listen_threads.get(name)
+        if previous is not None and previous is not threading.current_thread():
+            previous.join(self.restart_timeout)
+            if previous.is_alive():
+                print(f"Источник {name} еще останавливается, повторите запуск позже")
+                return False
         
-        # Запускаем поток для прослушивания
-        thread = threading.Thread(target=self._listen_loop, args=(timeout,))
-        thread.daemon = True
-        thread.start()
+        with self.threads_lock:
+            if name in self.active_sources:
+                return False
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.pool_size,
+                                               thread_name_prefix="speech-recognition")
+            
+            self.active_sources.add(name)
+            
+            # Запускаем поток захвата для источника
+            thread = threading.Thread(target=self._listen_loop, args=(timeout, source, name),
+                                      name=f"speech-capture-{name}")
+            thread.daemon = True
+            self.listen_threads[name] = thread
+            thread.start()
         
         return True
     
-    def stop_listening(self):
-        """Остановить прослушивание"""
-        self.is_listening = False
+    def start_all(self, timeout=None) -> None:
+        """Запустить прослушивание всех зарегистрированных источников"""
+        for name, source in list(self.sources.items()):
+            self.start_listening(timeout, source, name)
     
-    def _listen_loop(self, timeout=None):
-        """Цикл прослушивания микрофона"""
-        if not SPEECH_RECOGNITION_AVAILABLE:
-            return
-        
-        recognizer = sr.Recognizer()
-        recognizer.energy_threshold = self.energy_threshold
-        recognizer.pause_threshold = self.pause_threshold
+    def create_source(self) -> Optional[IAudioSource]:
+        """Создать источник аудио по умолчанию"""
+        if self.source_factory:
+            return self.source_factory()
+        if load_speech_recognition() is None:
+            print("Предупреждение: speech_recognition не установлен. Установите: pip install SpeechRecognition")
+            return None
+        return MicrophoneSource(
+            energy_threshold=self.energy_threshold,
+            pause_threshold=self.pause_threshold
+        )
+    
+    def wait_until_stopped(self, timeout=None) -> bool:
+        """Дождаться завершения потоков захвата и распознавания всех поставленных фраз"""
+        deadline = time.time() + timeout if timeout is not None else None
+        for thread in list(self.listen_threads.values()):
+            thread.join(None if deadline is None else max(0, deadline - time.time()))
+            if thread.is_alive():
+                return False
         
+        remaining = None if deadline is None else max(0, deadline - time.time())
+        return self._wait_pending(timeout=remaining)
+    
+    def stop_listening(self, name: Optional[str] = None):
+        """Остановить прослушивание одного источника или всех.
+
+        Пул распознавания закрывается, когда завершится последний поток захвата.
+        """
+        if name is None:
+            self.active_sources.clear()
+        else:
+            self.active_sources.discard(name)
+    
+    def shutdown(self, timeout=None) -> bool:
+        """Остановить все источники и дождаться потоков захвата и распознавания
+        (при выходе из приложения)"""
+        self.stop_listening()
+        stopped = self.wait_until_stopped(timeout)
+        self._release_pool()
+        return stopped
+    
+    def _release_pool(self) -> None:
+        """Закрыть пул, если не осталось потоков захвата; уже поставленные
+        фразы распознаются до конца"""
+        with self.threads_lock:
+            if self.pool is not None and not self.listen_threads and not self.active_sources:
+                self.pool.shutdown(wait=False)
+                self.pool = None
+    
+    def _listen_loop(self, timeout=None, source: IAudioSource = None, name: str = DEFAULT_SOURCE):
+        """Цикл захвата аудио одного источника (калибровка выполняется при открытии)"""
         try:
-            with sr.Microphone() as source:
-                self.microphone = source
-                recognizer.adjust_for_ambient_noise(source)
+            source.open()
+            
+            start_time = time.time()
+            while name in self.active_sources and not source.exhausted:
+                if timeout and time.time() - start_time > timeout:
+                    break
                 
-                start_time = time.time()
-                while self.is_listening:
-                    if timeout and time.time() - start_time > timeout:
-                        break
-                    
-                    try:
-                        audio = recognizer.listen(
-                            source, 
-                            phrase_time_limit=self.phrase_time_limit,
-                            timeout=1
-                        )
-                        
-                        # Распознаем речь через Google Speech API
-                        text = self.recognize_audio(audio)
-                        if text:
-                            self.recognition_history.append({
-                                "timestamp": time.time(),
-                                "text": text
-                            })
-                            
-                            # Ограничиваем историю
-                            if len(self.recognition_history) > 50:
-                                self.recognition_history.pop(0)
-                            
-                            self.audio_queue.put(text)
-                    
-                    except sr.WaitTimeoutError:
+                try:
+                    clip = source.listen(timeout=1, phrase_time_limit=self.phrase_time_limit)
+                    if clip is None:
                         continue
-                    except Exception as e:
-                        print(f"Ошибка при прослушивании: {e}")
+                    if self.wake_gate and not self.wake_gate.accept(clip, name):
+                        continue
+                    self._submit(clip, name)
+                
+                except Exception as e:
+                    print(f"Ошибка при прослушивании ({name}): {e}")
         
         except Exception as e:
-            print(f"Ошибка микрофона: {e}")
+            print(f"Ошибка микрофона ({name}): {e}")
         
         finally:
-            self.is_listening = False
-            self.microphone = None
+            # Ждем распознавания своих фраз, чтобы запись сессии получила расшифровки
+            self._wait_pending(name)
+            try:
+                source.close()
+            except Exception as e:
+                print(f"Ошибка закрытия источника аудио ({name}): {e}")
+            with self.threads_lock:
+                if self.listen_threads.get(name) is threading.current_thread():
+                    del self.listen_threads[name]
+                    self.active_sources.discard(name)
+            self._release_pool()
+    
+    def _submit(self, clip: AudioClip, name: str) -> None:
+        """Передать фразу в пул распознавания; при переполнении фраза отбрасывается"""
+        if not self.pending.acquire(timeout=self.submit_timeout):
+            self.dropped_clips += 1
+            return
+        with self.pending_lock:
+            self.pending_count += 1
+            self.pending_by_source[name] = self.pending_by_source.get(name, 0) + 1
+        self.pool.submit(self._recognize_clip, clip, name)
+    
+    def _recognize_clip(self, clip: AudioClip, name: str) -> None:
+        try:
+            text = self.recognize_audio(clip)
+            # Расшифровка сохраняется в записи сессии
+            clip.transcript = text
+            if text:
+                recognized_at = time.time()
+                with self.history_lock:
+                    self.recognition_history.append({
+                        "timestamp": recognized_at,
+                        "text": text,
+                        "source": name,
+                        "captured_at": clip.captured_at,
+                        "latency": recognized_at - clip.captured_at if clip.captured_at else 0.0
+                    })
+                    
+                    # Ограничиваем историю
+                    if self.history_limit and len(self.recognition_history) > self.history_limit:
+                        self.recognition_history.pop(0)
+                
+                if self.audio_queue.put(RecognizedPhrase(text, name, clip.captured_at, recognized_at)):
+                    self.notify_views({"type": "phrase_recognized", "source": name})
+        finally:
+            self.pending.release()
+            with self.pending_lock:
+                self.pending_count -= 1
+                self.pending_by_source[name] -= 1
+                self.pending_lock.notify_all()
+    
+    def _wait_pending(self, name: Optional[str] = None, timeout=None) -> bool:
+        """Дождаться распознавания фраз источника (или всех источников)"""
+        deadline = time.time() + timeout if timeout is not None else None
+        with self.pending_lock:
+            while (self.pending_by_source.get(name, 0) if name else self.pending_count):
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.pending_lock.wait(remaining)
+        return True
     
     def recognize_audio(self, audio_data) -> str:
-        """Распознать аудио данные через Google Speech API"""
-        if not SPEECH_RECOGNITION_AVAILABLE:
-            return ""
+        """Распознать аудио данные (по умолчанию через Google Speech API)"""
+        if not isinstance(audio_data, AudioClip):
+            # sr.AudioData от внешнего кода
+            audio_data = AudioClip(audio_data.frame_data, audio_data.sample_rate, audio_data.sample_width)
+        
+        sr = load_speech_recognition()
+        recognizer = self.recognizer
+        if recognizer is None:
+            if sr is None:
+                return ""
+            recognizer = self.recognizer = GoogleRecognizer()
         
         try:
-            recognizer = sr.Recognizer()
-            text = recognizer.recognize_google(audio_data, language="ru-RU")
-            return text
-        except sr.UnknownValueError:
-            return ""
-        except sr.RequestError as e:
-            print(f"Ошибка Google Speech API: {e}")
-            return ""
+            return recognizer.recognize(audio_data) or ""
         except Exception as e:
+            if sr is not None and isinstance(e, sr.UnknownValueError):
+                return ""
+            if sr is not None and isinstance(e, sr.RequestError):
+                print(f"Ошибка Google Speech API: {e}")
+                return ""
             print(f"Ошибка распознавания: {e}")
             return ""
     
-    def get_next_phrase(self, timeout=1):
-        """Получить следующую распознанную фразу"""
+    def get_next_result(self, timeout=1) -> Optional[RecognizedPhrase]:
+        """Получить следующую распознанную фразу вместе с источником"""
         try:
             return self.audio_queue.get(timeout=timeout)
         except queue.Empty:
             return None
     
+    def get_next_phrase(self, timeout=1):
+        """Получить следующую распознанную фразу"""
+        result = self.get_next_result(timeout)
+        return result.text if result else None
+    
+    def configure_queue(self, maxsize: int = 20, policy: str = DROP_OLDEST,
+                        expire_after: Optional[float] = 30.0, coalesce_duplicates: bool = False) -> None:
+        """Настроить размер и политику переполнения очереди фраз"""
+        self.audio_queue = PhraseQueue(maxsize, policy, expire_after, coalesce_duplicates)
+    
+    def get_queue_depth(self) -> int:
+        """Текущее число ожидающих обработки фраз"""
+        return self.audio_queue.qsize()
+    
+    def get_queue_stats(self) -> dict:
+        """Глубина очереди и счетчики отброшенных фраз"""
+        return self.audio_queue.get_stats()
+    
     def get_recognition_history(self, limit=10):
         """Получить историю распознавания"""
         return self.recognition_history[-limit:] if self.recognition_history else []
@@ -146,13 +335,15 @@ class SpeechRecognitionController(IController):
         if phrase_time_limit is not None:
             self.phrase_time_limit = phrase_time_limit
     
-    def add_view(self, view: IView) -> None:
-        self.views.append(view)
-    
-    def notify_views(self, data: Any) -> None:
-        for view in self.views:
-            view.update(data)
+    def set_wake_word(self, wake_phrase: Optional[str], spotter: Optional[IKeywordSpotter] = None,
+                      window: float = 5.0) -> None:
+        """Включить фильтр по ключевой фразе (None - отключить)"""
+        if not wake_phrase:
+            self.wake_gate = None
+            return
+        self.wake_gate = WakeWordGate(spotter or SphinxKeywordSpotter(wake_phrase), window)
     
-    def update_view(self, data: Any) -> None:
-        self.notify_views(data)
+    def get_wake_stats(self) -> dict:
+        """Метрики фильтра: сколько вызовов распознавания удалось избежать"""
+        return self.wake_gate.get_stats() if self.wake_gate else {}
 
@@ -0,0 +1,177 @@
+import math
+from collections import deque
+from typing import Iterable, List
+
+from sensor_statistics import WindowStats
+
+class RunningStats:
+    """Среднее и дисперсия по алгоритму Уэлфорда: O(1) на значение без потери точности"""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+class Ewma:
+    """Экспоненциально взвешенные среднее и разброс: alpha - вес нового значения"""
+    def __init__(self, alpha: float = 0.05):
+        self.alpha = alpha
+        self.mean = None
+        self.var = 0.0
+
+    def add(self, value: float) -> None:
+        if self.mean is None:
+            self.mean = value
+            return
+        delta = value - self.mean
+        increment = self.alpha * delta
+        self.mean += increment
+        self.var = (1 - self.alpha) * (self.var + delta * increment)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+class QuantileSketch:
+    """Потоковая оценка квантиля p алгоритмом P² (Jain, Chlamtac): пять
+    маркеров, O(1) памяти и времени на значение. Первые exact_limit
+    значений хранятся целиком - на коротких рядах квантиль точный."""
+    def __init__(self, p: float, exact_limit: int = 512):
+        self.p = p
+        self.exact_limit = max(exact_limit, 5)
+        self.buffer: List[float] = []
+        self.heights: List[float] = []
+        self.positions: List[int] = []
+        self.desired: List[float] = []
+        self.increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, value: float) -> None:
+        if not self.heights:
+            self.buffer.append(value)
+            if len(self.buffer) > self.exact_limit:
+                self.start_markers()
+            return
+
+        q = self.heights
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= q[k + 1]:
+                k += 1
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = self.desired
+        for i in range(5):
+            desired[i] += self.increments[i]
+
+        # Средние маркеры сдвигаются к желаемым позициям не больше чем на 1
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    # Параболическая оценка вышла за соседей - линейная
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def start_markers(self) -> None:
+        # Маркеры ставятся на минимум, p/2, p, (1+p)/2 и максимум накопленных значений
+        ordered = sorted(self.buffer)
+        last = len(ordered) - 1
+        self.desired = [last * increment for increment in self.increments]
+        self.positions = [int(round(position)) for position in self.desired]
+        for i in range(1, 5):
+            self.positions[i] = max(self.positions[i], self.positions[i - 1] + 1)
+        self.heights = [ordered[position] for position in self.positions]
+        self.buffer = []
+
+    def value(self) -> float:
+        if self.heights:
+            return self.heights[2]
+        if not self.buffer:
+            return 0.0
+        ordered = sorted(self.buffer)
+        position = (len(ordered) - 1) * self.p
+        low = int(position)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+class StreamStats:
+    """Статистика одного ряда, обновляемая по мере поступления значений.
+
+    Аномалия - значение, отклоняющееся больше чем на z_threshold
+    стандартных отклонений от rolling предыдущих значений (как в
+    sensor_statistics.window_stats). Все составляющие обновляются за O(1).
+    """
+    def __init__(self, name: str, rolling: int = 60, z_threshold: float = 3.0, alpha: float = 0.05):
+        self.name = name
+        self.rolling = rolling
+        self.z_threshold = z_threshold
+        self.running = RunningStats()
+        self.ewma = Ewma(alpha)
+        self.quantiles = [QuantileSketch(0.05), QuantileSketch(0.5), QuantileSketch(0.95)]
+        self.window = deque()
+        self.window_sum = 0.0
+        self.window_squares = 0.0
+        self.since_resum = 0
+        self.checked = 0
+        self.anomalies = 0
+        self.last_z = 0.0
+
+    def update(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def add(self, value: float) -> None:
+        self.running.add(value)
+        self.ewma.add(value)
+        for sketch in self.quantiles:
+            sketch.add(value)
+
+        window = self.window
+        if len(window) == self.rolling:
+            mean = self.window_sum / self.rolling
+            std = math.sqrt(max(self.window_squares / self.rolling - mean * mean, 0.0))
+            self.last_z = (value - mean) / std if std > 0 else 0.0
+            self.checked += 1
+            if abs(self.last_z) > self.z_threshold:
+                self.anomalies += 1
+            old = window.popleft()
+            self.window_sum -= old
+            self.window_squares -= old * old
+        window.append(value)
+        self.window_sum += value
+        self.window_squares += value * value
+
+        # Скользящие суммы периодически пересчитываются, чтобы ошибки округления не копились
+        self.since_resum += 1
+        if self.since_resum >= 100 * self.rolling:
+            self.since_resum = 0
+            self.window_sum = sum(window)
+            self.window_squares = sum(v * v for v in window)
+
+    def snapshot(self) -> WindowStats:
+        if not self.running.count:
+            return WindowStats(self.name, 0)
+        p5, p50, p95 = (sketch.value() for sketch in self.quantiles)
+        return WindowStats(self.name, self.running.count, self.running.mean, self.running.std,
+                           p5, p50, p95, self.checked, self.anomalies, self.last_z)
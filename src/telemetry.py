@@ -0,0 +1,262 @@
+import json
+import re
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models import SensorDataRepository
+
+# Тема брокера с отчетами устройства: devices/<id>/telemetry
+TELEMETRY_TOPIC = "devices/+/telemetry"
+
+def parse_report(raw: Any, device_id: Optional[str] = None) -> Tuple[str, Optional[str], Optional[float]]:
+    """Отчет устройства: JSON {"device": id, "status": ..., "value": ...}.
+
+    status и value необязательны; device_id задается извне, если id
+    устройства уже известен (например, из темы брокера).
+    """
+    report = json.loads(raw)
+    device_id = device_id or report["device"]
+    status = report.get("status")
+    value = report.get("value")
+    return (str(device_id),
+            str(status) if status is not None else None,
+            float(value) if value is not None else None)
+
+class TelemetryIngester:
+    """Прием телеметрии устройств с пакетной записью в репозитории.
+
+    Между сбросами от устройства хранится только последний статус;
+    статусы применяются одной пачкой через DeviceController.apply_statuses,
+    значения измерений - одной пачкой в ряд SensorDataRepository, без
+    записи на каждое измерение. Очередь измерений
+    ограничена max_pending: при отставании вытесняются самые старые.
+    Файл устройств записывается не чаще раза в persist_interval секунд.
+    """
+    def __init__(self, device_controller, sensor_repo: SensorDataRepository,
+                 flush_interval: float = 0.25, persist_interval: float = 5.0,
+                 max_pending: int = 200000):
+        self.device_controller = device_controller
+        self.sensor_repo = sensor_repo
+        self.flush_interval = flush_interval
+        self.persist_interval = persist_interval
+        self.last_persist = time.monotonic()
+        self.statuses: Dict[str, str] = {}
+        self.readings = deque(maxlen=max_pending)
+        self.lock = threading.Lock()
+        # Сбросы выполняются по одному: пачки применяются в порядке приема
+        self.flush_lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.stopped = threading.Event()
+
+        # Метрики
+        self.received = 0
+        self.coalesced = 0
+        self.malformed = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.applied = 0
+        self.changed = 0
+        self.unknown = 0
+        self.stored = 0
+        self.flush_time = 0.0
+        self.max_flush = 0.0
+
+    def submit(self, device_id: str, status: Optional[str] = None, value: Optional[float] = None) -> None:
+        with self.lock:
+            self.received += 1
+            if status is not None:
+                if device_id in self.statuses:
+                    self.coalesced += 1
+                self.statuses[device_id] = status
+            if value is not None:
+                if len(self.readings) == self.readings.maxlen:
+                    self.dropped += 1
+                self.readings.append(value)
+
+    def ingest(self, raw: Any, device_id: Optional[str] = None) -> bool:
+        """Принять один отчет; False - отчет не разобран"""
+        try:
+            device_id, status, value = parse_report(raw, device_id)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            with self.lock:
+                self.malformed += 1
+            return False
+        self.submit(device_id, status, value)
+        return True
+
+    def ingest_lines(self, data: bytes) -> int:
+        """Отчеты построчно (датаграмма UDP может содержать несколько)"""
+        return sum(self.ingest(line) for line in data.splitlines() if line.strip())
+
+    def flush(self, persist: bool = False) -> int:
+        """Записать накопленное в репозитории; возвращает число принятых статусов.
+
+        persist=True - записать файл устройств независимо от persist_interval.
+        """
+        with self.flush_lock:
+            with self.lock:
+                statuses, self.statuses = self.statuses, {}
+                readings = list(self.readings)
+                self.readings.clear()
+            now = time.monotonic()
+            persist = persist or now - self.last_persist >= self.persist_interval
+            if not statuses and not readings and not persist:
+                return 0
+            if persist:
+                self.last_persist = now
+            started = time.perf_counter()
+            changed = self.device_controller.apply_statuses(statuses, persist)
+            if readings:
+                self.sensor_repo.save_values(readings)
+            elapsed = time.perf_counter() - started
+            unknown = sum(1 for device_id in statuses
+                          if self.device_controller.get_device_by_id(device_id) is None)
+            with self.lock:
+                self.flushes += 1
+                self.applied += len(statuses)
+                self.changed += len(changed)
+                self.unknown += unknown
+                self.stored += len(readings)
+                self.flush_time += elapsed
+                self.max_flush = max(self.max_flush, elapsed)
+            return len(statuses)
+
+    def start(self) -> None:
+        if self.thread is not None:
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, name="telemetry-flush", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Остановить сбросы по таймеру и записать остаток"""
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
+        self.flush(persist=True)
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Ошибка записи телеметрии: {e}")
+
+    def get_stats(self) -> Dict[str, float]:
+        with self.lock:
+            return {
+                "received": self.received,
+                "coalesced": self.coalesced,
+                "malformed": self.malformed,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "statuses_applied": self.applied,
+                "statuses_changed": self.changed,
+                "unknown_devices": self.unknown,
+                "readings_stored": self.stored,
+                "pending_statuses": len(self.statuses),
+                "pending_readings": len(self.readings),
+                "flush_avg_ms": self.flush_time / self.flushes * 1000 if self.flushes else 0.0,
+                "flush_max_ms": self.max_flush * 1000
+            }
+
+# ====================== ИСТОЧНИКИ ТЕЛЕМЕТРИИ ======================
+
+class TelemetryUDPServer(socketserver.UDPServer):
+    # Датаграмма шлюза может нести десятки отчетов
+    max_packet_size = 65535
+    # Буфер сокета сглаживает всплески, пока поток приема занят
+    receive_buffer = 4 << 20
+
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+        super().server_bind()
+
+class TelemetryServer:
+    """Прием отчетов по UDP (датаграмма - один или несколько отчетов
+    построчно) и TCP (поток отчетов, по одному на строку)"""
+    def __init__(self, ingester: TelemetryIngester, host: str = "127.0.0.1",
+                 udp_port: Optional[int] = None, tcp_port: Optional[int] = None):
+        self.ingester = ingester
+        self.servers: List[socketserver.BaseServer] = []
+        self.threads: List[threading.Thread] = []
+
+        class DatagramHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                ingester.ingest_lines(self.request[0])
+
+        class StreamHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if line.strip():
+                        ingester.ingest(line)
+
+        if udp_port is not None:
+            self.servers.append(TelemetryUDPServer((host, udp_port), DatagramHandler))
+        if tcp_port is not None:
+            socketserver.ThreadingTCPServer.allow_reuse_address = True
+            server = socketserver.ThreadingTCPServer((host, tcp_port), StreamHandler)
+            server.daemon_threads = True
+            self.servers.append(server)
+
+    def addresses(self) -> List[Tuple[str, int]]:
+        return [server.server_address for server in self.servers]
+
+    def start(self) -> None:
+        for server in self.servers:
+            thread = threading.Thread(target=server.serve_forever, name="telemetry-server", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self) -> None:
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.threads = []
+
+def topic_pattern(topic_filter: str):
+    """Фильтр темы в стиле MQTT: + - один уровень, # - все оставшиеся"""
+    parts = []
+    for level in topic_filter.split("/"):
+        if level == "#":
+            parts.append(".*")
+            break
+        parts.append("([^/]+)" if level == "+" else re.escape(level))
+    return re.compile("/".join(parts) + "$")
+
+class LocalBroker:
+    """Брокер публикаций по темам в пределах процесса.
+
+    Подменяет MQTT-брокер при разработке и замерах: те же темы и
+    фильтры с + и #, доставка подписчикам сразу при публикации.
+    """
+    def __init__(self):
+        self.subscriptions: List[Tuple[Any, Callable[[str, bytes], None]]] = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, topic_filter: str, callback: Callable[[str, bytes], None]) -> None:
+        with self.lock:
+            self.subscriptions = self.subscriptions + [(topic_pattern(topic_filter), callback)]
+
+    def publish(self, topic: str, payload: bytes) -> int:
+        delivered = 0
+        for pattern, callback in self.subscriptions:
+            if pattern.match(topic):
+                callback(topic, payload)
+                delivered += 1
+        return delivered
+
+def attach_broker(ingester: TelemetryIngester, broker, topic_filter: str = TELEMETRY_TOPIC) -> None:
+    """Подписать ingester на отчеты брокера; id устройства - уровень + темы"""
+    pattern = topic_pattern(topic_filter)
+
+    def on_message(topic: str, payload: bytes) -> None:
+        match = pattern.match(topic)
+        ingester.ingest(payload, match.group(1) if match and match.groups() else None)
+
+    broker.subscribe(topic_filter, on_message)
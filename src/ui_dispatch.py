@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict
+
+from controllers import IView
+
+class TkDispatcher:
+    """Потокобезопасная передача вызовов в поток Tk.
+
+    Фоновые потоки складывают вызовы в очередь и будят цикл событий
+    виртуальным событием; вся накопленная очередь выполняется одним
+    обработчиком, без периодического опроса.
+    """
+    EVENT = '<<DispatchCalls>>'
+
+    def __init__(self, root):
+        self.root = root
+        self.calls = deque()
+        self.lock = threading.Lock()
+        self.scheduled = False
+        root.bind(self.EVENT, self._drain)
+
+    def post(self, callback: Callable, *args) -> None:
+        with self.lock:
+            self.calls.append((callback, args))
+            if self.scheduled:
+                return
+            self.scheduled = True
+        try:
+            self.root.event_generate(self.EVENT, when='tail')
+        except Exception as e:
+            # Окно уже закрыто
+            print(f"Ошибка передачи события в интерфейс: {e}")
+
+    def _drain(self, event=None) -> None:
+        with self.lock:
+            self.scheduled = False
+            calls, self.calls = self.calls, deque()
+        for callback, args in calls:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Ошибка обработчика интерфейса: {e}")
+
+class ImmediateDispatcher:
+    """Диспетчер без интерфейса: вызов выполняется сразу в вызывающем потоке"""
+    def post(self, callback: Callable, *args) -> None:
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"Ошибка обработчика: {e}")
+
+class SpeechEventBridge(IView):
+    """Передает распознанные фразы из контроллера речи обработчику в потоке интерфейса"""
+    def __init__(self, controller, dispatcher, handler: Callable):
+        self.controller = controller
+        self.dispatcher = dispatcher
+        self.handler = handler
+        self.pending = False
+        self.lock = threading.Lock()
+        # Задержка от распознавания до обработки, с
+        self.latencies = deque(maxlen=500)
+
+    def display(self, data: Any) -> None:
+        pass
+
+    def update(self, data: Any) -> None:
+        if not isinstance(data, dict) or data.get('type') != 'phrase_recognized':
+            return
+        # Несколько фраз подряд обрабатываются одним вызовом
+        with self.lock:
+            if self.pending:
+                return
+            self.pending = True
+        self.dispatcher.post(self._drain)
+
+    def _drain(self) -> None:
+        with self.lock:
+            self.pending = False
+        while True:
+            result = self.controller.get_next_result(timeout=0)
+            if result is None:
+                break
+            self.latencies.append(time.time() - result.recognized_at)
+            self.handler(result)
+
+    def get_stats(self) -> Dict[str, float]:
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return {"dispatched": 0}
+        return {
+            "dispatched": len(latencies),
+            "latency_avg_ms": sum(latencies) / len(latencies) * 1000,
+            "latency_max_ms": latencies[-1] * 1000
+        }
@@ -0,0 +1,183 @@
+import sys
+import threading
+import time
+import tkinter
+import traceback
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+def describe_callback(func: Callable) -> str:
+    """Читаемое имя обработчика Tk: модуль и полное имя функции"""
+    # after() оборачивает обработчик во вложенную функцию callit
+    code = getattr(func, '__code__', None)
+    if code is not None and code.co_name == 'callit' and 'func' in code.co_freevars:
+        func = func.__closure__[code.co_freevars.index('func')].cell_contents
+    target = getattr(func, '__func__', func)
+    name = getattr(target, '__qualname__', None) or repr(func)
+    module = getattr(target, '__module__', None)
+    return f"{module}.{name}" if module else name
+
+class TkStallWatchdog:
+    """Сторож отзывчивости цикла событий Tk.
+
+    Цикл событий ставит контрольные отметки через after каждые
+    interval_ms. Фоновый поток сравнивает время последней отметки с
+    текущим и, если цикл стоит дольше threshold_ms, снимает стек потока
+    интерфейса. Каждый обработчик Tk (bind, command, after) выполняется
+    через обертку, которая знает его имя и длительность, поэтому зависание
+    приписывается конкретному обработчику. Отчет ранжирован по суммарному
+    времени зависаний.
+    """
+    UNATTRIBUTED = "<вне обработчиков>"
+
+    def __init__(self, root, interval_ms: int = 50, threshold_ms: int = 200, stack_depth: int = 12):
+        self.root = root
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.stack_depth = stack_depth
+        self.lock = threading.Lock()
+        self.main_thread_id = threading.get_ident()
+
+        # Выполняемые сейчас обработчики: [имя, начало, снятый стек, время вложенных зависаний]
+        self.active: List[list] = []
+        self.report: Dict[str, dict] = {}
+        self.lags = deque(maxlen=1000)
+        self.beats = 0
+        self.last_beat = time.perf_counter()
+        self.attributed_since_beat = False
+
+        self.running = False
+        self.monitor_thread = None
+        self.beat_job = None
+        self.original_wrapper = None
+
+    def start(self) -> None:
+        """Подменить обертку обработчиков Tk и запустить отметки и поток наблюдения.
+
+        Вызывать до создания виджетов: обработчики, зарегистрированные
+        раньше, выполняются без атрибуции.
+        """
+        if self.running:
+            return
+        self.running = True
+        self.original_wrapper = tkinter.CallWrapper
+        tkinter.CallWrapper = self._make_wrapper(self.original_wrapper)
+        self.last_beat = time.perf_counter()
+        self.beat_job = self.root.after(int(self.interval * 1000), self._beat)
+        self.monitor_thread = threading.Thread(target=self._monitor, daemon=True)
+        self.monitor_thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.running = False
+        if self.original_wrapper is not None:
+            tkinter.CallWrapper = self.original_wrapper
+        if self.beat_job is not None:
+            try:
+                self.root.after_cancel(self.beat_job)
+            except tkinter.TclError:
+                pass
+            self.beat_job = None
+
+    def get_report(self, top: int = 10) -> List[dict]:
+        """Обработчики, ранжированные по суммарному времени зависаний"""
+        with self.lock:
+            entries = [dict(entry) for entry in self.report.values()]
+        entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return entries[:top]
+
+    def get_stats(self) -> Dict[str, float]:
+        with self.lock:
+            lags = sorted(self.lags)
+            stalls = sum(entry["count"] for entry in self.report.values())
+        return {
+            "beats": self.beats,
+            "stalls": stalls,
+            "lag_p50_ms": lags[len(lags) // 2] * 1000 if lags else 0.0,
+            "lag_p95_ms": lags[int(len(lags) * 0.95)] * 1000 if lags else 0.0,
+            "lag_max_ms": lags[-1] * 1000 if lags else 0.0
+        }
+
+    def format_report(self, top: int = 10) -> str:
+        lines = ["Зависания интерфейса (по суммарному времени):"]
+        for entry in self.get_report(top):
+            lines.append(f"  {entry['total_ms']:8.1f} мс  x{entry['count']:<4} "
+                         f"макс {entry['max_ms']:.1f} мс  {entry['callback']}")
+            for frame in entry["stack"]:
+                lines.append(f"      {frame}")
+        if len(lines) == 1:
+            lines.append("  не обнаружено")
+        return "\n".join(lines)
+
+    def _make_wrapper(self, base):
+        watchdog = self
+
+        class WatchedCallWrapper(base):
+            def __call__(self, *args):
+                record = [describe_callback(self.func), time.perf_counter(), None, 0.0]
+                with watchdog.lock:
+                    watchdog.active.append(record)
+                try:
+                    return super().__call__(*args)
+                finally:
+                    watchdog._finish(record)
+
+        return WatchedCallWrapper
+
+    def _finish(self, record: list) -> None:
+        elapsed = time.perf_counter() - record[1]
+        with self.lock:
+            if record in self.active:
+                self.active.remove(record)
+            # Зависания вложенных обработчиков (update() внутри обработчика)
+            # уже записаны на них самих и из времени внешнего вычитаются
+            own = elapsed - record[3]
+            if own >= self.threshold and not record[0].endswith("._beat"):
+                self._record(record[0], own, record[2])
+                self.attributed_since_beat = True
+                if self.active:
+                    self.active[-1][3] += own
+
+    def _beat(self) -> None:
+        now = time.perf_counter()
+        lag = max(0.0, now - self.last_beat - self.interval)
+        with self.lock:
+            self.beats += 1
+            self.lags.append(lag)
+            # Цикл стоял, но ни один обернутый обработчик не был виноват:
+            # перерисовка, обработчики до start() или работа внутри Tcl
+            if lag >= self.threshold and not self.attributed_since_beat:
+                self._record(self.UNATTRIBUTED, lag, None)
+            self.attributed_since_beat = False
+        self.last_beat = now
+        if self.running:
+            self.beat_job = self.root.after(int(self.interval * 1000), self._beat)
+
+    def _monitor(self) -> None:
+        while self.running:
+            time.sleep(self.interval / 2)
+            if time.perf_counter() - self.last_beat - self.interval < self.threshold:
+                continue
+            with self.lock:
+                if not self.active or self.active[-1][2] is not None:
+                    continue
+                record = self.active[-1]
+            # Снимок стека потока интерфейса в момент зависания
+            frame = sys._current_frames().get(self.main_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)[-self.stack_depth:]
+            record[2] = [f"{entry.filename}:{entry.lineno} {entry.name}" for entry in stack]
+
+    def _record(self, callback: str, elapsed: float, stack: Optional[List[str]]) -> None:
+        entry = self.report.setdefault(callback, {
+            "callback": callback, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "stack": []
+        })
+        elapsed_ms = elapsed * 1000
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        if elapsed_ms >= entry["max_ms"]:
+            entry["max_ms"] = elapsed_ms
+            if stack:
+                entry["stack"] = stack
@@ -5,8 +5,10 @@ from controllers import (
     IController, IView, AuthController, DeviceController,
     AnalysisController, DecisionController, ResponseController
 )
-from models import Device, AuthUser, Request, Analysis, Decision, Response
-from patterns import MachineLearningStrategy, StatisticalAnalysisStrategy
+from models import Device, AuthUser, Request, Analysis, Decision, Response, DEVICE_TYPES, DEVICE_STATUSES
+from patterns import MachineLearningStrategy, StatisticalAnalysisStrategy, IncrementalStatisticalStrategy
+from ensemble import EnsembleStrategy, WEIGHTED
+from device_index import DeviceSearchIndex, SORT_FIELDS
 
 class BaseView(ttk.Frame, IView):
     def __init__(self, controller: IController, parent=None):
@@ -21,6 +23,45 @@ class BaseView(ttk.Frame, IView):
     
     def update(self, data: Any) -> None:
         pass
+    
+    def run_operation(self, operation, *args, on_done=None, dialog=None, controls=()):
+        """Выполнить операцию контроллера в фоне с индикатором в диалоге.
+        
+        Пока операция идет, controls заблокированы. Закрытие диалога
+        отменяет операцию: показать ее результат уже негде.
+        """
+        progress = None
+        if dialog is not None:
+            progress = ttk.Progressbar(dialog, mode='indeterminate')
+            progress.pack(fill=tk.X, padx=20, pady=5)
+            progress.start(10)
+        for control in controls:
+            control.config(state='disabled')
+        
+        def finish():
+            if dialog is not None and not dialog.winfo_exists():
+                return False
+            if progress is not None:
+                progress.destroy()
+            for control in controls:
+                control.config(state='normal')
+            return True
+        
+        def done(result):
+            if finish() and on_done:
+                on_done(result)
+        
+        def failed(error):
+            if finish():
+                messagebox.showerror("Ошибка", f"Операция не выполнена: {error}")
+        
+        task = self.controller.run_in_background(operation, *args, on_done=done, on_error=failed)
+        if task is None:
+            finish()
+            messagebox.showwarning("Внимание", "Система занята, повторите попытку позже")
+        elif dialog is not None and dialog.winfo_exists():
+            dialog.bind('<Destroy>', lambda event: task.cancel() if event.widget is dialog else None, add='+')
+        return task
 
 
 class AuthView(BaseView):
@@ -163,9 +204,36 @@ class AuthView(BaseView):
                 messagebox.showinfo("Успех", f"Пользователь {data['user'].username} добавлен")
 
 class DeviceView(BaseView):
+    """Таблица устройств.
+
+    Treeview содержит только видимое окно строк: полный порядок устройств
+    хранится в списке id, а собственная полоса прокрутки сдвигает окно.
+    События контроллера применяются как вставка, изменение или удаление
+    одной строки. Поиск, фильтры и сортировка выполняются по индексам.
+    Построение индекса и запросы к нему идут в фоновом потоке; события,
+    пришедшие за это время, применяются после завершения.
+    """
+    ROW_HEIGHT = 20
+    SEARCH_DELAY_MS = 120
+    ALL = "все"
+    
     def __init__(self, controller: DeviceController, parent=None):
         super().__init__(controller, parent)
         self.controller = controller
+        # Порядок отображения (id устройств) и начало видимого окна
+        self.order = []
+        self.top = 0
+        self.window_size = 15
+        # Поиск, фильтры и сортировка
+        self.index = DeviceSearchIndex()
+        self.sort_field = None
+        self.sort_descending = False
+        self.search_job = None
+        # Фоновая операция с индексом и то, что ждет ее завершения
+        self.index_busy = False
+        self.deferred_events = []
+        self.refresh_pending = False
+        self.query_pending = None
         self.setup_ui()
         self.refresh_devices()
     
@@ -177,22 +245,53 @@ class DeviceView(BaseView):
         ttk.Label(header_frame, text="📱 Управление устройствами", 
                  font=('Arial', 16)).pack(side=tk.LEFT)
         
+        # Поиск и фильтры
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill=tk.X, padx=10)
+        
+        ttk.Label(filter_frame, text="🔍 Поиск:").pack(side=tk.LEFT)
+        self.search_entry = ttk.Entry(filter_frame, width=30)
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind('<KeyRelease>', self.schedule_search)
+        
+        ttk.Label(filter_frame, text="Статус:").pack(side=tk.LEFT, padx=(10, 0))
+        self.status_filter = ttk.Combobox(filter_frame, values=[self.ALL] + DEVICE_STATUSES,
+                                          width=14, state='readonly')
+        self.status_filter.set(self.ALL)
+        self.status_filter.pack(side=tk.LEFT, padx=5)
+        self.status_filter.bind('<<ComboboxSelected>>', lambda e: self.apply_query())
+        
+        ttk.Label(filter_frame, text="Тип:").pack(side=tk.LEFT, padx=(10, 0))
+        self.type_filter = ttk.Combobox(filter_frame, values=[self.ALL] + DEVICE_TYPES,
+                                        width=14, state='readonly')
+        self.type_filter.set(self.ALL)
+        self.type_filter.pack(side=tk.LEFT, padx=5)
+        self.type_filter.bind('<<ComboboxSelected>>', lambda e: self.apply_query())
+        
+        self.count_label = ttk.Label(filter_frame, text="")
+        self.count_label.pack(side=tk.RIGHT)
+        
         # Таблица устройств
         self.tree_frame = ttk.Frame(self)
         self.tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        columns = ("ID", "Название", "Тип", "Статус", "Подключение")
-        self.tree = ttk.Treeview(self.tree_frame, columns=columns, show="headings", height=15)
+        self.columns = ("ID", "Название", "Тип", "Статус", "Подключение")
+        self.tree = ttk.Treeview(self.tree_frame, columns=self.columns, show="headings", height=15)
         
-        for col in columns:
-            self.tree.heading(col, text=col)
+        for col, field in zip(self.columns, SORT_FIELDS):
+            self.tree.heading(col, text=col, command=lambda f=field: self.sort_by(f))
             self.tree.column(col, width=120)
         
-        scrollbar = ttk.Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Прокрутка управляет окном строк, а не самим Treeview
+        self.scrollbar = ttk.Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.on_scroll)
         
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll_by(-1 if e.delta > 0 else 1))
+        self.tree.bind('<Button-4>', lambda e: self.scroll_by(-1))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_by(1))
         
         # Кнопки управления (все внизу)
         btn_frame = ttk.Frame(self)
@@ -208,25 +307,233 @@ class DeviceView(BaseView):
                   command=self.delete_device).pack(side=tk.LEFT, padx=5)
     
     def refresh_devices(self):
-        # Очищаем таблицу
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """Полная перезагрузка списка (кнопка "Обновить"): новый индекс
+        строится в фоне и заменяет прежний целиком"""
+        if self.index_busy:
+            self.refresh_pending = True
+            return
+        params = self.query_params()
+        
+        def build():
+            index = DeviceSearchIndex(self.controller.get_all_devices())
+            return index, self.compute_order(index, *params)
         
-        # Загружаем устройства
-        devices = self.controller.get_all_devices()
+        def done(result):
+            self.index, order = result
+            self.tree.delete(*self.tree.get_children())
+            self.show_order(order, keep_position=False)
+        
+        self.count_label.config(text="Загрузка...")
+        self.run_index_job(build, done)
+    
+    def run_index_job(self, operation, on_done):
+        """Операция с индексом в фоне. Пока она идет, индекс в потоке
+        интерфейса не меняется: события устройств откладываются"""
+        self.index_busy = True
+        
+        def done(result):
+            self.index_busy = False
+            on_done(result)
+            self.resume_index_work()
+        
+        def failed(error):
+            self.index_busy = False
+            messagebox.showerror("Ошибка", f"Не удалось обновить список устройств: {error}")
+            self.resume_index_work()
+        
+        if self.controller.run_in_background(operation, on_done=done, on_error=failed) is None:
+            # Очередь фоновых операций заполнена - выполняем здесь
+            try:
+                result = operation()
+            except Exception as e:
+                failed(e)
+            else:
+                done(result)
+    
+    def resume_index_work(self):
+        if self.index_busy:
+            return
+        events, self.deferred_events = self.deferred_events, []
+        for data in events:
+            self.update(data)
+        if self.index_busy:
+            return
+        if self.refresh_pending:
+            self.refresh_pending = False
+            self.query_pending = None
+            self.refresh_devices()
+        elif self.query_pending is not None:
+            keep_position, self.query_pending = self.query_pending, None
+            self.apply_query(keep_position)
+    
+    def is_filtered(self) -> bool:
+        return bool(self.sort_field or self.search_entry.get().strip()
+                    or self.status_filter.get() != self.ALL or self.type_filter.get() != self.ALL)
+    
+    def schedule_search(self, event=None):
+        # Пересчет только после паузы в наборе текста
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.SEARCH_DELAY_MS, self.apply_query)
+    
+    def apply_query(self, keep_position: bool = False):
+        """Пересчитать порядок строк по поиску, фильтрам и сортировке (в фоне)"""
+        self.search_job = None
+        if self.index_busy:
+            # Сохранить позицию, только если этого просили все отложенные запросы
+            self.query_pending = keep_position and self.query_pending is not False
+            return
+        index, params = self.index, self.query_params()
+        self.run_index_job(lambda: self.compute_order(index, *params),
+                           lambda order: self.show_order(order, keep_position))
+    
+    def query_params(self):
+        status = self.status_filter.get()
+        device_type = self.type_filter.get()
+        return (self.search_entry.get(),
+                None if status == self.ALL else status,
+                None if device_type == self.ALL else device_type,
+                self.sort_field, self.sort_descending)
+    
+    def compute_order(self, index: DeviceSearchIndex, query: str, status, device_type,
+                      sort_field, descending: bool):
+        """Порядок id устройств; выполняется в фоновом потоке"""
+        ids = index.search(query)
+        filtered = self.controller.filter_device_ids(status, device_type)
+        if filtered is not None:
+            ids = filtered if ids is None else ids & filtered
+        
+        if sort_field:
+            return index.ordered(sort_field, ids, descending)
+        if ids is None:
+            return list(index.devices)
+        return [device_id for device_id in index.devices if device_id in ids]
+    
+    def show_order(self, order, keep_position: bool):
+        self.order = order
+        if not keep_position:
+            self.top = 0
+        self.count_label.config(text=f"Найдено: {len(self.order)} из {len(self.index.devices)}")
+        self.render_window()
+    
+    def sort_by(self, field: str):
+        """Сортировка по столбцу; повторный щелчок меняет направление"""
+        if self.sort_field == field:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_field = field
+            self.sort_descending = False
+        for col, column_field in zip(self.columns, SORT_FIELDS):
+            arrow = (" ▼" if self.sort_descending else " ▲") if column_field == field else ""
+            self.tree.heading(col, text=col + arrow)
+        self.apply_query()
+    
+    def device_values(self, device: Device):
+        return (device.id, device.name, device.type, device.status, device.connection_info)
+    
+    def render_window(self):
+        """Привести строки Treeview к окну order[top:top + window_size]"""
+        self.top = max(0, min(self.top, len(self.order) - self.window_size))
+        wanted = self.order[self.top:self.top + self.window_size]
+        current = self.tree.get_children()
+        
+        if list(current) != wanted:
+            wanted_ids = set(wanted)
+            gone = [iid for iid in current if iid not in wanted_ids]
+            if gone:
+                self.tree.delete(*gone)
+            for index, device_id in enumerate(wanted):
+                if self.tree.exists(device_id):
+                    self.tree.move(device_id, "", index)
+                else:
+                    device = self.controller.get_device_by_id(device_id)
+                    self.tree.insert("", index, iid=device_id, values=self.device_values(device))
+        
+        self.update_scrollbar()
+    
+    def update_scrollbar(self):
+        total = len(self.order)
+        if total <= self.window_size:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + self.window_size) / total)
+    
+    def on_scroll(self, action, value, unit=None):
+        if action == "moveto":
+            self.top = int(float(value) * len(self.order))
+            self.render_window()
+        elif action == "scroll":
+            step = self.window_size if unit == "pages" else 1
+            self.scroll_by(int(value) * step)
+    
+    def scroll_by(self, rows: int):
+        self.top += rows
+        self.render_window()
+    
+    def on_resize(self, event):
+        # Одна строка высоты занята заголовками столбцов
+        rows = max(1, event.height // self.ROW_HEIGHT - 1)
+        if rows != self.window_size:
+            self.window_size = rows
+            self.render_window()
+    
+    def apply_status_batch(self, devices: list):
+        """Применить пачку изменений статуса из телеметрии"""
+        self.index.update_statuses(devices)
+        if self.is_filtered():
+            self.apply_query(keep_position=True)
+            return
+        # Порядок строк не меняется: обновляются только видимые строки
         for device in devices:
-            self.tree.insert("", tk.END, iid=device.id, values=(
-                device.id,
-                device.name,
-                device.type,
-                device.status,
-                device.connection_info
-            ))
+            if self.tree.exists(device.id):
+                self.tree.item(device.id, values=self.device_values(device))
+    
+    def apply_device_event(self, data: dict):
+        """Применить событие контроллера к одной строке"""
+        event = data.get('type')
+        if event in ('device_added', 'device_updated'):
+            if event == 'device_added' and data['device'].id in self.index.devices:
+                # Устройство уже попало в индекс при перестроении, пока событие ждало
+                event = 'device_updated'
+            self.index.add(data['device'])
+        elif event == 'device_deleted':
+            self.index.remove(data['device_id'])
+        
+        if self.is_filtered():
+            # Устройство могло войти в выборку или выйти из нее
+            self.apply_query(keep_position=True)
+            return
+        
+        self.count_label.config(text=f"Найдено: {len(self.index.devices)} из {len(self.index.devices)}")
+        if event == 'device_added':
+            device = data['device']
+            self.order.append(device.id)
+            if len(self.order) - 1 < self.top + self.window_size:
+                self.render_window()
+            else:
+                self.update_scrollbar()
+        elif event == 'device_updated':
+            device = data['device']
+            # Строка остается на месте, меняются только значения
+            if self.tree.exists(device.id):
+                self.tree.item(device.id, values=self.device_values(device))
+        elif event == 'device_deleted':
+            device_id = data['device_id']
+            try:
+                position = self.order.index(device_id)
+            except ValueError:
+                return
+            del self.order[position]
+            if position < self.top:
+                self.top -= 1
+                self.update_scrollbar()
+            else:
+                self.render_window()
     
     def add_device(self):
         dialog = tk.Toplevel(self)
         dialog.title("Добавить устройство")
-        dialog.geometry("400x350")
+        dialog.geometry("420x420")
         dialog.transient(self)
         dialog.grab_set()
         
@@ -238,9 +545,10 @@ class DeviceView(BaseView):
         fields = [
             ("ID устройства:", "entry"),
             ("Название:", "entry"),
-            ("Тип:", "combobox", ["сенсор", "актуатор", "камера", "динамик", "микрофон", "контроллер"]),
-            ("Статус:", "combobox", ["online", "offline", "error", "обслуживание"]),
-            ("Информация о подключении:", "entry")
+            ("Тип:", "combobox", DEVICE_TYPES),
+            ("Статус:", "combobox", DEVICE_STATUSES),
+            ("Информация о подключении:", "entry"),
+            ("Псевдонимы (через запятую):", "entry")
         ]
         
         entries = {}
@@ -266,6 +574,7 @@ class DeviceView(BaseView):
             device_type = entries["Тип:"].get()
             status = entries["Статус:"].get()
             connection = entries["Информация о подключении:"].get()
+            aliases = self.parse_aliases(entries["Псевдонимы (через запятую):"].get())
             
             if not all([device_id, name, device_type, status]):
                 status_label.config(text="Заполните обязательные поля")
@@ -276,19 +585,31 @@ class DeviceView(BaseView):
                 name=name,
                 type=device_type,
                 status=status,
-                connection_info=connection or ""
+                connection_info=connection or "",
+                aliases=aliases
             )
             
-            if self.controller.add_device(device):
-                dialog.destroy()
-                self.refresh_devices()
+            def on_saved(added):
+                if added:
+                    dialog.destroy()
+                else:
+                    status_label.config(text="Устройство с таким ID уже существует")
+            
+            status_label.config(text="")
+            self.run_operation(self.controller.add_device, device, on_done=on_saved,
+                               dialog=dialog, controls=[save_button])
         
         btn_frame = ttk.Frame(dialog)
         btn_frame.pack(pady=10)
         
-        ttk.Button(btn_frame, text="Сохранить", command=save_device).pack(side=tk.LEFT, padx=5)
+        save_button = ttk.Button(btn_frame, text="Сохранить", command=save_device)
+        save_button.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Отмена", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
     
+    @staticmethod
+    def parse_aliases(text: str):
+        return [alias.strip() for alias in text.split(",") if alias.strip()]
+    
     def delete_device(self):
         selection = self.tree.selection()
         if not selection:
@@ -308,11 +629,13 @@ class DeviceView(BaseView):
                 device_name = str(device_id)
             
             if messagebox.askyesno("Подтверждение", f"Удалить устройство '{device_name}'?"):
-                if self.controller.delete_device(str(device_id)):
-                    messagebox.showinfo("Успех", "Устройство успешно удалено")
-                    self.refresh_devices()
-                else:
-                    messagebox.showerror("Ошибка", "Не удалось удалить устройство")
+                def on_deleted(success):
+                    if success:
+                        messagebox.showinfo("Успех", "Устройство успешно удалено")
+                    else:
+                        messagebox.showerror("Ошибка", "Не удалось удалить устройство")
+                
+                self.run_operation(self.controller.delete_device, str(device_id), on_done=on_deleted)
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка при удалении устройства: {str(e)}")
     
@@ -345,7 +668,7 @@ class DeviceView(BaseView):
         
         dialog = tk.Toplevel(self)
         dialog.title("Редактировать устройство")
-        dialog.geometry("400x350")
+        dialog.geometry("420x420")
         dialog.transient(self)
         dialog.grab_set()
         
@@ -357,9 +680,10 @@ class DeviceView(BaseView):
         fields = [
             ("ID устройства:", "entry", device.id, True),
             ("Название:", "entry", device.name, False),
-            ("Тип:", "combobox", ["сенсор", "актуатор", "камера", "динамик", "микрофон", "контроллер"], device.type),
-            ("Статус:", "combobox", ["online", "offline", "error", "обслуживание"], device.status),
-            ("Информация о подключении:", "entry", device.connection_info, False)
+            ("Тип:", "combobox", DEVICE_TYPES, device.type),
+            ("Статус:", "combobox", DEVICE_STATUSES, device.status),
+            ("Информация о подключении:", "entry", device.connection_info, False),
+            ("Псевдонимы (через запятую):", "entry", ", ".join(device.aliases), False)
         ]
         
         entries = {}
@@ -384,6 +708,7 @@ class DeviceView(BaseView):
             device_type = entries["Тип:"].get()
             status = entries["Статус:"].get()
             connection = entries["Информация о подключении:"].get()
+            aliases = self.parse_aliases(entries["Псевдонимы (через запятую):"].get())
             
             if not all([name, device_type, status]):
                 messagebox.showerror("Ошибка", "Заполните обязательные поля")
@@ -394,20 +719,25 @@ class DeviceView(BaseView):
                 name=name,
                 type=device_type,
                 status=status,
-                connection_info=connection or ""
+                connection_info=connection or "",
+                aliases=aliases
             )
             
-            if self.controller.update_device(updated_device):
-                messagebox.showinfo("Успех", "Устройство успешно обновлено")
-                dialog.destroy()
-                self.refresh_devices()
-            else:
-                messagebox.showerror("Ошибка", "Не удалось обновить устройство")
+            def on_saved(updated):
+                if updated:
+                    messagebox.showinfo("Успех", "Устройство успешно обновлено")
+                    dialog.destroy()
+                else:
+                    messagebox.showerror("Ошибка", "Не удалось обновить устройство")
+            
+            self.run_operation(self.controller.update_device, updated_device, on_done=on_saved,
+                               dialog=dialog, controls=[save_button])
         
         btn_frame = ttk.Frame(dialog)
         btn_frame.pack(pady=10)
         
-        ttk.Button(btn_frame, text="Сохранить", command=save_changes).pack(side=tk.LEFT, padx=5)
+        save_button = ttk.Button(btn_frame, text="Сохранить", command=save_changes)
+        save_button.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Отмена", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
     
     def display(self, data: Any) -> None:
@@ -415,10 +745,124 @@ class DeviceView(BaseView):
     
     def update(self, data: Any) -> None:
         if isinstance(data, dict):
-            if data.get('type') in ['device_added', 'device_updated', 'device_deleted']:
+            if data.get('type') in ['device_added', 'device_updated', 'device_deleted', 'devices_updated'] \
+                    and self.index_busy:
+                self.deferred_events.append(data)
+            elif data.get('type') in ['device_added', 'device_updated', 'device_deleted']:
+                self.apply_device_event(data)
+            elif data.get('type') == 'devices_updated':
+                self.apply_status_batch(data['devices'])
+            elif data.get('type') == 'devices_resync':
+                # Шина вытеснила часть событий: список перестраивается целиком
                 self.refresh_devices()
 
 
+class ConnectedDevicesPanel(BaseView):
+    """Панель подключенных устройств на экране диалога.
+
+    Обновляется по событиям DeviceController и перерисовывает только
+    изменившиеся строки; таймер раз в 30 секунд лишь сверяет версию
+    контроллера и ничего не делает, если изменений не было.
+    """
+    MAX_ROWS = 3
+    SYNC_INTERVAL_MS = 30000
+    
+    def __init__(self, controller: DeviceController, parent=None):
+        super().__init__(controller, parent)
+        self.controller = controller
+        # Подключенные устройства в порядке репозитория
+        self.online = {}
+        self.row_labels = []
+        self.row_texts = []
+        self.synced_version = -1
+        self.render_job = None
+        self.setup_ui()
+        self.resync()
+        self.after(self.SYNC_INTERVAL_MS, self.periodic_sync)
+    
+    def setup_ui(self):
+        self.frame = ttk.LabelFrame(self, text="✅ Подключенные устройства")
+        self.more_label = ttk.Label(self.frame, text="")
+    
+    def resync(self):
+        """Полная сверка с репозиторием (при запуске и если событие было пропущено)"""
+        self.online = {d.id: d for d in self.controller.get_all_devices() if d.status == 'online'}
+        self.synced_version = self.controller.version
+        self.schedule_render()
+    
+    def periodic_sync(self):
+        if self.synced_version != self.controller.version:
+            self.resync()
+        self.after(self.SYNC_INTERVAL_MS, self.periodic_sync)
+    
+    def update(self, data: Any) -> None:
+        if not isinstance(data, dict):
+            return
+        event = data.get('type')
+        if event in ('device_added', 'device_updated'):
+            device = data['device']
+            # Репозиторий переносит сохраненное устройство в конец списка
+            self.online.pop(device.id, None)
+            if device.status == 'online':
+                self.online[device.id] = device
+        elif event == 'devices_updated':
+            # Статусы из телеметрии: устройства остаются на своих местах
+            for device in data['devices']:
+                if device.status == 'online':
+                    self.online[device.id] = device
+                else:
+                    self.online.pop(device.id, None)
+        elif event == 'device_deleted':
+            self.online.pop(data['device_id'], None)
+        elif event == 'devices_resync':
+            self.resync()
+            return
+        else:
+            return
+        self.synced_version = self.controller.version
+        self.schedule_render()
+    
+    def schedule_render(self):
+        # Несколько событий подряд отрисовываются один раз
+        if self.render_job is None:
+            self.render_job = self.after_idle(self.render)
+    
+    def render(self):
+        self.render_job = None
+        visible = list(self.online.values())[:self.MAX_ROWS]
+        texts = [f"• {d.name} ({d.type}) - {d.connection_info}" for d in visible]
+        
+        if not texts:
+            self.frame.pack_forget()
+        elif not self.frame.winfo_manager():
+            self.frame.pack(fill=tk.X)
+        
+        # Обновляем только изменившиеся строки
+        for i, text in enumerate(texts):
+            if i < len(self.row_labels):
+                if self.row_texts[i] != text:
+                    self.row_labels[i].config(text=text)
+                    self.row_texts[i] = text
+            else:
+                label = ttk.Label(self.frame, text=text)
+                if self.more_label.winfo_manager():
+                    label.pack(anchor=tk.W, before=self.more_label)
+                else:
+                    label.pack(anchor=tk.W)
+                self.row_labels.append(label)
+                self.row_texts.append(text)
+        while len(self.row_labels) > len(texts):
+            self.row_labels.pop().destroy()
+            self.row_texts.pop()
+        
+        hidden = len(self.online) - len(texts)
+        if hidden > 0:
+            self.more_label.config(text=f"... и ещё {hidden} устройств")
+            if not self.more_label.winfo_manager():
+                self.more_label.pack(anchor=tk.W)
+        else:
+            self.more_label.pack_forget()
+
 class AnalysisView(BaseView):
     def __init__(self, controller: AnalysisController, parent=None):
         super().__init__(controller, parent)
@@ -430,23 +874,45 @@ class AnalysisView(BaseView):
         self.analysis_text = tk.Text(self, height=10, width=50)
         self.analysis_text.pack(pady=5)
         
-        ttk.Button(self, text="Выполнить ML анализ", 
-                  command=self.perform_ml_analysis).pack(pady=2)
-        ttk.Button(self, text="Выполнить статистический анализ", 
-                  command=self.perform_stat_analysis).pack(pady=2)
+        self.ml_button = ttk.Button(self, text="Выполнить ML анализ", 
+                                    command=self.perform_ml_analysis)
+        self.ml_button.pack(pady=2)
+        self.stat_button = ttk.Button(self, text="Выполнить статистический анализ", 
+                                      command=self.perform_stat_analysis)
+        self.stat_button.pack(pady=2)
+        # Накопительная стратегия живет вместе с окном: каждое нажатие учитывает только новые данные
+        self.live_strategy = IncrementalStatisticalStrategy()
+        self.live_button = ttk.Button(self, text="Текущая статистика (онлайн)",
+                                      command=self.perform_live_analysis)
+        self.live_button.pack(pady=2)
+        self.ensemble_button = ttk.Button(self, text="Анализ всеми стратегиями (0.5 с)",
+                                          command=self.perform_ensemble_analysis)
+        self.ensemble_button.pack(pady=2)
     
     def perform_ml_analysis(self):
-        self.controller.set_strategy(MachineLearningStrategy())
-        # Здесь должен быть запрос и данные
-        request = Request(id="test", language="ru", purpose="test", recognition_accuracy=95)
-        analysis = self.controller.perform_analysis(request)
-        self.display(analysis)
+        self.run_analysis(MachineLearningStrategy())
     
     def perform_stat_analysis(self):
-        self.controller.set_strategy(StatisticalAnalysisStrategy())
+        self.run_analysis(StatisticalAnalysisStrategy())
+    
+    def perform_live_analysis(self):
+        self.run_analysis(self.live_strategy)
+    
+    def perform_ensemble_analysis(self):
+        # Стратегии работают одновременно, ответ - взвешенное доверием голосование успевших
+        self.run_analysis(EnsembleStrategy([MachineLearningStrategy(), StatisticalAnalysisStrategy()],
+                                           policy=WEIGHTED, deadline=0.5,
+                                           executor=self.controller.ensemble_executor()))
+    
+    def run_analysis(self, strategy):
+        # Стратегия передается в вызов: стратегия контроллера по умолчанию не меняется
+        # Здесь должен быть запрос и данные
         request = Request(id="test", language="ru", purpose="test", recognition_accuracy=95)
-        analysis = self.controller.perform_analysis(request)
-        self.display(analysis)
+        self.analysis_text.delete(1.0, tk.END)
+        self.analysis_text.insert(1.0, "Выполняется анализ...")
+        controls = [self.ml_button, self.stat_button, self.live_button, self.ensemble_button]
+        self.run_operation(self.controller.perform_analysis, request, strategy,
+                           on_done=self.display, controls=controls)
     
     def display(self, data: Any) -> None:
         if isinstance(data, Analysis):
@@ -500,6 +966,8 @@ class ResponseView(BaseView):
                   command=self.generate_response).pack(pady=5)
         ttk.Button(self, text="Отменить последний ответ", 
                   command=self.undo_response).pack(pady=2)
+        ttk.Button(self, text="Повторить отмененный ответ", 
+                  command=self.redo_response).pack(pady=2)
     
     def generate_response(self):
         decision = Decision(id="test", language="ru", message="Тестовое решение")
@@ -507,9 +975,12 @@ class ResponseView(BaseView):
         self.display(response)
     
     def undo_response(self):
-        if self.controller.commands:
-            command = self.controller.commands.pop()
-            command.undo()
+        # Контроллер оповещает окно о восстановленном ответе
+        if self.controller.undo() and self.controller.get_response() is None:
+            self.response_text.delete(1.0, tk.END)
+    
+    def redo_response(self):
+        self.controller.redo()
     
     def display(self, data: Any) -> None:
         if isinstance(data, Response):
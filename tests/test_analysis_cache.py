@@ -0,0 +1,90 @@
+from analysis_cache import AnalysisCache
+from controllers import AnalysisController
+from models import Analysis, Request, RequestRepository, SensorDataRepository
+from patterns import IAnalysisStrategy
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class CountingStrategy(IAnalysisStrategy):
+    """Стратегия, считающая обращения; отпечаток - стандартный"""
+    def __init__(self, cacheable=True):
+        self.cacheable = cacheable
+        self.calls = 0
+
+    def analyze_data(self, data):
+        self.calls += 1
+        return Analysis(id="count", result=f"вызов {self.calls}", confidence=1.0)
+
+    def cache_key(self):
+        return ("count",) if self.cacheable else None
+
+def request(text):
+    return Request(id="req", language="ru", purpose=text, recognition_accuracy=100)
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnalysisCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.get_stats()["evictions"] == 1
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = AnalysisCache(ttl=10, clock=clock)
+    cache.put("a", 1)
+    clock.now = 10
+    assert cache.get("a") == 1
+    clock.now = 10.5
+    assert cache.get("a") is None
+    stats = cache.get_stats()
+    assert (stats["expirations"], stats["size"], stats["hits"], stats["misses"]) == (1, 0, 1, 1)
+
+def test_ttl_none_keeps_entries_and_zero_size_disables_cache():
+    clock = Clock()
+    cache = AnalysisCache(ttl=None, clock=clock)
+    cache.put("a", 1)
+    clock.now = 1e9
+    assert cache.get("a") == 1
+    disabled = AnalysisCache(max_entries=0)
+    disabled.put("a", 1)
+    assert disabled.get("a") is None
+
+def test_controller_reuses_result_until_data_changes():
+    sensors = SensorDataRepository()
+    sensors.save_values([1.0, 2.0])
+    strategy = CountingStrategy()
+    controller = AnalysisController(RequestRepository(), strategy, sensor_repo=sensors)
+    first = controller.perform_analysis(request("статус"))
+    assert controller.perform_analysis(request("статус")) is first
+    assert strategy.calls == 1
+    # Новые измерения меняют версию окна - кэш не подходит
+    sensors.save_values([3.0])
+    controller.perform_analysis(request("статус"))
+    controller.perform_analysis(request("другой запрос"))
+    assert strategy.calls == 3
+
+def test_uncacheable_strategy_always_runs():
+    strategy = CountingStrategy(cacheable=False)
+    controller = AnalysisController(RequestRepository(), strategy)
+    controller.perform_analysis(request("статус"))
+    controller.perform_analysis(request("статус"))
+    assert strategy.calls == 2
+    assert controller.cache.get_stats()["size"] == 0
+
+def test_batch_analyzes_only_missing_requests():
+    strategy = CountingStrategy()
+    controller = AnalysisController(RequestRepository(), strategy)
+    controller.perform_analysis(request("раз"))
+    analyses = controller.perform_analysis_batch([request("раз"), request("два"), request("два")])
+    # "раз" - из кэша; два одинаковых новых запроса анализируются в одном пакете
+    assert strategy.calls == 3
+    assert analyses[0].result == "вызов 1"
+    assert controller.perform_analysis(request("два")).result == analyses[2].result
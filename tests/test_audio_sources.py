@@ -0,0 +1,101 @@
+import json
+import os
+import time
+
+from audio_sources import (
+    MANIFEST_NAME, AudioClip, IAudioSource, RecordingSource, ReplaySource,
+    TranscriptRecognizer, load_manifest
+)
+
+class ScriptedSource(IAudioSource):
+    """Источник с заранее заданными фразами вместо микрофона"""
+    def __init__(self, transcripts):
+        self.transcripts = list(transcripts)
+        self.opened = False
+        self.closed = False
+
+    @property
+    def exhausted(self):
+        return not self.transcripts
+
+    def open(self):
+        self.opened = True
+
+    def listen(self, timeout, phrase_time_limit):
+        if not self.transcripts:
+            return None
+        clip = AudioClip(b"\x00\x01" * 1600, 16000, 2, captured_at=time.time())
+        clip.transcript = self.transcripts.pop(0)
+        return clip
+
+    def close(self):
+        self.closed = True
+
+def record(directory, transcripts):
+    source = RecordingSource(ScriptedSource(transcripts), directory)
+    source.open()
+    clips = []
+    while not source.exhausted:
+        clips.append(source.listen(1, 5))
+    source.close()
+    return source, clips
+
+def test_recording_writes_clips_and_manifest(tmp_path):
+    directory = str(tmp_path)
+    source, clips = record(directory, ["включи свет", "выключи камеру"])
+    assert source.inner.opened and source.inner.closed
+    entries = load_manifest(directory)
+    assert [entry["file"] for entry in entries] == ["00000.wav", "00001.wav"]
+    assert [entry["transcript"] for entry in entries] == ["включи свет", "выключи камеру"]
+    assert all(entry["duration"] == 0.1 for entry in entries)
+    assert all(os.path.exists(os.path.join(directory, entry["file"])) for entry in entries)
+
+def test_replay_returns_recorded_clips_in_order(tmp_path):
+    directory = str(tmp_path)
+    _, recorded = record(directory, ["раз", "два", "три"])
+    replay = ReplaySource(directory, speed=0)
+    replay.open()
+    clips = []
+    while True:
+        clip = replay.listen(1, 5)
+        if clip is None:
+            break
+        clips.append(clip)
+    assert replay.exhausted
+    assert [clip.transcript for clip in clips] == ["раз", "два", "три"]
+    assert [clip.frame_data for clip in clips] == [clip.frame_data for clip in recorded]
+    assert clips[0].sample_rate == 16000 and clips[0].sample_width == 2
+
+def test_replay_loops_when_asked(tmp_path):
+    directory = str(tmp_path)
+    record(directory, ["раз", "два"])
+    replay = ReplaySource(directory, speed=0, loop=True)
+    replay.open()
+    assert [replay.listen(1, 5).transcript for _ in range(5)] == ["раз", "два", "раз", "два", "раз"]
+    assert not replay.exhausted
+
+def test_replay_keeps_recorded_pacing(tmp_path):
+    directory = str(tmp_path)
+    record(directory, ["раз"])
+    # Фраза "заканчивается" через offset + duration от начала записи
+    entries = load_manifest(directory)
+    entries[0]["offset"] = 0.2
+    with open(os.path.join(directory, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    replay = ReplaySource(directory, speed=2.0)
+    replay.open()
+    # До срока фразы - None по истечении timeout
+    assert replay.listen(0.05, 5) is None
+    started = time.time()
+    assert replay.listen(1, 5).transcript == "раз"
+    assert time.time() - started < 0.2
+
+def test_empty_corpus_is_exhausted(tmp_path):
+    replay = ReplaySource(str(tmp_path), speed=0)
+    replay.open()
+    assert replay.exhausted
+    assert replay.listen(1, 5) is None
+
+def test_transcript_recognizer_returns_transcript():
+    clip = AudioClip(b"", 16000, 2, transcript="статус камеры")
+    assert TranscriptRecognizer().recognize(clip) == "статус камеры"
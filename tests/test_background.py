@@ -0,0 +1,68 @@
+import threading
+
+from background import BackgroundExecutor
+
+class RecordingDispatcher:
+    """Очередь интерфейса: вызовы копятся до run()"""
+    def __init__(self):
+        self.posted = []
+
+    def post(self, callback, *args):
+        self.posted.append((callback, args))
+
+    def run(self):
+        posted, self.posted = self.posted, []
+        for callback, args in posted:
+            callback(*args)
+
+def test_result_is_delivered_through_dispatcher():
+    dispatcher = RecordingDispatcher()
+    executor = BackgroundExecutor(dispatcher)
+    results = []
+    started = threading.Event()
+    # Операция завершается уже после submit: обработчик зовется из рабочего потока
+    executor.submit(lambda: started.wait(2) and 6, on_done=results.append)
+    started.set()
+    executor.shutdown(wait=True)
+    assert results == []
+    dispatcher.run()
+    assert results == [6]
+    assert executor.get_stats()["completed"] == 1
+
+def test_error_goes_to_on_error():
+    executor = BackgroundExecutor()
+    errors = []
+    executor.submit(lambda: 1 / 0, on_done=errors.append, on_error=errors.append)
+    executor.shutdown(wait=True)
+    assert len(errors) == 1 and isinstance(errors[0], ZeroDivisionError)
+    assert executor.get_stats()["failed"] == 1
+
+def test_full_queue_rejects_new_operations():
+    release = threading.Event()
+    executor = BackgroundExecutor(max_workers=1, max_pending=1)
+    assert executor.submit(release.wait) is not None
+    assert executor.submit(release.wait) is not None
+    assert executor.submit(release.wait) is None
+    assert executor.get_stats()["rejected"] == 1
+    release.set()
+    executor.shutdown(wait=True)
+    # Завершенные операции освобождают места
+    executor = BackgroundExecutor(max_workers=1, max_pending=1)
+    for _ in range(5):
+        executor.submit(int).future.result(timeout=2)
+    executor.shutdown(wait=True)
+
+def test_cancelled_task_result_is_discarded():
+    release = threading.Event()
+    dispatcher = RecordingDispatcher()
+    executor = BackgroundExecutor(dispatcher, max_workers=1)
+    results = []
+    running = executor.submit(release.wait, on_done=results.append)
+    queued = executor.submit(int, on_done=results.append)
+    queued.cancel()
+    running.cancel()
+    release.set()
+    executor.shutdown(wait=True)
+    dispatcher.run()
+    assert results == []
+    assert executor.get_stats()["cancelled"] == 2
@@ -0,0 +1,53 @@
+from chat import ChatLog
+
+def make_log(tmp_path, max_lines=3):
+    return ChatLog(str(tmp_path / "chat.log"), max_lines=max_lines)
+
+def test_memory_is_bounded_and_older_lines_are_archived(tmp_path):
+    log = make_log(tmp_path)
+    for i in range(10):
+        log.append(f"сообщение {i}")
+    assert len(log.lines) == 3
+    assert log.archived_count == 7
+    assert log.total_lines == 10
+    log.close()
+
+def test_pages_span_archive_and_memory(tmp_path):
+    log = make_log(tmp_path)
+    for i in range(10):
+        log.append(f"сообщение {i}")
+    assert log.get_lines(5, 4) == [f"сообщение {i}" for i in range(5, 9)]
+    assert log.get_lines(0, 2) == ["сообщение 0", "сообщение 1"]
+    assert log.get_lines(8, 10) == ["сообщение 8", "сообщение 9"]
+    log.close()
+
+def test_multiline_message_takes_one_line(tmp_path):
+    log = make_log(tmp_path, max_lines=1)
+    log.append("первая\nвторая")
+    log.append("следующее")
+    assert log.get_lines(0, 2) == ["первая вторая", "следующее"]
+    log.close()
+
+def test_previous_session_is_kept(tmp_path):
+    first = make_log(tmp_path)
+    for i in range(5):
+        first.append(f"вчера {i}")
+    first.close()
+
+    second = make_log(tmp_path)
+    second.append("сегодня")
+    # Новый сеанс видит только свои строки
+    assert second.total_lines == 1
+    second.clear()
+    second.close()
+    with open(tmp_path / "chat.log", encoding="utf-8") as f:
+        assert f.read().splitlines() == [f"вчера {i}" for i in range(5)]
+
+def test_close_archives_lines_in_memory(tmp_path):
+    log = make_log(tmp_path, max_lines=100)
+    log.append("раз")
+    log.append("два")
+    log.close()
+    log.close()
+    with open(tmp_path / "chat.log", encoding="utf-8") as f:
+        assert f.read().splitlines() == ["раз", "два"]
@@ -0,0 +1,108 @@
+from models import Analysis
+from patterns import CommandHistory, ICommand, StateCommand
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+class AddCommand(ICommand):
+    def __init__(self, counter, amount, size=100):
+        self.counter = counter
+        self.amount = amount
+        self.bytes = size
+
+    def execute(self):
+        self.counter.value += self.amount
+
+    def undo(self):
+        self.counter.value -= self.amount
+
+    def size(self):
+        return self.bytes
+
+class StateHolder:
+    def __init__(self):
+        self.state = None
+
+    def get_current_state(self):
+        return self.state
+
+    def restore_state(self, state):
+        self.state = state
+
+def run(history, counter, amounts, size=100):
+    for amount in amounts:
+        history.execute(AddCommand(counter, amount, size))
+
+def test_capacity_evicts_oldest_commands():
+    counter = Counter()
+    history = CommandHistory(capacity=3)
+    run(history, counter, [1, 10, 100, 1000, 10000])
+    stats = history.get_stats()
+    assert stats["undo_depth"] == 3
+    assert stats["evicted"] == 2
+    assert stats["bytes"] == 300
+    while history.undo():
+        pass
+    # Отменяются только три последние команды
+    assert counter.value == 11
+
+def test_byte_budget_evicts_oldest_commands():
+    counter = Counter()
+    history = CommandHistory(capacity=100, max_bytes=250)
+    run(history, counter, [1, 2, 3, 4])
+    assert history.get_stats() == {"undo_depth": 2, "redo_depth": 0, "bytes": 200, "evicted": 2}
+
+def test_oversized_command_is_not_kept():
+    counter = Counter()
+    history = CommandHistory(max_bytes=50)
+    run(history, counter, [5])
+    assert counter.value == 5
+    assert not history.can_undo()
+    assert history.get_stats()["bytes"] == 0
+
+def test_new_command_drops_redo_stack_and_its_bytes():
+    counter = Counter()
+    history = CommandHistory()
+    run(history, counter, [1, 2, 3])
+    assert history.undo() and history.undo()
+    assert history.get_stats()["redo_depth"] == 2
+    history.execute(AddCommand(counter, 10))
+    assert history.get_stats() == {"undo_depth": 2, "redo_depth": 0, "bytes": 200, "evicted": 0}
+    assert not history.redo()
+    assert counter.value == 11
+
+def test_undo_redo_round_trip():
+    counter = Counter()
+    history = CommandHistory()
+    run(history, counter, [1, 2])
+    assert history.undo()
+    assert counter.value == 1
+    assert history.redo()
+    assert counter.value == 3
+    assert not history.redo()
+
+def test_state_command_restores_states_from_field_changes():
+    holder = StateHolder()
+    history = CommandHistory(capacity=2)
+    states = [Analysis(id="a", result=f"result {i}", confidence=i / 10) for i in range(4)]
+    for state in states:
+        history.execute(StateCommand(holder, state))
+    assert holder.state == states[3]
+    assert history.undo()
+    assert holder.state == states[2]
+    assert history.undo()
+    assert holder.state == states[1]
+    # Команда первого состояния вытеснена: дальше отменять нечего
+    assert not history.undo()
+    assert history.redo() and history.redo()
+    assert holder.state == states[3]
+
+def test_clear_resets_counters():
+    counter = Counter()
+    history = CommandHistory()
+    run(history, counter, [1, 2])
+    history.undo()
+    history.clear()
+    assert history.get_stats()["bytes"] == 0
+    assert not history.can_undo() and not history.can_redo()
@@ -0,0 +1,79 @@
+from dataclasses import replace
+
+from controllers import DeviceController
+from device_index import STATUS_REBUILD_BATCH, DeviceSearchIndex
+from models import Device, DeviceRepository
+
+def device(device_id, name, device_type="Освещение", status="Активно", aliases=None):
+    return Device(device_id, name, device_type, status, f"192.168.0.{device_id}", aliases or [])
+
+def sample():
+    return [device("1", "Лампа кухня"),
+            device("2", "Камера двор", "Безопасность", "Неактивно"),
+            device("3", "Лампа спальня", status="Неактивно", aliases=["ночник"]),
+            device("4", "Термостат", "Климат")]
+
+def test_short_query_matches_word_prefix():
+    index = DeviceSearchIndex(sample())
+    assert index.search("ла") == {"1", "3"}
+    # Префикс слова, а не подстрока в середине
+    assert index.search("мп") == set()
+    assert index.search("  ") is None
+
+def test_long_query_matches_substring_in_any_field():
+    index = DeviceSearchIndex(sample())
+    assert index.search("ампа") == {"1", "3"}
+    assert index.search("Ночник") == {"3"}
+    assert index.search("безопасность") == {"2"}
+    assert index.search("168.0.4") == {"4"}
+    assert index.search("лампа двор") == set()
+    assert index.search("xyz") == set()
+
+def test_ordered_by_column_and_filter():
+    index = DeviceSearchIndex(sample())
+    assert index.ordered("name") == ["2", "1", "3", "4"]
+    assert index.ordered("name", descending=True) == ["4", "3", "1", "2"]
+    assert index.ordered("name", ids={"3", "1"}) == ["1", "3"]
+
+def test_add_and_remove_keep_index_consistent():
+    index = DeviceSearchIndex(sample())
+    index.add(device("5", "Лампа гостиная"))
+    assert index.search("лампа") == {"1", "3", "5"}
+    index.add(device("1", "Розетка кухня", "Электрика"))
+    assert index.search("лампа") == {"3", "5"}
+    assert index.search("розетка") == {"1"}
+    index.remove("3")
+    index.remove("нет такого")
+    assert index.search("ночник") == set()
+    assert "3" not in index.ordered("status")
+
+def test_update_statuses_resorts_status_column():
+    index = DeviceSearchIndex(sample())
+    index.update_statuses([replace(index.devices["1"], status="Неактивно"),
+                           replace(index.devices["2"], status="Активно"),
+                           device("99", "Неизвестное")])
+    assert index.ordered("status") == ["2", "4", "1", "3"]
+    assert "99" not in index.devices
+
+def test_large_status_batch_rebuilds_column():
+    devices = [device(str(i), f"Лампа {i}") for i in range(STATUS_REBUILD_BATCH * 2)]
+    index = DeviceSearchIndex(devices)
+    index.update_statuses([replace(d, status="Неактивно") for d in devices[::2]])
+    statuses = [index.devices[i].status for i in index.ordered("status")]
+    assert statuses == sorted(statuses, key=str.lower)
+    assert statuses.count("Неактивно") == STATUS_REBUILD_BATCH
+
+def test_filter_device_ids_returns_copies(tmp_path):
+    repo = DeviceRepository(str(tmp_path / "devices.json"))
+    controller = DeviceController(repo)
+    for item in sample():
+        repo.save(item)
+    assert controller.filter_device_ids() is None
+    assert controller.filter_device_ids(status="Неактивно") == {"2", "3"}
+    assert controller.filter_device_ids(device_type="Освещение") == {"1", "3"}
+    ids = controller.filter_device_ids(status="Неактивно", device_type="Освещение")
+    assert ids == {"3"}
+    # Результат - копия, изменения репозитория его не затрагивают
+    ids = controller.filter_device_ids(status="Активно")
+    controller.apply_statuses({"4": "Неактивно"})
+    assert ids == {"1", "4"}
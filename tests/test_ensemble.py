@@ -0,0 +1,125 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from controllers import AnalysisController
+from ensemble import FALLBACK, FIRST_ACCEPTABLE, WEIGHTED, EnsembleStrategy
+from models import Analysis, Request, RequestRepository
+from patterns import IAnalysisStrategy
+
+class Fixed(IAnalysisStrategy):
+    def __init__(self, result, confidence, intent=None, delay=0.0):
+        self.result = result
+        self.confidence = confidence
+        self.intent = intent
+        self.delay = delay
+
+    def analyze_data(self, data):
+        if self.delay:
+            time.sleep(self.delay)
+        return Analysis(id=self.result, result=self.result, confidence=self.confidence, intent=self.intent)
+
+class Blocking(IAnalysisStrategy):
+    """Стратегия, работающая до release"""
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def analyze_data(self, data):
+        self.calls += 1
+        self.release.wait(5)
+        return Analysis(id="slow", result="медленно", confidence=1.0)
+
+class Failing(IAnalysisStrategy):
+    def analyze_data(self, data):
+        raise RuntimeError("сбой")
+
+@pytest.fixture
+def ensembles():
+    created = []
+
+    def make(*args, **kwargs):
+        ensemble = EnsembleStrategy(*args, **kwargs)
+        created.append(ensemble)
+        return ensemble
+
+    yield make
+    for ensemble in created:
+        ensemble.shutdown()
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        EnsembleStrategy([], policy="majority")
+
+def test_first_acceptable_answers_without_waiting(ensembles):
+    slow = Blocking()
+    ensemble = ensembles([Fixed("слабо", 0.2), Fixed("уверенно", 0.9), slow], FIRST_ACCEPTABLE, deadline=2)
+    started = time.perf_counter()
+    assert ensemble.analyze_data([]).result == "уверенно"
+    assert time.perf_counter() - started < 1
+    slow.release.set()
+
+def test_weighted_vote_uses_supporters_confidence(ensembles):
+    ensemble = ensembles([Fixed("вкл A", 0.6, "turn_on"), Fixed("вкл B", 0.8, "turn_on"),
+                          Fixed("выкл", 0.9, "turn_off"), Fixed("статистика", 0.99)],
+                         WEIGHTED, deadline=2)
+    analysis = ensemble.analyze_data([])
+    # Два голоса за включение перевешивают один уверенный; статистика воздерживается
+    assert analysis.intent == "turn_on" and analysis.result == "вкл B"
+    assert analysis.confidence == 0.7
+    assert analysis.id == "ens_1"
+
+def test_weights_change_the_vote(ensembles):
+    ensemble = ensembles([Fixed("вкл", 0.6, "turn_on"), Fixed("выкл", 0.5, "turn_off")],
+                         WEIGHTED, deadline=2, weights=[1.0, 3.0])
+    assert ensemble.analyze_data([]).intent == "turn_off"
+
+def test_fallback_prefers_confident_primary(ensembles):
+    ensemble = ensembles([Fixed("основная", 0.7, delay=0.05), Fixed("запасная", 0.95)], FALLBACK, deadline=2)
+    assert ensemble.analyze_data([]).result == "основная"
+    unsure = ensembles([Fixed("основная", 0.3), Fixed("запасная", 0.6, delay=0.05)], FALLBACK, deadline=2)
+    assert unsure.analyze_data([]).result == "запасная"
+
+def test_deadline_bounds_answer_and_skips_abandoned_strategy(ensembles):
+    slow = Blocking()
+    ensemble = ensembles([slow, Fixed("быстро", 0.6), Failing()], WEIGHTED, deadline=0.1)
+    started = time.perf_counter()
+    assert ensemble.analyze_data([]).result == "быстро"
+    assert time.perf_counter() - started < 1
+    # Брошенная задача еще работает - стратегия пропускается, а не ставится снова
+    assert ensemble.analyze_data([]).result == "быстро"
+    assert slow.calls == 1
+    stats = ensemble.get_stats()
+    assert stats["0:Blocking"]["timeouts"] == 1 and stats["0:Blocking"]["skipped"] == 1
+    assert stats["2:Failing"]["errors"] == 2
+    slow.release.set()
+    time.sleep(0.05)
+    ensemble.analyze_data([])
+    assert slow.calls == 2
+
+def test_nothing_in_time_gives_zero_confidence(ensembles):
+    slow = Blocking()
+    analysis = ensembles([slow], WEIGHTED, deadline=0.05).analyze_data([])
+    assert analysis.confidence == 0.0
+    slow.release.set()
+
+def test_shared_executor_is_left_to_its_owner():
+    pool = ThreadPoolExecutor(max_workers=2)
+    ensemble = EnsembleStrategy([Fixed("да", 0.9)], executor=pool)
+    ensemble.analyze_data([])
+    ensemble.shutdown()
+    assert pool.submit(int).result() == 0
+    pool.shutdown()
+
+def test_controller_ensembles_share_one_pool():
+    controller = AnalysisController(RequestRepository())
+    request = Request(id="req", language="ru", purpose="статус", recognition_accuracy=100)
+    analysis = controller.perform_ensemble_analysis(request, [Fixed("да", 0.9)], FIRST_ACCEPTABLE)
+    assert analysis.result == "да"
+    pool = controller.ensemble_executor()
+    controller.perform_ensemble_analysis(request, [Fixed("да", 0.9)])
+    assert controller.ensemble_executor() is pool
+    controller.shutdown()
+    assert controller.ensemble_pool is None
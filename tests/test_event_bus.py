@@ -0,0 +1,139 @@
+import gc
+import threading
+import time
+
+import pytest
+
+from event_bus import BACKGROUND, DEVICE, SYNC, UI, EventBus, Topic, latest
+from models import Device
+
+class RecordingDispatcher:
+    """Очередь потока интерфейса: вызовы копятся до run()"""
+    def __init__(self):
+        self.posted = []
+
+    def post(self, callback, *args):
+        self.posted.append((callback, args))
+
+    def run(self):
+        posted, self.posted = self.posted, []
+        for callback, args in posted:
+            callback(*args)
+
+class View:
+    def __init__(self):
+        self.events = []
+
+    def update(self, event):
+        self.events.append(event)
+
+def updated(device_id, status):
+    return {"type": "device_updated", "device": Device(device_id, "Лампа", "актуатор", status, "")}
+
+def publish_from_worker(bus, topic, events):
+    # Публикация из рабочего потока - подписчики UI получают события через очередь
+    thread = threading.Thread(target=lambda: [bus.publish(topic, event) for event in events])
+    thread.start()
+    thread.join()
+
+def test_ui_subscriber_gets_events_in_ui_thread_queue():
+    dispatcher = RecordingDispatcher()
+    bus = EventBus(dispatcher)
+    view = View()
+    bus.subscribe(DEVICE, view, UI)
+    publish_from_worker(bus, DEVICE, [{"type": "device_deleted", "device_id": str(i)} for i in range(3)])
+    assert view.events == [] and len(dispatcher.posted) == 1
+    dispatcher.run()
+    assert [event["device_id"] for event in view.events] == ["0", "1", "2"]
+    # Из потока интерфейса - сразу
+    bus.publish(DEVICE, {"type": "device_deleted", "device_id": "3"})
+    assert len(view.events) == 4
+
+def test_updates_of_one_device_coalesce():
+    dispatcher = RecordingDispatcher()
+    bus = EventBus(dispatcher)
+    view = View()
+    bus.subscribe(DEVICE, view)
+    publish_from_worker(bus, DEVICE, [updated("1", "online"), updated("2", "online"),
+                                      updated("1", "offline")])
+    dispatcher.run()
+    assert [(e["device"].id, e["device"].status) for e in view.events] == [("2", "online"), ("1", "offline")]
+    assert bus.get_stats()["coalesced"] == 1
+
+def test_overflow_drops_oldest_and_queues_resync_last():
+    dispatcher = RecordingDispatcher()
+    bus = EventBus(dispatcher, max_queue=3)
+    view = View()
+    bus.subscribe(DEVICE, view)
+    publish_from_worker(bus, DEVICE, [{"type": "device_deleted", "device_id": str(i)} for i in range(6)])
+    dispatcher.run()
+    assert [event.get("device_id", event["type"]) for event in view.events] == ["4", "5", "devices_resync"]
+    assert bus.get_stats()["dropped"] == 4
+
+def test_topic_without_overflow_event_just_drops():
+    dispatcher = RecordingDispatcher()
+    bus = EventBus(dispatcher)
+    topic = Topic("numbers", int)
+    received = []
+    bus.subscribe(topic, received.append, max_queue=2)
+    publish_from_worker(bus, topic, [1, 2, 3, 4])
+    dispatcher.run()
+    assert received == [3, 4]
+
+def test_payload_type_is_checked():
+    bus = EventBus()
+    with pytest.raises(TypeError):
+        bus.publish(DEVICE, "не словарь")
+
+def test_collected_subscriber_is_dropped():
+    bus = EventBus()
+    view = View()
+    bus.subscribe(DEVICE, view, SYNC)
+    del view
+    gc.collect()
+    bus.publish(DEVICE, {"type": "device_deleted", "device_id": "1"})
+    stats = bus.get_stats()
+    assert stats["collected"] == 1 and stats["subscribers"] == 0
+
+def test_failing_subscriber_does_not_stop_others(capsys):
+    bus = EventBus()
+    received = []
+    bus.subscribe(DEVICE, lambda event: 1 / 0, SYNC)
+    bus.subscribe(DEVICE, received.append, SYNC)
+    bus.publish(DEVICE, {"type": "device_deleted", "device_id": "1"})
+    assert len(received) == 1
+    assert bus.get_stats()["failed"] == 1
+    assert "Ошибка подписчика темы device" in capsys.readouterr().out
+
+def test_background_subscriber_runs_off_publishing_thread():
+    bus = EventBus()
+    topic = Topic("numbers", int, latest)
+    threads = []
+    done = threading.Event()
+
+    def slow(value):
+        threads.append((threading.get_ident(), value))
+        time.sleep(0.05)
+        done.set()
+
+    bus.subscribe(topic, slow, BACKGROUND)
+    started = time.perf_counter()
+    for value in range(5):
+        bus.publish(topic, value)
+    assert time.perf_counter() - started < 0.05
+    assert done.wait(2)
+    time.sleep(0.1)
+    bus.shutdown()
+    assert all(ident != threading.get_ident() for ident, _ in threads)
+    # Ключ latest: медленный подписчик получает последнее значение, а не все подряд
+    assert threads[-1][1] == 4 and len(threads) < 5
+
+def test_unsubscribed_queue_is_not_delivered():
+    dispatcher = RecordingDispatcher()
+    bus = EventBus(dispatcher)
+    view = View()
+    subscription = bus.subscribe(DEVICE, view)
+    publish_from_worker(bus, DEVICE, [{"type": "device_deleted", "device_id": "1"}])
+    bus.unsubscribe(subscription)
+    dispatcher.run()
+    assert view.events == []
@@ -0,0 +1,52 @@
+import pytest
+
+from controllers import DeviceController
+from fuzzy_index import FuzzyDeviceIndex, edit_distance, phonetic_key
+from models import Device, DeviceRepository
+
+@pytest.fixture
+def controller(tmp_path):
+    repo = DeviceRepository(str(tmp_path / "devices.json"))
+    for device in [Device("1", "Лампа кухня", "актуатор", "offline", "", ["свет на кухне"]),
+                   Device("2", "Термостат", "сенсор", "online", ""),
+                   Device("3", "Камера 1", "камера", "online", ""),
+                   Device("4", "Камера 2", "камера", "online", "")]:
+        repo.save(device)
+    return DeviceController(repo)
+
+def test_phonetic_key_merges_similar_spellings():
+    assert phonetic_key("Ламмпо") == phonetic_key("лампа")
+    assert phonetic_key("Дверь") == phonetic_key("тферь")
+    # Цифры в номерах не сливаются
+    assert phonetic_key("камера 11") != phonetic_key("камера 1")
+
+def test_edit_distance_stops_past_limit():
+    assert edit_distance("kitten", "sitting", 5) == 3
+    assert edit_distance("abc", "abcdefgh", 2) == 3
+
+def test_misspelled_name_is_found(controller):
+    index = FuzzyDeviceIndex(controller)
+    assert index.lookup("термастат") == [("2", "Термостат", 1.0)]
+    device_id, name, score = index.lookup("лампу кухни")[0]
+    assert (device_id, name) == ("1", "Лампа кухня") and 0.5 < score < 1.0
+    assert index.lookup("совсем другое") == []
+
+def test_exact_number_ranks_first(controller):
+    index = FuzzyDeviceIndex(controller)
+    results = index.lookup("камера 1")
+    assert [device_id for device_id, _, _ in results] == ["3", "4"]
+    assert results[0][2] > results[1][2]
+
+def test_resolve_scans_phrase_fragments(controller):
+    index = FuzzyDeviceIndex(controller)
+    assert index.resolve("включи пожалуйста лампу на кухни")[0][:2] == ("1", "Лампа кухня")
+
+def test_index_follows_device_events(controller):
+    index = FuzzyDeviceIndex(controller)
+    controller.delete_device("2")
+    assert index.lookup("термостат") == []
+    controller.update_device(Device("1", "Чайник", "актуатор", "offline", ""))
+    assert index.lookup("лампа кухня") == []
+    assert index.lookup("чайник") == [("1", "Чайник", 1.0)]
+    # Все записи удаленных названий убраны из триграмм
+    assert all(key in index.keys for postings in index.grams.values() for key in postings)
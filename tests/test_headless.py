@@ -0,0 +1,29 @@
+import io
+
+import pytest
+
+from headless import HeadlessRuntime
+
+@pytest.fixture
+def runtime(tmp_path, monkeypatch):
+    # Репозитории пишут json в текущий каталог
+    monkeypatch.chdir(tmp_path)
+    runtime = HeadlessRuntime()
+    yield runtime
+    runtime.shutdown()
+
+def test_command_goes_through_whole_chain(runtime):
+    response = runtime.process_command("включи все датчики")
+    assert response.message == "Ответ: Включить: сенсор"
+    assert runtime.processed == 1
+
+def test_stdin_answers_each_nonempty_line(runtime):
+    out = io.StringIO()
+    runtime.serve_stdin(io.StringIO("статус\n\nвыключи все датчики\n"), out)
+    assert out.getvalue().splitlines() == ["Ответ: Показать состояние: устройство",
+                                           "Ответ: Выключить: сенсор"]
+    assert runtime.processed == 2
+
+def test_submitted_command_resolves_through_pipeline(runtime):
+    future = runtime.submit_command("выключи все датчики", "socket")
+    assert future.result(timeout=10).message == "Ответ: Выключить: сенсор"
@@ -0,0 +1,43 @@
+import pytest
+
+from models import DataWindow, Request
+from patterns import MachineLearningStrategy
+from sensor_statistics import numpy_available
+
+needs_numpy = pytest.mark.skipif(not numpy_available(), reason="NumPy не установлен")
+
+def request(text):
+    return Request(id="req", language="ru", purpose=text, recognition_accuracy=100)
+
+def test_without_model_intent_comes_from_command_verb(tmp_path):
+    # В каталоге нет модели, а обучается только модель по умолчанию
+    strategy = MachineLearningStrategy(str(tmp_path))
+    analyses = strategy.analyze_batch([[request("включи датчики")], [request("Погаси свет")],
+                                       [request("как дела")], [DataWindow("temperature", [])]])
+    assert [analysis.intent for analysis in analyses] == ["turn_on", "turn_off", None, None]
+    assert analyses[0].confidence == MachineLearningStrategy.KEYWORD_CONFIDENCE
+    assert analyses[0].device_type == "сенсор"
+    assert analyses[2].result == "Намерение не распознано"
+
+@needs_numpy
+def test_fingerprint_changes_once_model_is_loaded(tmp_path):
+    import intent_model
+    strategy = MachineLearningStrategy(str(tmp_path / "model"))
+    data = [request("включи датчики")]
+    before = strategy.fingerprint(data)
+    model = intent_model.train(intent_model.load_examples(), epochs=5)
+    model.save(str(tmp_path / "model"))
+    assert strategy.get_model(block=True) is not None
+    assert strategy.fingerprint(data) != before
+
+@needs_numpy
+def test_trained_model_classifies_requests(tmp_path):
+    import intent_model
+    examples = intent_model.load_examples()
+    model = intent_model.train(examples)
+    assert intent_model.evaluate(model, examples) > 0.9
+    model.save(str(tmp_path))
+    strategy = MachineLearningStrategy(str(tmp_path))
+    analysis = strategy.analyze_data([request("включи датчики")])
+    assert analysis.intent == "turn_on"
+    assert 0.0 < analysis.confidence <= 1.0
@@ -0,0 +1,71 @@
+import pytest
+
+from controllers import DeviceController
+from event_bus import DEVICE
+from intents import IntentParser, PatternAutomaton, apply_intent, normalize
+from models import Device, DeviceRepository
+
+@pytest.fixture
+def controller(tmp_path):
+    repo = DeviceRepository(str(tmp_path / "devices.json"))
+    for device in [Device("1", "Лампа кухня", "актуатор", "offline", "", ["свет на кухне"]),
+                   Device("2", "Лампа", "актуатор", "offline", ""),
+                   Device("3", "Датчик двери", "сенсор", "online", ""),
+                   Device("4", "Датчик окна", "сенсор", "offline", "")]:
+        repo.save(device)
+    return DeviceController(repo)
+
+def test_automaton_finds_overlapping_and_nested_patterns():
+    automaton = PatternAutomaton(["he", "she", "his", "hers"])
+    assert sorted(automaton.find("ushers")) == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+    assert automaton.find("xyz") == []
+    assert len(automaton) == 4
+
+def test_automaton_accepts_patterns_after_build():
+    automaton = PatternAutomaton(["лампа"])
+    automaton.add("амп")
+    automaton.add("")
+    automaton.build()
+    assert sorted(automaton.find("лампа")) == [(0, 5, "лампа"), (1, 4, "амп")]
+
+def test_normalize_flattens_case_punctuation_and_yo():
+    assert normalize("  Включи,   ЁЛКУ!") == "включи елку"
+
+def test_parse_prefers_longest_device_name(controller):
+    parser = IntentParser(controller)
+    intent = parser.parse("Включи лампа кухня, пожалуйста")
+    assert intent.action == "turn_on"
+    assert intent.device_ids == ["1"]
+    assert parser.parse("выключи свет на кухне").device_ids == ["1"]
+    assert parser.parse("статус лампа").device_ids == ["2"]
+
+def test_parse_by_device_type_and_without_verb(controller):
+    parser = IntentParser(controller)
+    intent = parser.parse("выключи все датчики")
+    assert intent.device_ids == [] and intent.device_type == "сенсор"
+    assert parser.parse("лампа кухня") is None
+    # Слово должно совпасть целиком
+    assert parser.parse("включи лампадку").device_ids == []
+
+def test_parser_follows_device_events(controller):
+    parser = IntentParser(controller, delta_limit=1)
+    controller.add_device(Device("5", "Чайник", "актуатор", "offline", ""))
+    assert parser.parse("включи чайник").device_ids == ["5"]
+    controller.delete_device("5")
+    assert parser.parse("включи чайник").device_ids == []
+    controller.add_device(Device("6", "Утюг", "актуатор", "offline", ""))
+    controller.add_device(Device("7", "Фен", "актуатор", "offline", ""))
+    # Дополнительный автомат превысил delta_limit - основной пересобран
+    assert "утюг" in parser.main.patterns and parser.delta.patterns == {"фен"}
+    assert parser.parse("включи фен").device_ids == ["7"]
+
+def test_apply_intent_changes_type_in_one_batch(controller):
+    parser = IntentParser(controller)
+    events = []
+    controller.get_bus().subscribe(DEVICE, events.append)
+    reply = apply_intent(parser.parse("включи датчики"), controller)
+    assert reply == "Включено: Датчик двери, Датчик окна (изменено 1)"
+    assert [event["type"] for event in events] == ["devices_updated"]
+    assert controller.get_device_by_id("4").status == "online"
+    assert apply_intent(parser.parse("статус датчик окна"), controller) == "Состояние: Датчик окна: online"
+    assert apply_intent(parser.parse("включи"), controller) == "Не понял, к какому устройству относится команда"
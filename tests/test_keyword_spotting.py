@@ -0,0 +1,63 @@
+import json
+import os
+
+from audio_sources import MANIFEST_NAME, AudioClip, write_wav
+from keyword_spotting import IKeywordSpotter, TranscriptKeywordSpotter, WakeWordGate, evaluate_spotter
+
+def clip(text):
+    return AudioClip(b"\x00\x00" * 100, 16000, 2, transcript=text)
+
+class UnavailableSpotter(IKeywordSpotter):
+    available = False
+
+    def detect(self, clip):
+        return False
+
+def test_gate_opens_window_after_wake_phrase():
+    gate = WakeWordGate(TranscriptKeywordSpotter("привет дом"), window=60)
+    assert not gate.accept(clip("включи свет"))
+    assert gate.accept(clip("Привет дом"))
+    assert gate.accept(clip("включи свет"))
+    stats = gate.get_stats()
+    assert stats["wake_detections"] == 1
+    assert stats["forwarded"] == 2
+    assert stats["avoided_recognitions"] == 1
+
+def test_wake_clip_can_be_withheld():
+    gate = WakeWordGate(TranscriptKeywordSpotter("привет дом"), forward_wake_clip=False)
+    assert not gate.accept(clip("привет дом"))
+    assert gate.accept(clip("включи свет"))
+
+def test_window_is_per_source_and_expires():
+    gate = WakeWordGate(TranscriptKeywordSpotter("привет дом"), window=0)
+    assert gate.accept(clip("привет дом"), "кухня")
+    assert not gate.accept(clip("включи свет"), "спальня")
+    # Окно нулевой длины уже закрыто
+    assert not gate.accept(clip("включи свет"), "кухня")
+
+def test_unavailable_spotter_lets_everything_through(capsys):
+    gate = WakeWordGate(UnavailableSpotter())
+    assert all(gate.accept(clip("включи свет")) for _ in range(3))
+    # Сообщение - один раз, а не на каждую фразу
+    assert capsys.readouterr().out.count("недоступен") == 1
+    assert gate.get_stats()["forwarded"] == 3
+
+def test_evaluate_spotter_counts_errors(tmp_path):
+    directory = str(tmp_path)
+    entries = []
+    for i, (text, wake) in enumerate([("привет дом", True), ("включи свет", False),
+                                       ("привет дом включи", True), ("здравствуй дом", True),
+                                       ("привет домик", False)]):
+        name = f"{i:05d}.wav"
+        write_wav(os.path.join(directory, name), clip(text))
+        entries.append({"file": name, "transcript": text, "wake": wake})
+    with open(os.path.join(directory, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False)
+
+    results = evaluate_spotter(TranscriptKeywordSpotter("привет дом"), directory, "привет дом")
+    assert results["clips"] == 5
+    assert results["true_accepts"] == 2
+    assert results["false_accepts"] == 1
+    assert results["false_rejects"] == 1
+    assert results["false_accept_rate"] == 0.5
+    assert results["false_reject_rate"] == 1 / 3
@@ -0,0 +1,59 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from phrase_queue import DROP_NEWEST, DROP_OLDEST, PhraseQueue
+from speech_recognition_module import RecognizedPhrase
+
+def phrase(text, source="default"):
+    return RecognizedPhrase(text, source, 0.0, 0.0)
+
+def drain(phrases):
+    items = []
+    while not phrases.empty():
+        items.append(phrases.get_nowait())
+    return items
+
+def test_drop_oldest_keeps_latest_phrases():
+    phrases = PhraseQueue(maxsize=2, policy=DROP_OLDEST)
+    assert all(phrases.put(text) for text in ["раз", "два", "три"])
+    assert drain(phrases) == ["два", "три"]
+    assert phrases.get_stats()["dropped_oldest"] == 1
+
+def test_drop_newest_rejects_new_phrases():
+    phrases = PhraseQueue(maxsize=2, policy=DROP_NEWEST)
+    assert [phrases.put(text) for text in ["раз", "два", "три"]] == [True, True, False]
+    assert drain(phrases) == ["раз", "два"]
+    assert phrases.get_stats()["dropped_newest"] == 1
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        PhraseQueue(policy="drop_random")
+
+def test_duplicates_coalesce_per_source():
+    phrases = PhraseQueue(coalesce_duplicates=True)
+    assert phrases.put(phrase("включи свет", "кухня"))
+    assert not phrases.put(phrase("включи свет", "кухня"))
+    assert phrases.put(phrase("включи свет", "спальня"))
+    assert [(item.text, item.source) for item in drain(phrases)] == [
+        ("включи свет", "кухня"), ("включи свет", "спальня")]
+    assert phrases.get_stats()["coalesced"] == 1
+    # Повтор уже выданной фразы - новая команда
+    assert phrases.put(phrase("включи свет", "кухня"))
+
+def test_stale_phrases_expire():
+    phrases = PhraseQueue(expire_after=0.05)
+    phrases.put("раз")
+    time.sleep(0.1)
+    phrases.put("два")
+    assert drain(phrases) == ["два"]
+    assert phrases.get_stats()["expired"] == 1
+
+def test_get_times_out_and_wakes_on_put():
+    phrases = PhraseQueue()
+    with pytest.raises(queue.Empty):
+        phrases.get(timeout=0.01)
+    threading.Timer(0.05, phrases.put, args=("раз",)).start()
+    assert phrases.get(timeout=2) == "раз"
@@ -0,0 +1,79 @@
+import queue
+import threading
+
+from models import Analysis, Decision, Response
+from pipeline import PipelineJob, PipelineStage, RequestPipeline
+
+class RequestController:
+    def create_request(self, sound, sensor_data, purpose):
+        return purpose
+
+class AnalysisController:
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def perform_analysis_batch(self, requests):
+        with self.lock:
+            self.batches.append(len(requests))
+        if "сбой" in requests:
+            raise RuntimeError("сбой анализа")
+        return [Analysis(id="a", result=text.upper(), confidence=1.0) for text in requests]
+
+class DecisionController:
+    def make_decision(self, analysis):
+        return Decision(id="d", language="ru", message=analysis.result)
+
+class ResponseController:
+    def generate_response(self, decision):
+        return Response(id="r", language="ru", message=f"Ответ: {decision.message}")
+
+def controllers():
+    return {'request': RequestController(), 'analysis': AnalysisController(),
+            'decision': DecisionController(), 'response': ResponseController()}
+
+def test_every_command_gets_its_own_response():
+    pipeline = RequestPipeline(controllers())
+    pipeline.start()
+    futures = {text: pipeline.submit(text) for text in [f"команда {i}" for i in range(50)]}
+    for text, future in futures.items():
+        assert future.result(timeout=5).message == f"Ответ: {text.upper()}"
+    pipeline.stop()
+    assert all(stats["processed"] == 50 for stats in pipeline.get_stats().values())
+
+def test_analysis_receives_batches():
+    parts = controllers()
+    pipeline = RequestPipeline(parts, analysis_batch=8, batch_wait=0.05, analysis_workers=1)
+    futures = [pipeline.submit(f"команда {i}") for i in range(16)]
+    # Очередь заполнена до запуска - ступень анализа берет ее пачками
+    pipeline.start()
+    for future in futures:
+        future.result(timeout=5)
+    pipeline.stop()
+    assert max(parts['analysis'].batches) > 1
+    assert sum(parts['analysis'].batches) == 16
+
+def test_failed_batch_fails_only_its_futures():
+    pipeline = RequestPipeline(controllers(), analysis_batch=1)
+    pipeline.start()
+    failed = pipeline.submit("сбой")
+    ok = pipeline.submit("команда")
+    assert isinstance(failed.exception(timeout=5), RuntimeError)
+    assert ok.result(timeout=5).message == "Ответ: КОМАНДА"
+    pipeline.stop()
+    assert pipeline.get_stats()["analysis"]["failed"] == 1
+
+def test_submit_gives_up_when_input_is_full():
+    pipeline = RequestPipeline(controllers(), queue_size=1)
+    assert pipeline.submit("раз") is not None
+    assert pipeline.submit("два", timeout=0.01) is None
+
+def test_stage_finishes_queued_jobs_on_stop():
+    input_queue, output_queue = queue.Queue(), queue.Queue()
+    stage = PipelineStage("echo", lambda batch: None, input_queue, output_queue, workers=2)
+    stage.start()
+    for i in range(10):
+        input_queue.put(PipelineJob(str(i), "test"))
+    stage.stop()
+    assert output_queue.qsize() == 10
+    assert stage.threads == []
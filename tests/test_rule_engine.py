@@ -0,0 +1,138 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from models import Analysis
+from rule_engine import RuleEngine, RuleSet, parse_rule
+
+def make_rules(*items):
+    return RuleSet([parse_rule(item, order) for order, item in enumerate(items)])
+
+def rule(rule_id, priority=0, **when):
+    return {"id": rule_id, "priority": priority, "when": when, "then": {"message": rule_id}}
+
+def at(hour, minute=0):
+    return hour * 60 + minute
+
+def matched(rules, hour, minute=0, intent="turn_on", device_type="лампа", confidence=0.9):
+    found = rules.match(intent, device_type, at(hour, minute), confidence)
+    return found.id if found else None
+
+# ---------------- Интервалы времени ----------------
+
+def test_overnight_window_wraps_past_midnight():
+    rules = make_rules(rule("night", time="22:00-06:00"))
+    assert matched(rules, 22) == "night"
+    assert matched(rules, 23, 59) == "night"
+    assert matched(rules, 0) == "night"
+    assert matched(rules, 5, 59) == "night"
+    assert matched(rules, 6) is None
+    assert matched(rules, 21, 59) is None
+    assert matched(rules, 12) is None
+
+def test_window_ending_at_midnight():
+    rules = make_rules(rule("late", time="22:00-00:00"))
+    assert rules.rules[0].hours() == [22, 23]
+    assert matched(rules, 22) == "late"
+    assert matched(rules, 23, 59) == "late"
+    assert matched(rules, 0) is None
+    assert matched(rules, 21, 59) is None
+
+def test_window_inside_one_day():
+    rules = make_rules(rule("evening", time="18:30-20:15"))
+    assert matched(rules, 18, 29) is None
+    assert matched(rules, 18, 30) == "evening"
+    assert matched(rules, 20, 14) == "evening"
+    assert matched(rules, 20, 15) is None
+
+def test_empty_window_is_rejected():
+    with pytest.raises(ValueError):
+        parse_rule(rule("empty", time="10:00-10:00"), 0)
+
+# ---------------- Приоритет и порядок ----------------
+
+def test_higher_priority_wins_regardless_of_order():
+    rules = make_rules(rule("general", intent="turn_on"),
+                       rule("special", priority=5, intent="turn_on"))
+    assert matched(rules, 12) == "special"
+
+def test_equal_priority_first_in_file_wins():
+    rules = make_rules(rule("first", intent="turn_on"), rule("second", intent="turn_on"))
+    assert matched(rules, 12) == "first"
+
+def test_priority_tie_across_buckets_keeps_file_order():
+    # Правила одного приоритета в разных списках таблицы: точный тип
+    # устройства не важнее "любого", решает порядок в файле
+    rules = make_rules(rule("any_device", intent="turn_on"),
+                       rule("lamp", intent="turn_on", device_type="лампа"))
+    assert matched(rules, 12) == "any_device"
+    rules = make_rules(rule("lamp", intent="turn_on", device_type="лампа"),
+                       rule("any_device", intent="turn_on"))
+    assert matched(rules, 12) == "lamp"
+
+def test_non_matching_higher_rank_falls_through():
+    rules = make_rules(rule("sure", priority=5, intent="turn_on", min_confidence=0.8),
+                       rule("unsure", intent="turn_on", max_confidence=0.8))
+    assert matched(rules, 12, confidence=0.9) == "sure"
+    assert matched(rules, 12, confidence=0.5) == "unsure"
+
+# ---------------- Значения "любое" ----------------
+
+def test_wildcard_rule_matches_any_intent_and_device():
+    rules = make_rules(rule("fallback"))
+    assert matched(rules, 3, intent="status", device_type="камера") == "fallback"
+    assert matched(rules, 3, intent=None, device_type=None) == "fallback"
+
+def test_specific_rule_is_not_used_for_other_values():
+    rules = make_rules(rule("camera", priority=5, device_type="камера"), rule("fallback"))
+    assert matched(rules, 12, device_type="камера") == "camera"
+    assert matched(rules, 12, device_type="лампа") == "fallback"
+    assert matched(rules, 12, device_type=None) == "fallback"
+
+def test_rule_lists_each_value_in_its_own_bucket():
+    rules = make_rules(rule("switch", intent=["turn_on", "turn_off"]))
+    assert matched(rules, 12, intent="turn_on") == "switch"
+    assert matched(rules, 12, intent="turn_off") == "switch"
+    assert matched(rules, 12, intent="status") is None
+
+# ---------------- Перезагрузка файла ----------------
+
+def write_rules(path, items):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"rules": items}, f, ensure_ascii=False)
+    # Подпись файла - время изменения и размер: сдвигаем время явно
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+def test_bad_reload_keeps_previous_rules(tmp_path, capsys):
+    path = str(tmp_path / "rules.json")
+    write_rules(path, [{"id": "on", "when": {"intent": "turn_on"}, "then": {"message": "Включить: {device_type}"}}])
+    engine = RuleEngine(path, check_interval=0)
+    analysis = Analysis(id="a", result="", confidence=0.9, intent="turn_on", device_type="лампа")
+    assert engine.evaluate(analysis, datetime(2024, 1, 1, 12))[1] == "Включить: лампа"
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"rules": [')
+    assert engine.reload() is False
+    assert engine.last_error
+    assert "Ошибка в файле правил" in capsys.readouterr().out
+    assert engine.evaluate(analysis, datetime(2024, 1, 1, 12))[1] == "Включить: лампа"
+
+    write_rules(path, [{"id": "bad", "when": {"time": "25:00-26:00"}, "then": {"message": "x"}}])
+    assert engine.reload() is False
+    assert engine.evaluate(analysis, datetime(2024, 1, 1, 12))[0].id == "on"
+
+    write_rules(path, [{"id": "off", "when": {"intent": "turn_on"}, "then": {"message": "Нельзя"}}])
+    assert engine.reload() is True
+    assert engine.last_error is None
+    assert engine.evaluate(analysis, datetime(2024, 1, 1, 12))[1] == "Нельзя"
+
+def test_unchanged_file_is_not_recompiled(tmp_path):
+    path = str(tmp_path / "rules.json")
+    write_rules(path, [rule("any")])
+    engine = RuleEngine(path, check_interval=0)
+    assert engine.reloads == 1
+    assert engine.reload() is False
+    assert engine.reloads == 1
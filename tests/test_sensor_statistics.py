@@ -0,0 +1,64 @@
+import math
+import random
+from array import array
+
+import pytest
+
+from models import DataWindow
+from patterns import StatisticalAnalysisStrategy
+from sensor_statistics import confidence, numpy_available, stats_to_dict, window_stats
+
+def series(count=500, spikes=(300, 450)):
+    rng = random.Random(7)
+    values = array('d', (20 + rng.uniform(-1, 1) for _ in range(count)))
+    for i in spikes:
+        values[i] += 25
+    return values
+
+def test_basic_statistics_match_definitions():
+    stats = window_stats("t", [1.0, 2.0, 3.0, 4.0, 5.0], use_numpy=False)
+    assert stats.count == 5 and stats.mean == 3.0
+    assert stats.std == pytest.approx(math.sqrt(2))
+    assert (stats.p5, stats.p50, stats.p95) == pytest.approx((1.2, 3.0, 4.8))
+    # Окно короче rolling - аномалии не проверяются
+    assert stats.checked == 0
+
+def test_spikes_are_anomalies_and_constant_series_is_not():
+    stats = window_stats("t", series(), rolling=60, use_numpy=False)
+    assert stats.checked == 440
+    assert stats.anomalies == 2
+    flat = window_stats("t", [5.0] * 100, rolling=10, use_numpy=False)
+    assert flat.anomalies == 0 and flat.last_z == 0.0
+
+def test_empty_window_has_no_data():
+    stats = window_stats("t", [])
+    assert stats.count == 0
+    assert stats.summary() == "t: нет данных"
+    assert confidence([stats]) == 0.0
+
+@pytest.mark.skipif(not numpy_available(), reason="NumPy не установлен")
+def test_numpy_and_python_agree():
+    values = series()
+    fast = stats_to_dict(window_stats("t", values, rolling=60, use_numpy=True))
+    slow = stats_to_dict(window_stats("t", values, rolling=60, use_numpy=False))
+    assert fast.keys() == slow.keys()
+    for key in fast:
+        assert fast[key] == pytest.approx(slow[key], rel=1e-6, abs=1e-9), key
+
+def test_confidence_grows_with_samples_and_drops_with_anomalies():
+    small = window_stats("t", series(100, ()), rolling=60, use_numpy=False)
+    large = window_stats("t", series(500, ()), rolling=60, use_numpy=False)
+    noisy = window_stats("t", series(500, range(100, 500, 10)), rolling=60, use_numpy=False)
+    assert confidence([small]) < confidence([large])
+    assert confidence([noisy]) < confidence([large])
+    # Общее доверие - по худшему ряду
+    assert confidence([small, large]) == confidence([small])
+
+def test_strategy_reports_every_window():
+    strategy = StatisticalAnalysisStrategy(rolling=60)
+    analysis = strategy.analyze_data([DataWindow("temperature", series(), 1),
+                                      DataWindow("humidity", [], 1)])
+    assert analysis.result.startswith("temperature: n=500")
+    assert "humidity: нет данных" in analysis.result
+    assert 0.0 < analysis.confidence < 1.0
+    assert strategy.analyze_data([]).confidence == 0.0
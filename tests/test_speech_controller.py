@@ -0,0 +1,107 @@
+import threading
+import time
+
+from audio_sources import AudioClip, IAudioSource, TranscriptRecognizer
+from speech_recognition_module import SpeechRecognitionController
+
+class PhraseSource(IAudioSource):
+    """Источник, выдающий фразы из списка, затем исчерпанный"""
+    def __init__(self, transcripts, delay=0.0):
+        self.transcripts = list(transcripts)
+        self.delay = delay
+        self.readers = 0
+        self.max_readers = 0
+        self.lock = threading.Lock()
+
+    @property
+    def exhausted(self):
+        return not self.transcripts
+
+    def open(self):
+        with self.lock:
+            self.readers += 1
+            self.max_readers = max(self.max_readers, self.readers)
+
+    def listen(self, timeout, phrase_time_limit):
+        if self.delay:
+            time.sleep(self.delay)
+        if not self.transcripts:
+            return None
+        return AudioClip(b"\x00\x00", 16000, 2, transcript=self.transcripts.pop(0),
+                         captured_at=time.time())
+
+    def close(self):
+        with self.lock:
+            self.readers -= 1
+
+class EndlessSource(PhraseSource):
+    def __init__(self, delay):
+        super().__init__([], delay)
+
+    @property
+    def exhausted(self):
+        return False
+
+def drain(controller):
+    results = []
+    while True:
+        result = controller.get_next_result(timeout=0)
+        if result is None:
+            return results
+        results.append(result)
+
+def test_named_sources_share_recognition_pool():
+    controller = SpeechRecognitionController(recognizer=TranscriptRecognizer(), pool_size=2)
+    controller.add_source("кухня", PhraseSource(["включи свет", "выключи свет"]))
+    controller.add_source("спальня", PhraseSource(["статус камеры"]))
+    controller.start_all()
+    assert controller.wait_until_stopped(timeout=5)
+
+    results = drain(controller)
+    assert sorted((r.source, r.text) for r in results) == [
+        ("кухня", "включи свет"), ("кухня", "выключи свет"), ("спальня", "статус камеры")]
+    assert not controller.is_listening
+    # Последний поток захвата закрыл пул
+    assert controller.pool is None
+
+def test_starting_active_source_again_is_refused():
+    controller = SpeechRecognitionController(recognizer=TranscriptRecognizer())
+    source = EndlessSource(delay=0.02)
+    assert controller.start_listening(source=source)
+    assert not controller.start_listening(source=source)
+    assert controller.shutdown(timeout=2)
+
+def test_stop_and_start_never_reads_source_twice():
+    controller = SpeechRecognitionController(recognizer=TranscriptRecognizer())
+    source = EndlessSource(delay=0.05)
+    for _ in range(5):
+        assert controller.start_listening(source=source)
+        controller.stop_listening()
+    assert controller.start_listening(source=source)
+    time.sleep(0.1)
+    assert source.max_readers == 1
+    assert controller.shutdown(timeout=2)
+    assert controller.pool is None
+
+def test_restart_gives_up_while_old_capture_thread_is_busy():
+    controller = SpeechRecognitionController(recognizer=TranscriptRecognizer())
+    controller.restart_timeout = 0.05
+    source = EndlessSource(delay=0.5)
+    assert controller.start_listening(source=source)
+    time.sleep(0.05)
+    controller.stop_listening()
+    started = time.time()
+    assert not controller.start_listening(source=source)
+    assert time.time() - started < 0.3
+    assert controller.wait_until_stopped(timeout=2)
+    assert controller.start_listening(source=source)
+    assert controller.shutdown(timeout=2)
+
+def test_full_recognition_queue_drops_clips():
+    controller = SpeechRecognitionController(recognizer=TranscriptRecognizer(latency=0.2),
+                                             pool_size=1, max_pending=1)
+    controller.submit_timeout = 0.01
+    controller.start_listening(source=PhraseSource(["раз", "два", "три", "четыре"]))
+    assert controller.wait_until_stopped(timeout=5)
+    assert controller.dropped_clips > 0
+    assert len(drain(controller)) + controller.dropped_clips == 4
@@ -0,0 +1,72 @@
+import random
+import threading
+
+import pytest
+
+from streaming_statistics import QuantileSketch
+
+def exact_quantile(values, p):
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * p
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def sketch_of(values, p, exact_limit=512):
+    sketch = QuantileSketch(p, exact_limit)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+@pytest.mark.parametrize("p", [0.05, 0.5, 0.95])
+def test_short_series_is_exact(p):
+    rng = random.Random(1)
+    values = [rng.uniform(0, 100) for _ in range(300)]
+    assert sketch_of(values, p).value() == pytest.approx(exact_quantile(values, p))
+
+def test_empty_sketch():
+    assert QuantileSketch(0.5).value() == 0.0
+
+@pytest.mark.parametrize("p", [0.05, 0.5, 0.95])
+def test_uniform_stream_within_one_percent_of_range(p):
+    rng = random.Random(7)
+    values = [rng.uniform(0, 1000) for _ in range(50000)]
+    assert abs(sketch_of(values, p).value() - exact_quantile(values, p)) < 10
+
+@pytest.mark.parametrize("p", [0.05, 0.5, 0.95])
+def test_normal_stream_within_tenth_of_sigma(p):
+    rng = random.Random(11)
+    values = [rng.gauss(20.0, 5.0) for _ in range(50000)]
+    assert abs(sketch_of(values, p).value() - exact_quantile(values, p)) < 0.5
+
+def test_sorted_stream_with_markers_from_start():
+    # exact_limit=5: маркеры ставятся сразу, без точного буфера
+    values = [float(i) for i in range(10001)]
+    assert abs(sketch_of(values, 0.5, exact_limit=5).value() - 5000) < 100
+
+def test_markers_stay_ordered_on_constant_and_repeated_values():
+    sketch = sketch_of([3.0] * 1000 + [1.0, 5.0] * 1000, 0.5, exact_limit=5)
+    assert sketch.heights == sorted(sketch.heights)
+    assert sketch.positions == sorted(sketch.positions)
+    assert 1.0 <= sketch.value() <= 5.0
+
+def test_incremental_strategy_counts_each_value_once_under_concurrency():
+    from controllers import AnalysisController
+    from models import RequestRepository, SensorDataRepository
+    from patterns import IncrementalStatisticalStrategy
+
+    repo = SensorDataRepository()
+    controller = AnalysisController(RequestRepository(), sensor_repo=repo)
+    strategy = IncrementalStatisticalStrategy()
+
+    def feed():
+        for _ in range(100):
+            repo.save_values([1.0] * 10)
+            controller.perform_live_analysis(strategy)
+
+    threads = [threading.Thread(target=feed) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert strategy.streams["датчики"].running.count == repo.version == 4000
@@ -0,0 +1,109 @@
+import json
+import socket
+import time
+
+import pytest
+
+from controllers import DeviceController
+from event_bus import DEVICE
+from models import Device, DeviceRepository, SensorDataRepository, Sound, SoundRepository
+from telemetry import LocalBroker, TelemetryIngester, TelemetryServer, attach_broker, topic_pattern
+
+@pytest.fixture
+def controller(tmp_path):
+    repo = DeviceRepository(str(tmp_path / "devices.json"))
+    for i in range(3):
+        repo.save(Device(str(i), f"Датчик {i}", "сенсор", "offline", ""))
+    return DeviceController(repo)
+
+def report(device_id, status=None, value=None):
+    return json.dumps({"device": device_id, "status": status, "value": value})
+
+def test_latest_status_per_device_is_applied_in_one_batch(controller):
+    sensors = SensorDataRepository()
+    ingester = TelemetryIngester(controller, sensors)
+    events = []
+    controller.get_bus().subscribe(DEVICE, events.append)
+    for status in ["online", "offline", "online"]:
+        ingester.ingest(report("0", status, 21.5))
+    ingester.ingest(report("1", "offline"))
+    ingester.ingest(report("9", "online"))
+    assert ingester.flush() == 3
+    assert [event["type"] for event in events] == ["devices_updated"]
+    assert [device.id for device in events[0]["devices"]] == ["0"]
+    assert sensors.get_value_window(10).tolist() == [21.5] * 3
+    stats = ingester.get_stats()
+    assert (stats["coalesced"], stats["statuses_changed"], stats["unknown_devices"]) == (2, 1, 1)
+    # Нечего записывать - репозитории не трогаются
+    assert ingester.flush() == 0
+
+def test_malformed_reports_are_counted(controller):
+    ingester = TelemetryIngester(controller, SensorDataRepository())
+    assert not ingester.ingest(b"not json")
+    assert not ingester.ingest(json.dumps({"status": "online"}))
+    assert not ingester.ingest(report("0", value="много"))
+    assert ingester.ingest_lines(b"%s\n\n%s\n{" % (report("0", "online").encode(), report("1").encode())) == 2
+    assert ingester.get_stats()["malformed"] == 4
+
+def test_oldest_readings_are_dropped_when_behind(controller):
+    sensors = SensorDataRepository()
+    ingester = TelemetryIngester(controller, sensors, max_pending=3)
+    for value in range(5):
+        ingester.submit("0", value=float(value))
+    ingester.flush()
+    assert sensors.get_value_window(10).tolist() == [2.0, 3.0, 4.0]
+    assert ingester.get_stats()["dropped"] == 2
+
+def test_statuses_are_persisted_on_stop(controller, tmp_path):
+    ingester = TelemetryIngester(controller, SensorDataRepository(), flush_interval=0.01,
+                                 persist_interval=3600)
+    ingester.start()
+    ingester.submit("1", "online")
+    time.sleep(0.1)
+    assert controller.get_device_by_id("1").status == "online"
+    ingester.stop()
+    saved = json.loads((tmp_path / "devices.json").read_text(encoding="utf-8"))
+    assert {item["id"]: item["status"] for item in saved}["1"] == "online"
+
+def test_topic_filters():
+    assert topic_pattern("devices/+/telemetry").match("devices/42/telemetry").group(1) == "42"
+    assert not topic_pattern("devices/+/telemetry").match("devices/42/x/telemetry")
+    assert topic_pattern("devices/#").match("devices/42/telemetry")
+    assert not topic_pattern("devices/#").match("rooms/1")
+
+def test_broker_reports_take_device_id_from_topic(controller):
+    ingester = TelemetryIngester(controller, SensorDataRepository())
+    broker = LocalBroker()
+    attach_broker(ingester, broker)
+    assert broker.publish("devices/2/telemetry", json.dumps({"status": "online"}).encode()) == 1
+    assert broker.publish("devices/2/status", b"{}") == 0
+    ingester.flush()
+    assert controller.get_device_by_id("2").status == "online"
+
+def test_server_accepts_udp_and_tcp(controller):
+    ingester = TelemetryIngester(controller, SensorDataRepository())
+    server = TelemetryServer(ingester, udp_port=0, tcp_port=0)
+    server.start()
+    try:
+        udp_address, tcp_address = server.addresses()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+            udp.sendto(f"{report('0', 'online')}\n{report('1', 'online')}".encode(), udp_address)
+        with socket.create_connection(tcp_address) as tcp:
+            tcp.sendall(f"{report('2', 'online')}\n".encode())
+        deadline = time.time() + 2
+        while ingester.get_stats()["received"] < 3 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        server.stop()
+    assert ingester.flush() == 3
+
+def test_sound_repository_keeps_recent_frequencies():
+    sounds = SoundRepository(max_values=8, max_records=4)
+    for i in range(1, 21):
+        sounds.save(Sound(id=i, frequency=100 * i, noise_level="low"))
+    sounds.save(Sound(id=0, frequency=0, noise_level="unknown"))
+    assert len(sounds.get_all()) == 4
+    assert len(sounds.frequencies) <= 8 + 8 // 4
+    values, version = sounds.get_frequencies_since(0)
+    assert version == 20 and values[-1] == 2000
+    assert sounds.get_frequencies_since(18)[0].tolist() == [1900.0, 2000.0]
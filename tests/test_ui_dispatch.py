@@ -0,0 +1,85 @@
+from phrase_queue import PhraseQueue
+from speech_recognition_module import RecognizedPhrase
+from ui_dispatch import ImmediateDispatcher, SpeechEventBridge, TkDispatcher
+
+class FakeRoot:
+    """Окно Tk без дисплея: привязка и генерация виртуального события"""
+    def __init__(self):
+        self.handlers = {}
+        self.generated = 0
+
+    def bind(self, event, handler):
+        self.handlers[event] = handler
+
+    def event_generate(self, event, when=None):
+        self.generated += 1
+
+    def run_pending(self):
+        self.handlers[TkDispatcher.EVENT]()
+
+class RecordingDispatcher:
+    def __init__(self):
+        self.posted = []
+
+    def post(self, callback, *args):
+        self.posted.append((callback, args))
+
+    def run(self):
+        posted, self.posted = self.posted, []
+        for callback, args in posted:
+            callback(*args)
+
+class PhraseSource:
+    """Контроллер речи в части, нужной мосту: очередь фраз"""
+    def __init__(self):
+        self.phrases = PhraseQueue()
+
+    def get_next_result(self, timeout=0):
+        return self.phrases.get(timeout=timeout) if not self.phrases.empty() else None
+
+def test_tk_dispatcher_wakes_loop_once_per_batch():
+    root = FakeRoot()
+    dispatcher = TkDispatcher(root)
+    calls = []
+    for i in range(3):
+        dispatcher.post(calls.append, i)
+    assert root.generated == 1
+    root.run_pending()
+    assert calls == [0, 1, 2]
+    dispatcher.post(calls.append, 3)
+    assert root.generated == 2
+
+def test_tk_dispatcher_keeps_running_after_failing_callback(capsys):
+    root = FakeRoot()
+    dispatcher = TkDispatcher(root)
+    calls = []
+    dispatcher.post(lambda: 1 / 0)
+    dispatcher.post(calls.append, "после ошибки")
+    root.run_pending()
+    assert calls == ["после ошибки"]
+    assert "Ошибка обработчика интерфейса" in capsys.readouterr().out
+
+def test_bridge_delivers_burst_in_one_drain():
+    controller = PhraseSource()
+    dispatcher = RecordingDispatcher()
+    handled = []
+    bridge = SpeechEventBridge(controller, dispatcher, lambda result: handled.append(result.text))
+    for text in ["раз", "два", "три"]:
+        controller.phrases.put(RecognizedPhrase(text, "default", 0.0, 0.0))
+        bridge.update({"type": "phrase_recognized", "source": "default"})
+    assert len(dispatcher.posted) == 1
+    dispatcher.run()
+    assert handled == ["раз", "два", "три"]
+    assert bridge.get_stats()["dispatched"] == 3
+
+def test_bridge_ignores_other_events():
+    dispatcher = RecordingDispatcher()
+    bridge = SpeechEventBridge(PhraseSource(), dispatcher, lambda result: None)
+    bridge.update({"type": "listening_started"})
+    bridge.update("не событие")
+    assert dispatcher.posted == []
+
+def test_immediate_dispatcher_runs_in_caller_thread():
+    calls = []
+    ImmediateDispatcher().post(calls.append, 1)
+    assert calls == [1]